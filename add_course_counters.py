@@ -0,0 +1,37 @@
+"""
+Migration script to add denormalized counter columns to the courses table
+Run this after updating the models, then it fills the counters in
+"""
+
+from app import create_app, db
+from app.counters import reconcile_course_counters
+from sqlalchemy import text
+
+app = create_app()
+
+COUNTER_COLUMNS = ['enrollment_count', 'lesson_count', 'total_duration', 'pdf_count']
+
+with app.app_context():
+    print("Adding counter columns to courses table...")
+    
+    try:
+        # Check which columns already exist
+        result = db.session.execute(text("PRAGMA table_info(courses)"))
+        columns = [row[1] for row in result]
+        
+        for column in COUNTER_COLUMNS:
+            if column not in columns:
+                db.session.execute(text(
+                    f"ALTER TABLE courses ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0"
+                ))
+                print(f"✅ Added {column} column")
+            else:
+                print(f"ℹ️  {column} column already exists")
+        db.session.commit()
+        
+        fixed = reconcile_course_counters()
+        print(f"✅ Counters filled in for {fixed} course(s)")
+    
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        db.session.rollback()
@@ -0,0 +1,29 @@
+"""
+Migration script to add lessons_changed_at column to courses table
+The course detail page caches its lesson list keyed on this stamp
+"""
+
+from app import create_app, db
+from sqlalchemy import text
+
+app = create_app()
+
+with app.app_context():
+    print("Adding lessons_changed_at column to courses table...")
+    
+    try:
+        # Check if column already exists
+        result = db.session.execute(text("PRAGMA table_info(courses)"))
+        columns = [row[1] for row in result]
+        
+        if 'lessons_changed_at' not in columns:
+            db.session.execute(text("ALTER TABLE courses ADD COLUMN lessons_changed_at DATETIME"))
+            db.session.execute(text("UPDATE courses SET lessons_changed_at = CURRENT_TIMESTAMP"))
+            db.session.commit()
+            print("✅ Successfully added lessons_changed_at column to courses table!")
+        else:
+            print("ℹ️  lessons_changed_at column already exists in courses table")
+    
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        db.session.rollback()
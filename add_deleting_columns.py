@@ -0,0 +1,34 @@
+"""
+Migration script to add the deleting_at columns that mark users and courses
+queued for background deletion
+"""
+
+from app import create_app, db
+from sqlalchemy import text
+
+app = create_app()
+
+TABLES = ['users', 'courses']
+
+with app.app_context():
+    print("Adding deleting_at columns...")
+    
+    try:
+        for table in TABLES:
+            result = db.session.execute(text(f"PRAGMA table_info({table})"))
+            columns = [row[1] for row in result]
+            
+            if 'deleting_at' not in columns:
+                db.session.execute(text(f"ALTER TABLE {table} ADD COLUMN deleting_at DATETIME"))
+                print(f"✅ Added deleting_at to {table}")
+            else:
+                print(f"ℹ️  {table}.deleting_at already exists")
+            db.session.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_deleting_at ON {table} (deleting_at)"
+            ))
+        db.session.commit()
+        print("✅ deleting_at indexes in place")
+    
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        db.session.rollback()
@@ -0,0 +1,34 @@
+"""
+Migration script to add the completed_lessons counter to the enrollments table
+Run this after updating the models, then it fills the counter in
+"""
+
+from app import create_app, db
+from app.counters import reconcile_enrollment_progress
+from sqlalchemy import text
+
+app = create_app()
+
+with app.app_context():
+    print("Adding completed_lessons column to enrollments table...")
+    
+    try:
+        # Check if column already exists
+        result = db.session.execute(text("PRAGMA table_info(enrollments)"))
+        columns = [row[1] for row in result]
+        
+        if 'completed_lessons' not in columns:
+            db.session.execute(text(
+                "ALTER TABLE enrollments ADD COLUMN completed_lessons INTEGER NOT NULL DEFAULT 0"
+            ))
+            db.session.commit()
+            print("✅ Successfully added completed_lessons column to enrollments table!")
+        else:
+            print("ℹ️  completed_lessons column already exists in enrollments table")
+        
+        fixed = reconcile_enrollment_progress()
+        print(f"✅ Progress counters filled in for {fixed} enrollment(s)")
+    
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        db.session.rollback()
@@ -0,0 +1,26 @@
+"""
+Migration script to add the tables `flask import` uses to resume runs
+and to find previously imported courses by their external key
+"""
+
+from app import create_app, db
+from app.models import ImportCheckpoint, ImportKey
+from sqlalchemy import inspect
+
+app = create_app()
+
+with app.app_context():
+    print("Adding bulk import tables...")
+    
+    try:
+        inspector = inspect(db.engine)
+        for model in (ImportCheckpoint, ImportKey):
+            name = model.__tablename__
+            if not inspector.has_table(name):
+                model.__table__.create(bind=db.engine)
+                print(f"✅ Created {name} table")
+            else:
+                print(f"ℹ️  {name} table already exists")
+    
+    except Exception as e:
+        print(f"❌ Error: {e}")
@@ -0,0 +1,22 @@
+"""
+Migration script to add the jobs table used by the background job queue
+"""
+
+from app import create_app, db
+from app.models import Job
+from sqlalchemy import inspect
+
+app = create_app()
+
+with app.app_context():
+    print("Adding jobs table...")
+    
+    try:
+        if not inspect(db.engine).has_table('jobs'):
+            Job.__table__.create(bind=db.engine)
+            print("✅ Successfully created jobs table!")
+        else:
+            print("ℹ️  jobs table already exists")
+    
+    except Exception as e:
+        print(f"❌ Error: {e}")
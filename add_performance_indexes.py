@@ -0,0 +1,31 @@
+"""
+Migration script to add the composite indexes declared on the models
+Safe to re-run: indexes that already exist are skipped
+"""
+
+from app import create_app, db
+from sqlalchemy import inspect
+
+app = create_app()
+
+with app.app_context():
+    print("Adding performance indexes...")
+    
+    try:
+        inspector = inspect(db.engine)
+        for table in db.metadata.sorted_tables:
+            existing = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                if index.name in existing:
+                    print(f"ℹ️  {index.name} already exists")
+                    continue
+                index.create(bind=db.engine)
+                print(f"✅ Created {index.name} on {table.name}({', '.join(c.name for c in index.columns)})")
+        
+        # Refresh planner statistics so the new indexes get used
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql("ANALYZE")
+        print("✅ Indexes ready")
+    
+    except Exception as e:
+        print(f"❌ Error: {e}")
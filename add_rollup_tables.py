@@ -0,0 +1,38 @@
+"""
+Migration script to add the daily rollup tables behind the admin dashboard
+charts, and the source indexes their incremental refresh scans
+Run `flask rollups backfill` afterwards to roll up existing data
+"""
+
+from app import create_app, db
+from app.models import DailyRollup, Enrollment, LessonProgress, RollupWatermark
+from sqlalchemy import inspect
+
+app = create_app()
+
+with app.app_context():
+    print("Adding rollup tables...")
+    
+    try:
+        inspector = inspect(db.engine)
+        for model in (DailyRollup, RollupWatermark):
+            name = model.__tablename__
+            if not inspector.has_table(name):
+                model.__table__.create(bind=db.engine)
+                print(f"✅ Created {name} table")
+            else:
+                print(f"ℹ️  {name} table already exists")
+        
+        for model, index_name in ((Enrollment, 'ix_enrollments_enrolled_at'),
+                                  (LessonProgress, 'ix_lesson_progress_completed_at')):
+            table = model.__table__
+            existing = {index['name'] for index in inspector.get_indexes(table.name)}
+            if index_name in existing:
+                print(f"ℹ️  {index_name} already exists")
+                continue
+            index = next(index for index in table.indexes if index.name == index_name)
+            index.create(bind=db.engine)
+            print(f"✅ Created {index_name}")
+    
+    except Exception as e:
+        print(f"❌ Error: {e}")
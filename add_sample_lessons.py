@@ -257,6 +257,7 @@ while count < 5:
                 duration=lesson_data.get('duration', 30)
             )
             db.session.add(lesson)
+            course.adjust_counters(**lesson.counter_deltas())
             print(f"  ✓ Added: {lesson_data['title']}")
         
         db.session.commit()
@@ -2,10 +2,12 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_migrate import Migrate
+from app.cache import cache
+from app.database import RoutingSession
 from config import Config
 import os
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
 migrate = Migrate()
 
@@ -14,9 +16,16 @@ def create_app(config_class=Config):
     app.config.from_object(config_class)
     
     # Initialize extensions
+    from app import database
+    database.configure_engine_options(app)
     db.init_app(app)
+    database.init_app(app, db)
+    # Registered first, so its after_request hook runs last and sees every query
+    from app import instrumentation
+    instrumentation.init_app(app, db)
     login_manager.init_app(app)
     migrate.init_app(app, db)
+    cache.init_app(app)
     
     # Configure login manager
     login_manager.login_view = 'auth.login'
@@ -42,6 +51,31 @@ def create_app(config_class=Config):
     from app.admin import bp as admin_bp
     app.register_blueprint(admin_bp, url_prefix='/admin')
     
+    from app.api import bp as api_bp
+    app.register_blueprint(api_bp, url_prefix='/api/v1')
+    
+    # Keep the course search index in sync with course writes
+    from app import search
+    
+    # Responsive image helpers for templates
+    from app import images
+    images.init_app(app)
+    
+    # Cached identities for Flask-Login
+    from app import identity
+    identity.init_app(app)
+    
+    # Write-behind buffer for lesson time-on-page
+    from app import heartbeat
+    heartbeat.init_app(app)
+    
+    # Register background job tasks
+    from app import deletion, rollups, uploads
+    
+    # Register CLI commands
+    from app.cli import register_commands
+    register_commands(app)
+    
     return app
 
 from app import models
\ No newline at end of file
@@ -1,9 +1,18 @@
-from flask import render_template, redirect, url_for, flash, request, abort
+from flask import (render_template, redirect, url_for, flash, request, abort, jsonify,
+                   Response, current_app, stream_with_context)
 from flask_login import login_required, current_user
 from functools import wraps
 from app import db
 from app.admin import bp
+from app.cache import cache, invalidate_on_change
+from app.pagination import keyset_paginate, use_keyset, InvalidCursor
+from sqlalchemy.orm import joinedload
 from app.models import User, Course, Enrollment
+from app.jobs import enqueue
+from app.identity import forget_user
+from app.exports import EXPORTS, FORMATS, ExportFilterError, parse_date, stream_export
+from app.rollups import load_trends, schedule_refresh
+from datetime import datetime
 
 def admin_required(f):
     """Decorator to require admin role"""
@@ -15,32 +24,67 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# Dashboard aggregates are cached and dropped when the underlying rows change
+DASHBOARD_KEY = 'admin:dashboard'
+
+invalidate_on_change(User, [DASHBOARD_KEY], attributes=['role', 'username', 'email', 'deleting_at'])
+invalidate_on_change(Course, [DASHBOARD_KEY], attributes=['title', 'category', 'deleting_at'])
+invalidate_on_change(Enrollment, [DASHBOARD_KEY])
+
+
+def load_dashboard_stats():
+    """Platform totals and recent activity as plain data, safe to cache"""
+    # Users and courses queued for deletion are left out everywhere
+    users = User.query.filter(User.deleting_at.is_(None))
+    courses = Course.query.filter(Course.deleting_at.is_(None))
+    recent_users = users.order_by(User.created_at.desc()).limit(5).all()
+    recent_courses = courses.options(joinedload(Course.instructor)) \
+        .order_by(Course.created_at.desc()).limit(5).all()
+    
+    roles = dict(users.with_entities(User.role, db.func.count(User.id)).group_by(User.role).all())
+    
+    return {
+        'total_users': sum(roles.values()),
+        'total_courses': courses.count(),
+        'total_enrollments': Enrollment.query.count(),
+        'students': roles.get('student', 0),
+        'instructors': roles.get('instructor', 0),
+        'admins': roles.get('admin', 0),
+        'recent_users': [{
+            'username': user.username,
+            'email': user.email,
+            'role': user.role,
+            'created_at': user.created_at
+        } for user in recent_users],
+        'recent_courses': [{
+            'title': course.title,
+            'category': course.category,
+            'created_at': course.created_at,
+            'instructor': {'username': course.instructor.username}
+        } for course in recent_courses]
+    }
+
 @bp.route('/dashboard')
 @login_required
 @admin_required
 def dashboard():
     """Admin dashboard"""
-    total_users = User.query.count()
-    total_courses = Course.query.count()
-    total_enrollments = Enrollment.query.count()
-    
-    students = User.query.filter_by(role='student').count()
-    instructors = User.query.filter_by(role='instructor').count()
-    admins = User.query.filter_by(role='admin').count()
-    
-    recent_users = User.query.order_by(User.created_at.desc()).limit(5).all()
-    recent_courses = Course.query.order_by(Course.created_at.desc()).limit(5).all()
+    stats = cache.get_or_set(DASHBOARD_KEY, load_dashboard_stats)
+    # Charts read the daily rollups only; a stale rollup is refreshed in the background
+    schedule_refresh()
+    trends = load_trends(current_app.config.get('ROLLUP_CHART_DAYS', 30))
     
     return render_template('admin/dashboard.html',
                          title='Admin Dashboard',
-                         total_users=total_users,
-                         total_courses=total_courses,
-                         total_enrollments=total_enrollments,
-                         students=students,
-                         instructors=instructors,
-                         admins=admins,
-                         recent_users=recent_users,
-                         recent_courses=recent_courses)
+                         trends=trends,
+                         **stats)
+
+@bp.route('/cache-stats')
+@login_required
+@admin_required
+def cache_stats():
+    """Cache hit/miss statistics for this worker process"""
+    return jsonify(cache.stats())
 
 @bp.route('/users')
 @login_required
@@ -50,13 +94,21 @@ def users():
     page = request.args.get('page', 1, type=int)
     role_filter = request.args.get('role', 'all')
     
-    query = User.query
+    query = User.query.filter(User.deleting_at.is_(None))
     if role_filter != 'all':
         query = query.filter_by(role=role_filter)
     
-    users = query.order_by(User.created_at.desc()).paginate(
-        page=page, per_page=20, error_out=False
-    )
+    if use_keyset():
+        try:
+            users = keyset_paginate(query, User, per_page=20,
+                                    cursor=request.args.get('cursor'),
+                                    with_total=request.args.get('total') == '1')
+        except InvalidCursor:
+            abort(400)
+    else:
+        users = query.order_by(User.created_at.desc()).paginate(
+            page=page, per_page=20, error_out=False
+        )
     
     return render_template('admin/users.html',
                          title='Manage Users',
@@ -69,25 +121,74 @@ def users():
 def delete_user(user_id):
     """Delete a user"""
     user = User.query.get_or_404(user_id)
+    if user.deleting_at is not None:
+        abort(404)
     
     if user.id == current_user.id:
         flash('You cannot delete your own account.', 'danger')
         return redirect(url_for('admin.users'))
     
-    db.session.delete(user)
+    # courses.instructor_id is NOT NULL, so the job could never remove them
+    owned = user.courses_teaching.filter(Course.deleting_at.is_(None)).count()
+    if owned:
+        flash(f'{user.username} still teaches {owned} course(s). Delete or reassign '
+              f'them before deleting the account.', 'danger')
+        return redirect(url_for('admin.users'))
+    
+    # Disable the account now (no logins, hidden from listings); a
+    # background job removes the user with their enrollments and progress
+    user.deleting_at = datetime.utcnow()
+    enqueue('users.delete', priority=20, user_id=user.id)
     db.session.commit()
-    flash(f'User {user.username} deleted successfully.', 'success')
+    forget_user(user.id)
+    flash(f'User {user.username} deleted. Their enrollments are being removed.', 'success')
     return redirect(url_for('admin.users'))
 
+@bp.route('/export/<name>.<fmt>')
+@login_required
+@admin_required
+def export(name, fmt):
+    """Stream enrollments, lesson progress or course rosters as CSV/JSONL"""
+    if name not in EXPORTS or fmt not in FORMATS:
+        abort(404)
+    
+    try:
+        chunks = stream_export(
+            name, fmt,
+            course_id=request.args.get('course_id', type=int),
+            instructor_id=request.args.get('instructor_id', type=int),
+            since=parse_date(request.args.get('since'), 'since'),
+            until=parse_date(request.args.get('until'), 'until', end=True)
+        )
+    except ExportFilterError as e:
+        abort(400, description=str(e))
+    
+    # Rows are read and sent in batches while the download is in progress
+    filename = f"{name}-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}"
+    return Response(stream_with_context(chunks), mimetype=FORMATS[fmt], headers={
+        'Content-Disposition': f'attachment; filename={filename}',
+        'X-Accel-Buffering': 'no',
+    })
+
 @bp.route('/courses')
 @login_required
 @admin_required
 def courses():
     """Manage all courses"""
     page = request.args.get('page', 1, type=int)
-    courses = Course.query.order_by(Course.created_at.desc()).paginate(
-        page=page, per_page=20, error_out=False
-    )
+    query = Course.query.filter(Course.deleting_at.is_(None)).options(joinedload(Course.instructor))
+    
+    if use_keyset():
+        try:
+            courses = keyset_paginate(query, Course, per_page=20,
+                                      cursor=request.args.get('cursor'),
+                                      with_total=request.args.get('total') == '1')
+        except InvalidCursor:
+            abort(400)
+    else:
+        courses = query.order_by(Course.created_at.desc()).paginate(
+            page=page, per_page=20, error_out=False
+        )
     
     return render_template('admin/courses.html',
                          title='Manage Courses',
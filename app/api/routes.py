@@ -0,0 +1,284 @@
+# app/api/routes.py
+"""
+Read-only JSON API (v1) for the catalog, lessons and student progress
+Responses carry a strong ETag built from row version stamps, so a client
+that sends If-None-Match gets an empty 304 when nothing changed. ?fields=
+picks a subset of fields (outlines never include lesson bodies) and course
+lists page with opaque cursors.
+"""
+
+import hashlib
+from functools import wraps
+from flask import abort, current_app, jsonify, request, url_for
+from flask_login import current_user
+from sqlalchemy.orm import defer, joinedload
+from werkzeug.exceptions import HTTPException
+from app import db
+from app.api import bp
+from app.images import image_url
+from app.models import Course, Enrollment, Lesson, LessonProgress
+from app.pagination import keyset_paginate, InvalidCursor
+
+DEFAULT_PER_PAGE = 20
+MAX_PER_PAGE = 100
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+# Field name -> getter; ?fields= may name any subset
+COURSE_FIELDS = {
+    'id': lambda c: c.id,
+    'title': lambda c: c.title,
+    'description': lambda c: c.description,
+    'category': lambda c: c.category,
+    'difficulty': lambda c: c.difficulty,
+    'price': lambda c: c.price,
+    'image_url': lambda c: image_url('courses', c.image, width=400),
+    'instructor': lambda c: {'id': c.instructor_id, 'username': c.instructor.username},
+    'is_published': lambda c: c.is_published,
+    'enrollment_count': lambda c: c.enrollment_count,
+    'lesson_count': lambda c: c.lesson_count,
+    'total_duration': lambda c: c.total_duration,
+    'pdf_count': lambda c: c.pdf_count,
+    'created_at': lambda c: _iso(c.created_at),
+    'updated_at': lambda c: _iso(c.updated_at),
+}
+
+OUTLINE_FIELDS = {
+    'id': lambda l: l.id,
+    'title': lambda l: l.title,
+    'order': lambda l: l.order,
+    'duration': lambda l: l.duration,
+    'has_video': lambda l: bool(l.video_url),
+    'has_pdf': lambda l: bool(l.pdf_file),
+    'created_at': lambda l: _iso(l.created_at),
+}
+
+LESSON_FIELDS = dict(OUTLINE_FIELDS, **{
+    'course_id': lambda l: l.course_id,
+    'content': lambda l: l.content,
+    'video_url': lambda l: l.video_url,
+    'pdf_url': lambda l: url_for('courses.download_pdf', lesson_id=l.id) if l.pdf_file else None,
+})
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+@bp.errorhandler(HTTPException)
+def api_error(error):
+    """Errors as JSON instead of HTML pages"""
+    return jsonify({'error': {'status': error.code, 'message': error.description}}), error.code
+
+
+def api_login_required(f):
+    """Like login_required, but answers 401 instead of redirecting to the login page"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_user.is_authenticated:
+            abort(401)
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def requested_fields(available):
+    """Field names from ?fields=, in the given order; all of them by default"""
+    raw = request.args.get('fields')
+    if not raw:
+        return list(available)
+    names = {name.strip() for name in raw.split(',') if name.strip()}
+    unknown = sorted(names - set(available))
+    if unknown:
+        abort(400, description=f"Unknown fields: {', '.join(unknown)}")
+    names.add('id')
+    return [name for name in available if name in names]
+
+
+def serialize(obj, getters, fields):
+    return {name: getters[name](obj) for name in fields}
+
+
+def make_etag(*parts):
+    """Strong ETag from the version stamps a representation is built from"""
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def conditional_json(etag, build):
+    """304 if the client's copy matches etag, else the JSON from build()"""
+    # If-None-Match compares weakly, so copies a proxy re-tagged W/ still match
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    # Clients may keep a copy but must revalidate it; bodies depend on who asks
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Cookie')
+    return response
+
+
+def can_manage(course):
+    return current_user.is_authenticated and (
+        current_user.role == 'admin' or course.instructor_id == current_user.id)
+
+
+def get_visible_course(course_id):
+    """Course by id; drafts only exist for their instructor and admins"""
+    course = db.session.get(Course, course_id)
+    # A course queued for deletion is gone for everyone, staff included
+    if course is None or course.deleting_at is not None or \
+            not (course.is_published or can_manage(course)):
+        abort(404, description='Course not found')
+    return course
+
+
+def student_enrollment(course_id):
+    """The current student's enrollment in a course, or None"""
+    if not current_user.is_authenticated or current_user.role != 'student':
+        return None
+    return Enrollment.query.filter_by(student_id=current_user.id, course_id=course_id).first()
+
+
+def course_stamp(course, fields):
+    """Everything a course representation can change with"""
+    stamp = (course.id, course.content_version, course.is_published, course.enrollment_count,
+             course.lesson_count, course.total_duration, course.pdf_count)
+    if 'instructor' in fields:
+        stamp += (course.instructor.username,)
+    if 'image_url' in fields:
+        # Switches to a resized variant once the image job has made it
+        stamp += (COURSE_FIELDS['image_url'](course),)
+    return stamp
+
+
+# ============================================================================
+# CATALOG
+# ============================================================================
+
+@bp.route('/courses')
+def list_courses():
+    """Published courses, newest first, a cursor page at a time"""
+    fields = requested_fields(COURSE_FIELDS)
+    per_page = max(1, min(request.args.get('per_page', DEFAULT_PER_PAGE, type=int), MAX_PER_PAGE))
+
+    query = Course.query.filter_by(is_published=True)
+    for name in ('category', 'difficulty'):
+        if request.args.get(name):
+            query = query.filter(getattr(Course, name) == request.args[name])
+    if request.args.get('instructor_id', type=int):
+        query = query.filter(Course.instructor_id == request.args.get('instructor_id', type=int))
+    if 'description' not in fields:
+        query = query.options(defer(Course.description))
+    if 'instructor' in fields:
+        query = query.options(joinedload(Course.instructor))
+
+    try:
+        page = keyset_paginate(query, Course, per_page, cursor=request.args.get('cursor'))
+    except InvalidCursor:
+        abort(400, description='Invalid cursor')
+
+    etag = make_etag('courses', fields, page.next_cursor, page.prev_cursor,
+                     [course_stamp(course, fields) for course in page.items])
+    return conditional_json(etag, lambda: {
+        'data': [serialize(course, COURSE_FIELDS, fields) for course in page.items],
+        'next_cursor': page.next_cursor,
+        'prev_cursor': page.prev_cursor,
+    })
+
+
+@bp.route('/courses/<int:course_id>')
+def get_course(course_id):
+    """One course"""
+    fields = requested_fields(COURSE_FIELDS)
+    course = get_visible_course(course_id)
+    etag = make_etag('course', fields, course_stamp(course, fields))
+    return conditional_json(etag, lambda: {'data': serialize(course, COURSE_FIELDS, fields)})
+
+
+@bp.route('/courses/<int:course_id>/outline')
+def get_outline(course_id):
+    """Ordered lesson list of a course, without lesson bodies"""
+    fields = requested_fields(OUTLINE_FIELDS)
+    course = get_visible_course(course_id)
+    # lessons_changed_at moves on every lesson insert, edit or delete
+    etag = make_etag('outline', fields, course.id, _iso(course.lessons_changed_at))
+
+    def build():
+        lessons = Lesson.query.filter_by(course_id=course.id).options(
+            defer(Lesson.content)).order_by(Lesson.order, Lesson.id)
+        return {'data': [serialize(lesson, OUTLINE_FIELDS, fields) for lesson in lessons]}
+    return conditional_json(etag, build)
+
+
+@bp.route('/lessons/<int:lesson_id>')
+@api_login_required
+def get_lesson(lesson_id):
+    """One lesson with its body, for enrolled students and the course staff"""
+    fields = requested_fields(LESSON_FIELDS)
+    # The body is only loaded if it is requested and the client's copy is stale
+    lesson = Lesson.query.options(defer(Lesson.content)).filter_by(id=lesson_id).first()
+    if lesson is None or lesson.course.deleting_at is not None:
+        abort(404, description='Lesson not found')
+    course = lesson.course
+    if not (can_manage(course) or student_enrollment(course.id)):
+        abort(403, description='Enroll in the course to read its lessons')
+
+    etag = make_etag('lesson', fields, lesson.id, _iso(course.lessons_changed_at))
+    return conditional_json(etag, lambda: {'data': serialize(lesson, LESSON_FIELDS, fields)})
+
+
+# ============================================================================
+# STUDENT PROGRESS
+# ============================================================================
+
+@bp.route('/me/enrollments')
+@api_login_required
+def my_enrollments():
+    """The current student's courses with stored progress"""
+    rows = db.session.query(
+        Enrollment.course_id, Course.title, Enrollment.enrolled_at, Enrollment.progress,
+        Enrollment.completed, Enrollment.completed_lessons, Course.lesson_count
+    ).join(Course, Course.id == Enrollment.course_id).filter(
+        Enrollment.student_id == current_user.id
+    ).order_by(Enrollment.enrolled_at.desc(), Enrollment.id.desc()).all()
+
+    data = [{
+        'course_id': row.course_id,
+        'title': row.title,
+        'enrolled_at': _iso(row.enrolled_at),
+        'progress': row.progress,
+        'completed': bool(row.completed),
+        'completed_lessons': row.completed_lessons,
+        'lesson_count': row.lesson_count,
+    } for row in rows]
+    return conditional_json(make_etag('enrollments', data), lambda: {'data': data})
+
+
+@bp.route('/courses/<int:course_id>/progress')
+@api_login_required
+def get_progress(course_id):
+    """The current student's per-lesson progress in a course"""
+    enrollment = student_enrollment(course_id)
+    if enrollment is None:
+        abort(404, description='Not enrolled in this course')
+
+    rows = db.session.query(
+        LessonProgress.lesson_id, LessonProgress.completed,
+        LessonProgress.completed_at, LessonProgress.time_spent
+    ).filter(LessonProgress.enrollment_id == enrollment.id).order_by(LessonProgress.lesson_id)
+    data = {
+        'course_id': course_id,
+        'progress': enrollment.progress,
+        'completed': bool(enrollment.completed),
+        'completed_lessons': enrollment.completed_lessons,
+        'lessons': [{
+            'lesson_id': row.lesson_id,
+            'completed': bool(row.completed),
+            'completed_at': _iso(row.completed_at),
+            'time_spent': row.time_spent or 0,
+        } for row in rows],
+    }
+    return conditional_json(make_etag('progress', data), lambda: {'data': data})
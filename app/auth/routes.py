@@ -1,9 +1,10 @@
-from flask import render_template, redirect, url_for, flash, request
+from flask import render_template, redirect, url_for, flash, request, abort
 from flask_login import login_user, logout_user, current_user
 from app import db
 from app.auth import bp
 from app.models import User
 from app.forms import RegistrationForm, LoginForm
+from app.passwords import HashingBusy
 
 @bp.route('/register', methods=['GET', 'POST'])
 def register():
@@ -18,7 +19,10 @@ def register():
             email=form.email.data.lower(),
             role=form.role.data
         )
-        user.set_password(form.password.data)
+        try:
+            user.set_password(form.password.data)
+        except HashingBusy:
+            abort(503)
         db.session.add(user)
         db.session.commit()
         flash('Registration successful! Please log in.', 'success')
@@ -35,7 +39,13 @@ def login():
     form = LoginForm()
     if form.validate_on_submit():
         user = User.query.filter_by(email=form.email.data.lower()).first()
-        if user and user.check_password(form.password.data):
+        try:
+            authenticated = user is not None and user.is_active and \
+                user.check_password(form.password.data)
+        except HashingBusy:
+            abort(503)
+        if authenticated:
+            db.session.commit()  # Persists a rehashed password, if any
             login_user(user)
             next_page = request.args.get('next')
             
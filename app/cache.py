@@ -0,0 +1,258 @@
+# app/cache.py
+"""
+Key/value cache with per-key TTL and commit-driven invalidation
+Backends: an in-process LRU ('lru'), a SQLite file shared by all workers
+on a host ('sqlite'), and a no-op ('null'). Values for the shared backend
+are pickled, so cache plain data rather than ORM objects.
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+_MISSING = object()
+
+
+# ============================================================================
+# BACKENDS
+# ============================================================================
+
+class NullCache:
+    """Backend that never stores anything (caching disabled)"""
+
+    def get(self, key):
+        return _MISSING
+
+    def set(self, key, value, ttl):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+    def clear(self):
+        pass
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with per-key expiry"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteCache:
+    """Cache stored in a SQLite file, shared across worker processes"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connect().execute(
+            "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return _MISSING
+        value, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            self.delete(key)
+            return _MISSING
+        return pickle.loads(value)
+
+    def set(self, key, value, ttl):
+        expires_at = time.time() + ttl if ttl else None
+        self._connect().execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), expires_at)
+        )
+
+    def delete(self, *keys):
+        if keys:
+            self._connect().executemany("DELETE FROM cache WHERE key = ?",
+                                        [(key,) for key in keys])
+
+    def clear(self):
+        self._connect().execute("DELETE FROM cache")
+
+
+# ============================================================================
+# CACHE FACADE
+# ============================================================================
+
+class Cache:
+    """Flask extension wrapping a cache backend with hit/miss statistics"""
+
+    def __init__(self):
+        self.backend = NullCache()
+        self.default_timeout = 60
+        self._stats = {'hits': 0, 'misses': 0, 'sets': 0, 'invalidations': 0}
+        self._stats_lock = threading.Lock()
+
+    def init_app(self, app):
+        kind = app.config.get('CACHE_BACKEND', 'lru')
+        self.default_timeout = app.config.get('CACHE_DEFAULT_TIMEOUT', 60)
+        if kind == 'sqlite':
+            self.backend = SQLiteCache(app.config['CACHE_SQLITE_PATH'])
+        elif kind == 'lru':
+            self.backend = LRUCache(app.config.get('CACHE_LRU_MAX_ENTRIES', 1024))
+        else:
+            self.backend = NullCache()
+        app.extensions['cache'] = self
+
+    def _count(self, stat, amount=1):
+        with self._stats_lock:
+            self._stats[stat] += amount
+
+    def get(self, key, default=None):
+        value = self.backend.get(key)
+        if value is _MISSING:
+            self._count('misses')
+            return default
+        self._count('hits')
+        return value
+
+    def set(self, key, value, ttl=None):
+        self.backend.set(key, value, self.default_timeout if ttl is None else ttl)
+        self._count('sets')
+
+    def get_or_set(self, key, loader, ttl=None):
+        """Return the cached value for key, calling loader() on a miss"""
+        value = self.backend.get(key)
+        if value is not _MISSING:
+            self._count('hits')
+            return value
+        self._count('misses')
+        value = loader()
+        self.set(key, value, ttl)
+        return value
+
+    def delete(self, *keys):
+        self.backend.delete(*keys)
+        self._count('invalidations', len(keys))
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        """Hit/miss counters for this process"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        stats['backend'] = type(self.backend).__name__
+        return stats
+
+
+# ============================================================================
+# INVALIDATION HOOKS
+# ============================================================================
+
+_watches = []  # (model, keys, attributes)
+
+
+def invalidate_on_change(model, keys, attributes=None):
+    """Drop keys after any commit that inserts or deletes a model row.
+
+    If attributes is given, updates that change one of those attributes
+    also invalidate; other updates are ignored.
+    """
+    _watches.append((model, tuple(keys), tuple(attributes or ())))
+
+
+def invalidate_model(model):
+    """Drop every key watched for model, for rows written outside the ORM"""
+    keys = {key for watched, keys, _ in _watches if issubclass(model, watched) for key in keys}
+    if keys:
+        cache.delete(*keys)
+
+
+def _attribute_changed(obj, attributes):
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in attributes)
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_stale_keys(session, flush_context, instances):
+    stale = session.info.setdefault('stale_cache_keys', set())
+    for model, keys, attributes in _watches:
+        if any(isinstance(obj, model) for obj in session.new) or \
+                any(isinstance(obj, model) for obj in session.deleted):
+            stale.update(keys)
+        elif attributes and any(isinstance(obj, model) and _attribute_changed(obj, attributes)
+                                for obj in session.dirty):
+            stale.update(keys)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_cascaded_deletes(session, flush_context):
+    # Cascade deletes only show up in session.deleted during the flush
+    stale = session.info.setdefault('stale_cache_keys', set())
+    for model, keys, attributes in _watches:
+        if any(isinstance(obj, model) for obj in session.deleted):
+            stale.update(keys)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_stale_keys(session):
+    stale = session.info.pop('stale_cache_keys', None)
+    if stale:
+        cache.delete(*stale)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_stale_keys(session):
+    session.info.pop('stale_cache_keys', None)
+
+
+cache = Cache()
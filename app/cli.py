@@ -0,0 +1,236 @@
+# app/cli.py
+"""
+Flask CLI commands for maintenance tasks
+Run with `flask --app run <group> <command>`
+"""
+
+import click
+
+
+def register_commands(app):
+    """Attach all command groups to the app"""
+
+    @app.cli.group()
+    def search():
+        """Course search index commands"""
+
+    @search.command('rebuild')
+    def search_rebuild():
+        """Rebuild the course search index from the courses table"""
+        from app.search import rebuild_index
+        backend = rebuild_index()
+        click.echo(f"✅ Search index rebuilt ({backend} backend)")
+
+    @app.cli.group('cache')
+    def cache_group():
+        """Cache commands"""
+
+    @cache_group.command('clear')
+    def cache_clear():
+        """Drop every cached entry"""
+        from app.cache import cache
+        cache.clear()
+        click.echo("✅ Cache cleared")
+
+    @app.cli.group()
+    def counters():
+        """Denormalized course counter commands"""
+
+    @counters.command('reconcile')
+    def counters_reconcile():
+        """Recompute course and enrollment progress counters from source rows"""
+        from app.counters import reconcile_course_counters, reconcile_enrollment_progress
+        fixed = reconcile_course_counters()
+        click.echo(f"✅ Reconciled counters ({fixed} course(s) had drifted)")
+        # Enrollment progress depends on lesson counts, so it goes second
+        fixed = reconcile_enrollment_progress()
+        click.echo(f"✅ Reconciled progress ({fixed} enrollment(s) had drifted)")
+
+    @app.cli.group()
+    def images():
+        """Resized image variant commands"""
+
+    @images.command('regenerate')
+    @click.option('--force', is_flag=True, help='Rebuild variants that already exist')
+    def images_regenerate(force):
+        """Build variants for the default images and every stored upload"""
+        from app import db
+        from app.images import DEFAULT_IMAGES, create_variants
+        from app.models import Course, User
+        names = {kind: {filename} for kind, filename in DEFAULT_IMAGES.items()}
+        names['courses'].update(row[0] for row in db.session.query(Course.image).distinct() if row[0])
+        names['profiles'].update(row[0] for row in db.session.query(User.profile_pic).distinct() if row[0])
+        for kind, filenames in names.items():
+            built = sum(create_variants(kind, filename, force) for filename in sorted(filenames))
+            click.echo(f"✅ {kind}: variants ready for {built} of {len(filenames)} image(s)")
+
+    @app.cli.group()
+    def jobs():
+        """Background job queue commands"""
+
+    @jobs.command('stats')
+    def jobs_stats():
+        """Show job counts by status"""
+        from sqlalchemy import func
+        from app import db
+        from app.models import Job
+        counts = dict(db.session.query(Job.status, func.count(Job.id)).group_by(Job.status))
+        for status in ('queued', 'running', 'done', 'failed'):
+            click.echo(f"{status:<10}{counts.get(status, 0):>8}")
+
+    @jobs.command('list')
+    @click.option('--status', type=click.Choice(['queued', 'running', 'done', 'failed']))
+    @click.option('--limit', default=20, show_default=True)
+    def jobs_list(status, limit):
+        """List the most recent jobs"""
+        from app.models import Job
+        query = Job.query.order_by(Job.id.desc())
+        if status:
+            query = query.filter_by(status=status)
+        for job in query.limit(limit):
+            click.echo(f"#{job.id:<6} {job.status:<8} p{job.priority:<3} {job.attempts}/{job.max_attempts} "
+                       f"{job.name} {job.payload}" + (f"  [{job.last_error}]" if job.last_error else ''))
+
+    @jobs.command('work')
+    @click.option('--workers', type=int, help='Pool size (default JOBS_WORKERS)')
+    @click.option('--executor', type=click.Choice(['thread', 'process']),
+                  help='Pool type (default JOBS_EXECUTOR)')
+    def jobs_work(workers, executor):
+        """Run jobs until interrupted"""
+        from flask import current_app
+        from app.jobs import Worker
+        worker = Worker(current_app._get_current_object(), workers, executor)
+        click.echo(f"Worker started ({worker.workers} {worker.executor} worker(s)); Ctrl-C to stop")
+        processed = worker.run_forever()
+        click.echo(f"✅ Worker stopped after {processed} job(s)")
+
+    @jobs.command('drain')
+    @click.option('--workers', type=int, help='Pool size (default JOBS_WORKERS)')
+    @click.option('--executor', type=click.Choice(['thread', 'process']),
+                  help='Pool type (default JOBS_EXECUTOR)')
+    def jobs_drain(workers, executor):
+        """Run jobs until none are ready, then exit"""
+        from flask import current_app
+        from app.jobs import Worker
+        processed = Worker(current_app._get_current_object(), workers, executor).run(drain=True)
+        click.echo(f"✅ Queue drained ({processed} job(s) run)")
+
+    @jobs.command('retry')
+    @click.argument('job_ids', nargs=-1, type=int)
+    def jobs_retry(job_ids):
+        """Requeue failed jobs (all of them if no ids are given)"""
+        from datetime import datetime
+        from app import db
+        from app.models import Job
+        query = Job.query.filter_by(status='failed')
+        if job_ids:
+            query = query.filter(Job.id.in_(job_ids))
+        count = query.update({Job.status: 'queued', Job.attempts: 0, Job.run_at: datetime.utcnow()},
+                             synchronize_session=False)
+        db.session.commit()
+        click.echo(f"✅ Requeued {count} job(s)")
+
+    @jobs.command('purge')
+    @click.option('--days', default=7, show_default=True, help='Keep jobs finished more recently')
+    def jobs_purge(days):
+        """Delete finished jobs older than --days"""
+        from datetime import datetime, timedelta
+        from app import db
+        from app.models import Job
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        count = Job.query.filter(Job.status == 'done', Job.finished_at < cutoff).delete(
+            synchronize_session=False)
+        db.session.commit()
+        click.echo(f"✅ Purged {count} finished job(s)")
+
+    @app.cli.group()
+    def rollups():
+        """Daily dashboard rollup commands"""
+
+    @rollups.command('refresh')
+    def rollups_refresh():
+        """Add source rows created since the last refresh to the daily rollups"""
+        from app.rollups import refresh_rollups
+        touched = refresh_rollups()
+        click.echo(f"✅ Rollups refreshed ({touched} daily total(s) updated)")
+
+    @rollups.command('backfill')
+    @click.option('--since', type=click.DateTime(formats=['%Y-%m-%d']),
+                  help='Rebuild from this day on (default: all history)')
+    def rollups_backfill(since):
+        """Rebuild the daily rollups from existing data"""
+        from app.rollups import backfill
+        touched = backfill(since.date() if since else None)
+        click.echo(f"✅ Rollups rebuilt ({touched} daily total(s) written)")
+
+    @app.cli.command('import')
+    @click.argument('kind', type=click.Choice(['courses', 'lessons']))
+    @click.argument('manifest', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'fmt', type=click.Choice(['jsonl', 'csv']),
+                  help='Manifest format (default: from the file extension)')
+    @click.option('--chunk-size', type=int, help='Records per transaction (default IMPORT_CHUNK_SIZE)')
+    @click.option('--files', 'files_root', type=click.Path(exists=True, file_okay=False),
+                  help='Folder that image/pdf paths are relative to (default: the manifest folder)')
+    @click.option('--workers', default=4, show_default=True, help='Parallel file copies')
+    @click.option('--restart', is_flag=True, help='Ignore the checkpoint of an earlier run')
+    @click.option('--dry-run', is_flag=True, help='Validate records without writing anything')
+    def import_manifest(kind, manifest, fmt, chunk_size, files_root, workers, restart, dry_run):
+        """Bulk import courses or lessons from a JSONL/CSV manifest, resuming where a run stopped"""
+        import os
+        from flask import current_app
+        from app.importer import ManifestChanged, run_import
+
+        def report(stats):
+            rate = stats['records'] / stats['seconds'] if stats['seconds'] else 0
+            click.echo(f"  {stats['resumed_at'] + stats['records']:>9,} records  "
+                       f"{stats['imported']:>9,} imported  {stats['rejected']:>6,} rejected  "
+                       f"{rate:>8,.0f} rows/s")
+
+        try:
+            stats = run_import(
+                kind, manifest, fmt=fmt,
+                chunk_size=chunk_size or current_app.config.get('IMPORT_CHUNK_SIZE', 1000),
+                files_root=files_root or os.path.dirname(os.path.abspath(manifest)),
+                workers=workers, restart=restart, dry_run=dry_run, on_chunk=report)
+        except ManifestChanged as e:
+            raise click.ClickException(f"{e}; rerun with --restart to start over")
+
+        if stats['resumed_at']:
+            click.echo(f"Resumed after record {stats['resumed_at']:,}")
+        for number, error in stats['errors'][:20]:
+            click.echo(f"⚠️  record {number}: {error}")
+        if stats['rejected'] > 20:
+            click.echo(f"⚠️  ... and {stats['rejected'] - 20} more rejected record(s)")
+        rate = stats['records'] / stats['seconds'] if stats['seconds'] else 0
+        verb = 'Validated' if dry_run else 'Imported'
+        count = stats['records'] - stats['rejected'] if dry_run else stats['imported']
+        click.echo(f"✅ {verb} {count:,} {kind} from {stats['records']:,} record(s) in "
+                   f"{stats['seconds']:.1f}s ({rate:,.0f} rows/s), {stats['rejected']:,} rejected")
+
+    @app.cli.command('export')
+    @click.argument('name', type=click.Choice(['enrollments', 'progress', 'roster']))
+    @click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), default='csv', show_default=True)
+    @click.option('--output', '-o', type=click.File('w', encoding='utf-8'), default='-',
+                  help='File to write (default: stdout)')
+    @click.option('--course-id', type=int, help='Only this course')
+    @click.option('--instructor-id', type=int, help="Only this instructor's courses")
+    @click.option('--since', help='From this ISO date/time (enrollment date, or completion date for progress)')
+    @click.option('--until', help='Up to and including this ISO date')
+    def export_rows(name, fmt, output, course_id, instructor_id, since, until):
+        """Stream enrollments, lesson progress or course rosters as CSV/JSONL"""
+        import time
+        from app.exports import ExportFilterError, parse_date, stream_export
+        started = time.perf_counter()
+        try:
+            chunks = stream_export(name, fmt, course_id=course_id, instructor_id=instructor_id,
+                                   since=parse_date(since, 'since'),
+                                   until=parse_date(until, 'until', end=True))
+        except ExportFilterError as e:
+            raise click.BadParameter(str(e))
+        written = 0
+        for chunk in chunks:
+            output.write(chunk)
+            written += len(chunk)
+        output.flush()
+        click.echo(f"✅ Exported {name} ({written:,} characters) in {time.perf_counter() - started:.1f}s",
+                   err=True)
@@ -0,0 +1,72 @@
+# app/counters.py
+"""
+Reconciliation for the denormalized course and enrollment counters
+Routes keep the counters current incrementally; this recomputes them from
+the source tables to repair any drift (bulk loads, manual SQL, old data).
+"""
+
+from sqlalchemy import and_, func, or_, select
+from app import db
+from app.models import Course, Enrollment, Lesson, LessonProgress
+from app.progress import progress_percent
+
+
+def _true_counts():
+    """Correlated subqueries computing each counter from source rows"""
+    return {
+        'enrollment_count': select(func.count(Enrollment.id))
+            .where(Enrollment.course_id == Course.id).scalar_subquery(),
+        'lesson_count': select(func.count(Lesson.id))
+            .where(Lesson.course_id == Course.id).scalar_subquery(),
+        'total_duration': select(func.coalesce(func.sum(Lesson.duration), 0))
+            .where(Lesson.course_id == Course.id).scalar_subquery(),
+        'pdf_count': select(func.count(Lesson.id))
+            .where(Lesson.course_id == Course.id, Lesson.pdf_file.isnot(None),
+                   Lesson.pdf_file != '').scalar_subquery(),
+    }
+
+
+def reconcile_course_counters(course_ids=None):
+    """Recompute counters for drifted courses; returns how many were fixed"""
+    counts = _true_counts()
+    drifted = or_(*[getattr(Course, name) != expr for name, expr in counts.items()])
+
+    query = Course.query.filter(drifted)
+    if course_ids:
+        query = query.filter(Course.id.in_(course_ids))
+    ids = [row.id for row in query.with_entities(Course.id)]
+
+    if ids:
+        values = dict(counts, updated_at=Course.updated_at)
+        Course.query.filter(Course.id.in_(ids)).update(values, synchronize_session=False)
+        db.session.commit()
+    return len(ids)
+
+
+def reconcile_enrollment_progress(course_ids=None):
+    """Recompute completed-lesson counts, progress and completion; returns how many were fixed"""
+    completed = select(func.count(LessonProgress.id)).where(
+        LessonProgress.enrollment_id == Enrollment.id,
+        LessonProgress.completed.is_(True)
+    ).scalar_subquery()
+    total = select(Course.lesson_count).where(
+        Course.id == Enrollment.course_id
+    ).scalar_subquery()
+    percent = progress_percent(completed, total)
+    finished = and_(total > 0, completed >= total)
+
+    query = Enrollment.query.filter(or_(Enrollment.completed_lessons != completed,
+                                        Enrollment.progress != percent,
+                                        func.coalesce(Enrollment.completed, False) != finished))
+    if course_ids:
+        query = query.filter(Enrollment.course_id.in_(course_ids))
+    ids = [row.id for row in query.with_entities(Enrollment.id)]
+
+    if ids:
+        Enrollment.query.filter(Enrollment.id.in_(ids)).update(
+            {Enrollment.completed_lessons: completed, Enrollment.progress: percent,
+             Enrollment.completed: finished},
+            synchronize_session=False
+        )
+        db.session.commit()
+    return len(ids)
@@ -4,21 +4,49 @@ Complete routes for course and lesson management
 Includes CRUD operations for courses and lessons, plus progress tracking and PDF support
 """
 
-from flask import render_template, redirect, url_for, flash, request, abort, jsonify, send_from_directory
+from flask import render_template, redirect, url_for, flash, request, abort, jsonify, current_app
+from markupsafe import Markup
 from flask_login import login_required, current_user
 from app import db
 from app.courses import bp
-from app.models import Course, Lesson, Enrollment, LessonProgress
+from app.models import Course, Lesson, Enrollment
 from app.forms import CourseForm, LessonForm
+from app.search import search_courses
+from app.pagination import keyset_paginate, use_keyset, InvalidCursor
+from app.cache import cache
+from app.delivery import send_protected_file
+from app.uploads import store_upload, release_uploads
+from app.jobs import enqueue
+from app.progress import (load_progress_snapshot, find_resume_lesson, mark_lesson_complete,
+                          refresh_course_progress, forget_lesson_completions,
+                          load_lesson_time_spent)
+from app.heartbeat import heartbeat_token, read_heartbeat_token, record_heartbeat
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 from datetime import datetime
 import os
-from werkzeug.utils import secure_filename
 
 
 # ============================================================================
 # COURSE ROUTES
 # ============================================================================
 
+def get_course_or_404(course_id, *options):
+    """Course by id; a course queued for deletion is already gone"""
+    course = Course.query.options(*options).get_or_404(course_id)
+    if course.deleting_at is not None:
+        abort(404)
+    return course
+
+
+def get_lesson_or_404(lesson_id):
+    """Lesson by id, unless its course is queued for deletion"""
+    lesson = Lesson.query.get_or_404(lesson_id)
+    if lesson.course.deleting_at is not None:
+        abort(404)
+    return lesson
+
+
 @bp.route('/browse')
 def browse():
     """Browse all published courses with filters and pagination"""
@@ -27,25 +55,32 @@ def browse():
     difficulty = request.args.get('difficulty', 'all')
     search = request.args.get('search', '')
     
-    # Base query - only published courses
-    query = Course.query.filter_by(is_published=True)
+    # Base query - only published courses, with the instructor each card shows
+    query = Course.query.filter_by(is_published=True).options(joinedload(Course.instructor))
     
     # Apply filters
     if category != 'all':
         query = query.filter_by(category=category)
     if difficulty != 'all':
         query = query.filter_by(difficulty=difficulty)
+    
+    # Full-text search ranks best matches first; otherwise newest first.
+    # Ranked results always use page numbers, since cursors follow created_at
     if search:
-        search_filter = f"%{search}%"
-        query = query.filter(
-            (Course.title.ilike(search_filter)) | 
-            (Course.description.ilike(search_filter))
+        courses = search_courses(query, search).paginate(
+            page=page, per_page=9, error_out=False
+        )
+    elif use_keyset():
+        try:
+            courses = keyset_paginate(query, Course, per_page=9,
+                                      cursor=request.args.get('cursor'),
+                                      with_total=request.args.get('total') == '1')
+        except InvalidCursor:
+            abort(400)
+    else:
+        courses = query.order_by(Course.created_at.desc()).paginate(
+            page=page, per_page=9, error_out=False
         )
-    
-    # Paginate results
-    courses = query.order_by(Course.created_at.desc()).paginate(
-        page=page, per_page=9, error_out=False
-    )
     
     return render_template('courses/browse.html',
                          title='Browse Courses',
@@ -58,25 +93,35 @@ def browse():
 @bp.route('/<int:course_id>')
 def detail(course_id):
     """Course detail page with enrollment check"""
-    course = Course.query.get_or_404(course_id)
+    course = get_course_or_404(course_id, joinedload(Course.instructor))
     
     # Check if user is enrolled
-    is_enrolled = False
+    enrollment = None
     if current_user.is_authenticated:
         enrollment = Enrollment.query.filter_by(
             student_id=current_user.id,
             course_id=course_id
         ).first()
-        is_enrolled = enrollment is not None
+    is_enrolled = enrollment is not None
+    
+    # The lesson list is the same for every visitor with the same enrollment
+    # state, so it is rendered once per course version and cached
+    fragments = cache.get_or_set(
+        detail_fragment_key(course, is_enrolled),
+        lambda: render_detail_fragments(course, is_enrolled),
+        ttl=current_app.config['COURSE_FRAGMENT_TIMEOUT']
+    )
     
-    # Get all lessons ordered by sequence
-    lessons = course.lessons.order_by(Lesson.order).all()
+    # Resume at the first unfinished lesson
+    resume_lesson = find_resume_lesson(enrollment) if enrollment else None
     
     return render_template('courses/detail.html',
                          title=course.title,
                          course=course,
-                         lessons=lessons,
-                         is_enrolled=is_enrolled)
+                         fragments=fragments,
+                         is_enrolled=is_enrolled,
+                         resume_lesson=resume_lesson,
+                         completed_lessons=enrollment.completed_lessons if enrollment else 0)
 
 
 @bp.route('/<int:course_id>/enroll', methods=['POST'])
@@ -87,7 +132,7 @@ def enroll(course_id):
         flash('Only students can enroll in courses.', 'danger')
         return redirect(url_for('courses.detail', course_id=course_id))
     
-    course = Course.query.get_or_404(course_id)
+    course = get_course_or_404(course_id)
     
     # Check if already enrolled
     existing = Enrollment.query.filter_by(
@@ -106,18 +151,10 @@ def enroll(course_id):
             completed=False
         )
         db.session.add(enrollment)
-        db.session.commit()
-        
-        # Initialize lesson progress for all lessons
-        lessons = course.lessons.all()
-        for lesson in lessons:
-            lesson_progress = LessonProgress(
-                enrollment_id=enrollment.id,
-                lesson_id=lesson.id,
-                completed=False
-            )
-            db.session.add(lesson_progress)
+        course.adjust_counters(enrollments=1)
         
+        # Lesson progress rows are created on first interaction;
+        # a missing row means the lesson is not completed yet
         db.session.commit()
         flash(f'Successfully enrolled in {course.title}!', 'success')
     
@@ -147,12 +184,7 @@ def create():
         
         # Handle course image upload
         if form.image.data:
-            file = form.image.data
-            filename = secure_filename(file.filename)
-            filename = f"course_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{filename}"
-            filepath = os.path.join('app/static/uploads/courses', filename)
-            file.save(filepath)
-            course.image = filename
+            course.image = store_upload(form.image.data, 'courses')
         
         db.session.add(course)
         db.session.commit()
@@ -168,7 +200,7 @@ def create():
 @login_required
 def edit(course_id):
     """Edit a course"""
-    course = Course.query.get_or_404(course_id)
+    course = get_course_or_404(course_id)
     
     # Check permissions
     if course.instructor_id != current_user.id and current_user.role != 'admin':
@@ -185,13 +217,10 @@ def edit(course_id):
         course.is_published = form.is_published.data
         
         # Handle image upload
+        old_image = course.image
         if form.image.data:
-            file = form.image.data
-            filename = secure_filename(file.filename)
-            filename = f"course_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{filename}"
-            filepath = os.path.join('app/static/uploads/courses', filename)
-            file.save(filepath)
-            course.image = filename
+            course.image = store_upload(form.image.data, 'courses')
+            release_uploads('courses', old_image)
         
         db.session.commit()
         flash('Course updated successfully!', 'success')
@@ -216,15 +245,19 @@ def edit(course_id):
 @login_required
 def delete(course_id):
     """Delete a course"""
-    course = Course.query.get_or_404(course_id)
+    course = get_course_or_404(course_id)
     
     # Check permissions
     if course.instructor_id != current_user.id and current_user.role != 'admin':
         abort(403)
     
-    db.session.delete(course)
+    # Hide the course and lock it against edits now; a background job
+    # removes it with its lessons, enrollments, progress and files
+    course.is_published = False
+    course.deleting_at = datetime.utcnow()
+    enqueue('courses.delete', priority=20, course_id=course.id)
     db.session.commit()
-    flash('Course deleted successfully.', 'success')
+    flash('Course deleted. Its lessons and enrollments are being removed.', 'success')
     
     # Redirect based on user role
     if current_user.role == 'admin':
@@ -240,7 +273,7 @@ def delete(course_id):
 @login_required
 def manage_lessons(course_id):
     """View and manage all lessons for a course"""
-    course = Course.query.get_or_404(course_id)
+    course = get_course_or_404(course_id)
     
     # Check permissions
     if course.instructor_id != current_user.id and current_user.role != 'admin':
@@ -251,14 +284,15 @@ def manage_lessons(course_id):
     return render_template('courses/manage_lessons.html',
                          title='Manage Lessons',
                          course=course,
-                         lessons=lessons)
+                         lessons=lessons,
+                         time_spent=load_lesson_time_spent(course_id))
 
 
 @bp.route('/<int:course_id>/lessons/add', methods=['GET', 'POST'])
 @login_required
 def add_lesson(course_id):
     """Add a new lesson to a course"""
-    course = Course.query.get_or_404(course_id)
+    course = get_course_or_404(course_id)
     
     # Check permissions
     if course.instructor_id != current_user.id and current_user.role != 'admin':
@@ -278,30 +312,11 @@ def add_lesson(course_id):
         
         # Handle PDF upload
         if form.pdf_file.data:
-            file = form.pdf_file.data
-            filename = secure_filename(file.filename)
-            filename = f"lesson_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{filename}"
-            filepath = os.path.join('app/static/uploads/pdfs', filename)
-            
-            # Create pdfs folder if it doesn't exist
-            os.makedirs('app/static/uploads/pdfs', exist_ok=True)
-            
-            file.save(filepath)
-            lesson.pdf_file = filename
+            lesson.pdf_file = store_upload(form.pdf_file.data, 'pdfs')
         
         db.session.add(lesson)
-        db.session.commit()
-        
-        # Create lesson progress entries for all enrolled students
-        enrollments = Enrollment.query.filter_by(course_id=course_id).all()
-        for enrollment in enrollments:
-            lesson_progress = LessonProgress(
-                enrollment_id=enrollment.id,
-                lesson_id=lesson.id,
-                completed=False
-            )
-            db.session.add(lesson_progress)
-        
+        course.adjust_counters(**lesson.counter_deltas())
+        refresh_course_progress(course_id)
         db.session.commit()
         flash('Lesson added successfully!', 'success')
         return redirect(url_for('courses.manage_lessons', course_id=course_id))
@@ -321,7 +336,7 @@ def add_lesson(course_id):
 @login_required
 def edit_lesson(lesson_id):
     """Edit an existing lesson"""
-    lesson = Lesson.query.get_or_404(lesson_id)
+    lesson = get_lesson_or_404(lesson_id)
     course = lesson.course
     
     # Check permissions
@@ -331,34 +346,23 @@ def edit_lesson(lesson_id):
     form = LessonForm()
     
     if form.validate_on_submit():
+        old_deltas = lesson.counter_deltas(-1)
         lesson.title = form.title.data
         lesson.content = form.content.data
         lesson.order = form.order.data
         lesson.video_url = form.video_url.data
         lesson.duration = form.duration.data
         
-        # Handle PDF upload
+        # Handle PDF upload; the old file goes only if nothing else uses it
+        old_pdf = lesson.pdf_file
         if form.pdf_file.data:
-            # Delete old PDF if exists
-            if lesson.pdf_file:
-                old_filepath = os.path.join('app/static/uploads/pdfs', lesson.pdf_file)
-                if os.path.exists(old_filepath):
-                    try:
-                        os.remove(old_filepath)
-                    except Exception as e:
-                        print(f"Error deleting old PDF: {e}")
-            
-            # Save new PDF
-            file = form.pdf_file.data
-            filename = secure_filename(file.filename)
-            filename = f"lesson_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{filename}"
-            filepath = os.path.join('app/static/uploads/pdfs', filename)
-            
-            # Create pdfs folder if it doesn't exist
-            os.makedirs('app/static/uploads/pdfs', exist_ok=True)
-            
-            file.save(filepath)
-            lesson.pdf_file = filename
+            lesson.pdf_file = store_upload(form.pdf_file.data, 'pdfs')
+            if old_pdf != lesson.pdf_file:
+                release_uploads('pdfs', old_pdf)
+        
+        # Shift course counters by the difference the edit made
+        new_deltas = lesson.counter_deltas()
+        course.adjust_counters(**{key: new_deltas[key] + old_deltas[key] for key in new_deltas})
         
         db.session.commit()
         flash('Lesson updated successfully!', 'success')
@@ -383,24 +387,21 @@ def edit_lesson(lesson_id):
 @login_required
 def delete_lesson(lesson_id):
     """Delete a lesson"""
-    lesson = Lesson.query.get_or_404(lesson_id)
+    lesson = get_lesson_or_404(lesson_id)
     course = lesson.course
     
     # Check permissions
     if course.instructor_id != current_user.id and current_user.role != 'admin':
         abort(403)
     
-    # Delete associated PDF if exists
-    if lesson.pdf_file:
-        pdf_filepath = os.path.join('app/static/uploads/pdfs', lesson.pdf_file)
-        if os.path.exists(pdf_filepath):
-            try:
-                os.remove(pdf_filepath)
-            except Exception as e:
-                print(f"Error deleting PDF: {e}")
-    
     course_id = course.id
+    course.adjust_counters(**lesson.counter_deltas(-1))
+    forget_lesson_completions(lesson.id)
+    
+    # Delete the attached PDF unless another lesson shares it
+    release_uploads('pdfs', lesson.pdf_file)
     db.session.delete(lesson)
+    refresh_course_progress(course_id)
     db.session.commit()
     flash('Lesson deleted successfully.', 'success')
     
@@ -415,7 +416,7 @@ def delete_lesson(lesson_id):
 @login_required
 def download_pdf(lesson_id):
     """Download/view lesson PDF"""
-    lesson = Lesson.query.get_or_404(lesson_id)
+    lesson = get_lesson_or_404(lesson_id)
     course = lesson.course
     
     # Check if user has access (enrolled student, instructor, or admin)
@@ -440,20 +441,12 @@ def download_pdf(lesson_id):
         flash('No PDF attachment found for this lesson.', 'warning')
         return redirect(url_for('courses.view_lesson', lesson_id=lesson_id))
     
-    # Construct the full file path
-    pdf_directory = os.path.join(os.getcwd(), 'app', 'static', 'uploads', 'pdfs')
-    pdf_path = os.path.join(pdf_directory, lesson.pdf_file)
-    
-    # Check if file exists
-    if not os.path.exists(pdf_path):
-        flash(f'PDF file not found on server.', 'danger')
-        return redirect(url_for('courses.view_lesson', lesson_id=lesson_id))
-    
-    # Serve the PDF file
+    # Access is checked above; the transfer itself may be handed to the proxy
+    pdf_directory = os.path.join(current_app.config['UPLOAD_FOLDER'], 'pdfs')
     try:
-        return send_from_directory(pdf_directory, lesson.pdf_file, as_attachment=False)
-    except Exception as e:
-        flash(f'Error loading PDF: {str(e)}', 'danger')
+        return send_protected_file(pdf_directory, lesson.pdf_file, mimetype='application/pdf')
+    except FileNotFoundError:
+        flash('PDF file not found on server.', 'danger')
         return redirect(url_for('courses.view_lesson', lesson_id=lesson_id))
 
 
@@ -465,12 +458,11 @@ def download_pdf(lesson_id):
 @login_required
 def view_lesson(lesson_id):
     """View lesson content with progress tracking"""
-    lesson = Lesson.query.get_or_404(lesson_id)
+    lesson = get_lesson_or_404(lesson_id)
     course = lesson.course
     
     # Check permissions and enrollment
     enrollment = None
-    is_completed = False
     lesson_completion_status = {}
     
     if current_user.role == 'student':
@@ -482,40 +474,21 @@ def view_lesson(lesson_id):
         if not enrollment:
             flash('You must be enrolled in this course to view lessons.', 'warning')
             return redirect(url_for('courses.detail', course_id=course.id))
-        
-        # Get lesson progress
-        lesson_progress = LessonProgress.query.filter_by(
-            enrollment_id=enrollment.id,
-            lesson_id=lesson.id
-        ).first()
-        
-        is_completed = lesson_progress.completed if lesson_progress else False
-        
-        # Get completion status for all lessons (for sidebar)
-        all_lessons = Lesson.query.filter_by(course_id=course.id).order_by(Lesson.order).all()
-        for l in all_lessons:
-            prog = LessonProgress.query.filter_by(
-                enrollment_id=enrollment.id,
-                lesson_id=l.id
-            ).first()
-            lesson_completion_status[l.id] = prog.completed if prog else False
-        
     elif current_user.role == 'instructor':
         if course.instructor_id != current_user.id:
             abort(403)
-        all_lessons = Lesson.query.filter_by(course_id=course.id).order_by(Lesson.order).all()
-    elif current_user.role == 'admin':
-        all_lessons = Lesson.query.filter_by(course_id=course.id).order_by(Lesson.order).all()
-    else:
+    elif current_user.role != 'admin':
         abort(403)
     
-    # Get navigation lessons
-    all_lessons = Lesson.query.filter_by(course_id=course.id).order_by(Lesson.order).all()
+    # Sidebar outline and completion status in one pass
+    snapshot = load_progress_snapshot(course.id, enrollment)
+    all_lessons = snapshot.lessons
+    is_completed = snapshot.is_completed(lesson.id)
+    if enrollment:
+        lesson_completion_status = snapshot.completion_status
     
     # Find previous and next lessons
-    current_index = all_lessons.index(lesson)
-    prev_lesson = all_lessons[current_index - 1] if current_index > 0 else None
-    next_lesson = all_lessons[current_index + 1] if current_index < len(all_lessons) - 1 else None
+    prev_lesson, next_lesson = snapshot.neighbours(lesson)
     
     return render_template('courses/view_lesson.html',
                          title=lesson.title,
@@ -526,14 +499,15 @@ def view_lesson(lesson_id):
                          next_lesson=next_lesson,
                          is_completed=is_completed,
                          lesson_completion_status=lesson_completion_status,
-                         enrollment=enrollment)
+                         enrollment=enrollment,
+                         heartbeat_token=heartbeat_token(enrollment, lesson) if enrollment else None)
 
 
 @bp.route('/lessons/<int:lesson_id>/complete', methods=['POST'])
 @login_required
 def complete_lesson(lesson_id):
     """Mark a lesson as completed (AJAX endpoint)"""
-    lesson = Lesson.query.get_or_404(lesson_id)
+    lesson = get_lesson_or_404(lesson_id)
     course = lesson.course
     
     if current_user.role != 'student':
@@ -553,50 +527,49 @@ def complete_lesson(lesson_id):
             'message': 'Not enrolled in this course'
         }), 403
     
-    # Get or create lesson progress
-    lesson_progress = LessonProgress.query.filter_by(
-        enrollment_id=enrollment.id,
-        lesson_id=lesson.id
-    ).first()
-    
-    if not lesson_progress:
-        lesson_progress = LessonProgress(
-            enrollment_id=enrollment.id,
-            lesson_id=lesson.id,
-            completed=True,
-            completed_at=datetime.utcnow()
-        )
-        db.session.add(lesson_progress)
-    else:
-        if not lesson_progress.completed:
-            lesson_progress.completed = True
-            lesson_progress.completed_at = datetime.utcnow()
-    
-    db.session.commit()
-    
-    # Calculate and update course progress
-    new_progress = calculate_course_progress(enrollment)
-    enrollment.progress = new_progress
-    
-    # Mark course as completed if 100%
-    if new_progress >= 100:
-        enrollment.completed = True
-    
-    db.session.commit()
+    # Flip the lesson and bump the stored counters in one transaction;
+    # repeat clicks on a completed lesson write nothing
+    try:
+        if mark_lesson_complete(enrollment, lesson.id, course.lesson_count):
+            db.session.commit()
+    except IntegrityError:
+        # A concurrent request created the progress row first
+        db.session.rollback()
     
     return jsonify({
         'success': True,
-        'progress': new_progress,
+        'progress': enrollment.progress,
         'completed': enrollment.completed,
         'message': 'Lesson marked as complete!'
     })
 
 
+@bp.route('/lessons/heartbeat', methods=['POST'])
+@login_required
+def lesson_heartbeat():
+    """Count time on an open lesson page (AJAX/beacon endpoint)"""
+    data = request.get_json(force=True, silent=True) or {}
+    claims = read_heartbeat_token(data.get('token'))
+    if claims is None or claims[0] != current_user.id:
+        return '', 400
+    
+    # The signed token already proves the enrollment, so a ping costs no
+    # queries; seconds are capped so a stalled tab can't claim hours
+    try:
+        seconds = int(data.get('seconds', 0))
+    except (TypeError, ValueError):
+        return '', 400
+    seconds = max(0, min(seconds, current_app.config['HEARTBEAT_INTERVAL'] * 2))
+    if seconds:
+        record_heartbeat(claims[1], claims[2], seconds)
+    return '', 204
+
+
 @bp.route('/<int:course_id>/progress')
 @login_required
 def course_progress(course_id):
     """View detailed course progress"""
-    course = Course.query.get_or_404(course_id)
+    course = get_course_or_404(course_id)
     
     if current_user.role != 'student':
         flash('Only students can view progress.', 'danger')
@@ -612,20 +585,12 @@ def course_progress(course_id):
         return redirect(url_for('courses.detail', course_id=course_id))
     
     # Get all lessons with completion status
-    lessons = course.lessons.order_by(Lesson.order).all()
-    lesson_data = []
-    
-    for lesson in lessons:
-        progress = LessonProgress.query.filter_by(
-            enrollment_id=enrollment.id,
-            lesson_id=lesson.id
-        ).first()
-        
-        lesson_data.append({
-            'lesson': lesson,
-            'completed': progress.completed if progress else False,
-            'completed_at': progress.completed_at if progress else None
-        })
+    snapshot = load_progress_snapshot(course.id, enrollment)
+    lesson_data = [{
+        'lesson': lesson,
+        'completed': snapshot.is_completed(lesson.id),
+        'completed_at': snapshot.completed_at(lesson.id)
+    } for lesson in snapshot.lessons]
     
     return render_template('courses/progress.html',
                          title='Course Progress',
@@ -638,19 +603,20 @@ def course_progress(course_id):
 # HELPER FUNCTIONS
 # ============================================================================
 
-def calculate_course_progress(enrollment):
-    """Calculate accurate course progress based on completed lessons"""
-    course = enrollment.course
-    total_lessons = course.lessons.count()
-    
-    if total_lessons == 0:
-        return 0
-    
-    completed_lessons = LessonProgress.query.filter_by(
-        enrollment_id=enrollment.id,
-        completed=True
-    ).count()
-    
-    progress = int((completed_lessons / total_lessons) * 100)
-    
-    return progress
\ No newline at end of file
+def detail_fragment_key(course, is_enrolled):
+    """Cache key that changes with every course or lesson edit"""
+    audience = 'enrolled' if is_enrolled else 'visitor'
+    return f"course:{course.id}:detail:{course.content_version}:{audience}"
+
+
+def render_detail_fragments(course, is_enrolled):
+    """Render the user-independent parts of the course detail page"""
+    lessons = load_progress_snapshot(course.id, with_content=True).lessons
+    return {
+        'content': Markup(render_template('courses/_detail_content.html',
+                                          course=course,
+                                          lessons=lessons,
+                                          is_enrolled=is_enrolled)),
+        'includes': Markup(render_template('courses/_detail_includes.html',
+                                           lessons=lessons))
+    }
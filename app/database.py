@@ -0,0 +1,136 @@
+# app/database.py
+"""
+Engine profiles for the SQLAlchemy connection
+'sqlite' turns on WAL and related pragmas on every new SQLite connection so
+readers stop waiting on writers and writers wait instead of failing with
+"database is locked". 'server' sizes and health-checks the connection pool
+for PostgreSQL/MySQL. 'auto' picks one from DATABASE_URL; 'default' leaves
+the library defaults alone.
+
+With REPLICA_DATABASE_URL set, RoutingSession sends the reads of GET/HEAD
+requests to a 'replica' bind. Writes, and every query after a write in the
+same request, go to the primary; so do a client's reads for
+REPLICA_READ_AFTER_WRITE seconds after it wrote, so users see their own
+changes even when the replica lags.
+"""
+
+import time
+from flask import current_app, has_request_context, request, session as flask_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+PROFILES = ('default', 'sqlite', 'server')
+REPLICA_BIND = 'replica'
+_PRIMARY_UNTIL = '_read_primary_until'
+
+
+def resolve_profile(config):
+    """Profile name for a config, resolving 'auto' from the database URL"""
+    name = config.get('DATABASE_PROFILE') or 'auto'
+    if name == 'auto':
+        backend = make_url(config['SQLALCHEMY_DATABASE_URI']).get_backend_name()
+        return 'sqlite' if backend == 'sqlite' else 'server'
+    if name not in PROFILES:
+        raise ValueError(f'Unknown DATABASE_PROFILE {name!r}; expected auto or one of {PROFILES}')
+    return name
+
+
+def sqlite_pragmas(config):
+    """PRAGMA name -> value run on each new SQLite connection"""
+    return {
+        'journal_mode': config.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': config.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': config.get('SQLITE_BUSY_TIMEOUT', 5000),
+        'mmap_size': config.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024),
+        'cache_size': config.get('SQLITE_CACHE_SIZE', -64000),
+    }
+
+
+def server_pool_options(config):
+    """create_engine() pool arguments for a server database"""
+    return {
+        'pool_size': config.get('DB_POOL_SIZE', 10),
+        'max_overflow': config.get('DB_MAX_OVERFLOW', 20),
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': config.get('DB_POOL_PRE_PING', True),
+    }
+
+
+def configure_engine_options(app):
+    """Fill SQLALCHEMY_ENGINE_OPTIONS for the profile; call before db.init_app"""
+    profile = resolve_profile(app.config)
+    app.config['DATABASE_PROFILE_ACTIVE'] = profile
+    if app.config.get('REPLICA_DATABASE_URL'):
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        binds.setdefault(REPLICA_BIND, app.config['REPLICA_DATABASE_URL'])
+        app.config['SQLALCHEMY_BINDS'] = binds
+    if profile == 'server':
+        options = dict(server_pool_options(app.config))
+        # Explicit SQLALCHEMY_ENGINE_OPTIONS still win
+        options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    return profile
+
+
+def _apply_pragmas(pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+        finally:
+            cursor.close()
+    return on_connect
+
+
+def init_app(app, db):
+    """Attach per-connection setup to the app's engines; call after db.init_app"""
+    if app.config['DATABASE_PROFILE_ACTIVE'] != 'sqlite':
+        return
+    pragmas = sqlite_pragmas(app.config)
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', _apply_pragmas(pragmas))
+
+
+# ============================================================================
+# READ REPLICA ROUTING
+# ============================================================================
+
+def _replica_allowed():
+    """True inside a read-only request from a client that hasn't just written"""
+    return (has_request_context()
+            and request.method in ('GET', 'HEAD', 'OPTIONS')
+            and flask_session.get(_PRIMARY_UNTIL, 0) <= time.time())
+
+
+class RoutingSession(Session):
+    """db.session that sends plain reads to the replica bind when it is safe"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        primary = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        engines = self._db.engines
+        replica = engines.get(REPLICA_BIND)
+        # Models with their own bind key are never rerouted
+        if replica is None or bind is not None or primary is not engines.get(None):
+            return primary
+
+        if self._flushing or getattr(clause, 'is_dml', False):
+            self.info['read_primary'] = self.info['wrote_primary'] = True
+            return primary
+        # Raw text() statements may write, so they stay on the primary
+        if (self.info.get('read_primary') or not getattr(clause, 'is_select', False)
+                or not _replica_allowed()):
+            return primary
+        return replica
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _stick_to_primary(session):
+    if session.info.pop('wrote_primary', False) and has_request_context():
+        window = current_app.config.get('REPLICA_READ_AFTER_WRITE', 5)
+        if window and REPLICA_BIND in session._db.engines:
+            flask_session[_PRIMARY_UNTIL] = time.time() + window
@@ -0,0 +1,89 @@
+# app/deletion.py
+"""
+Background deletion of courses and users
+Child rows are removed with set-based deletes in batches, each in its own
+short transaction, instead of the ORM loading and deleting every
+enrollment and progress row one at a time inside the request.
+"""
+
+from flask import current_app
+from sqlalchemy import delete, select
+from app import db
+from app.jobs import task
+from app.models import Assignment, Course, Enrollment, Lesson, LessonProgress, User
+from app.uploads import release_uploads
+
+
+def delete_in_batches(model, condition):
+    """Delete model rows matching condition, a batch per commit; returns the count"""
+    batch_size = current_app.config.get('DELETE_BATCH_SIZE', 1000)
+    total = 0
+    while True:
+        ids = select(model.id).where(condition).limit(batch_size).scalar_subquery()
+        deleted = db.session.execute(
+            delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+
+@task('courses.delete', inline=False)
+def delete_course(course_id):
+    """Delete a course with its lessons, enrollments, progress and files"""
+    course = db.session.get(Course, course_id)
+    if course is None:
+        return
+
+    pdf_files = [row.pdf_file for row in course.lessons.with_entities(Lesson.pdf_file)]
+    lesson_ids = select(Lesson.id).where(Lesson.course_id == course_id)
+    delete_in_batches(LessonProgress, LessonProgress.lesson_id.in_(lesson_ids))
+    delete_in_batches(Enrollment, Enrollment.course_id == course_id)
+    delete_in_batches(Assignment, Assignment.course_id == course_id)
+    delete_in_batches(Lesson, Lesson.course_id == course_id)
+
+    # The course row itself goes through the ORM so search and cache hooks fire
+    course = db.session.get(Course, course_id)
+    release_uploads('courses', course.image)
+    release_uploads('pdfs', *pdf_files)
+    db.session.delete(course)
+    db.session.commit()
+
+
+@task('users.delete', inline=False)
+def delete_user(user_id):
+    """Delete a user with their enrollments and progress"""
+    user = db.session.get(User, user_id)
+    if user is None:
+        return
+    # Courses keep a NOT NULL instructor; any still queued for deletion go
+    # first, and this job is retried once their jobs have run
+    if db.session.scalar(select(Course.id).where(Course.instructor_id == user_id).limit(1)):
+        raise RuntimeError(f'User {user_id} still owns courses')
+
+    # Each batch of enrollments leaves together with its course counter
+    # decrements, so a retried job never decrements twice
+    batch_size = current_app.config.get('DELETE_BATCH_SIZE', 1000)
+    while True:
+        batch = db.session.execute(
+            select(Enrollment.id, Enrollment.course_id)
+            .where(Enrollment.student_id == user_id)
+            .limit(batch_size)
+        ).all()
+        if not batch:
+            break
+        enrollment_ids = [row.id for row in batch]
+        delete_in_batches(LessonProgress, LessonProgress.enrollment_id.in_(enrollment_ids))
+        Course.query.filter(Course.id.in_([row.course_id for row in batch])).update(
+            {Course.enrollment_count: Course.enrollment_count - 1,
+             Course.updated_at: Course.updated_at},
+            synchronize_session=False
+        )
+        Enrollment.query.filter(Enrollment.id.in_(enrollment_ids)).delete(synchronize_session=False)
+        db.session.commit()
+
+    user = db.session.get(User, user_id)
+    release_uploads('profiles', user.profile_pic)
+    db.session.delete(user)
+    db.session.commit()
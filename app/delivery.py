@@ -0,0 +1,60 @@
+# app/delivery.py
+"""
+Delivery of access-controlled uploads
+Flask checks permissions, then either hands the transfer to the front proxy
+('x-accel' for nginx, 'x-sendfile' for Apache/lighttpd) or streams the file
+itself ('direct') with Range requests, a strong ETag and revalidation.
+"""
+
+import os
+from flask import current_app, send_file, abort
+from werkzeug.security import safe_join
+from werkzeug.wrappers import Response
+
+
+def file_etag(stat):
+    """Strong validator for one version of a file on disk"""
+    return f'{stat.st_mtime_ns:x}-{stat.st_size:x}'
+
+
+def send_protected_file(directory, filename, mimetype=None):
+    """Serve filename from directory inline, using the configured delivery mode.
+
+    Raises FileNotFoundError if the file is missing, so callers can show
+    their own message.
+    """
+    path = safe_join(directory, filename)
+    if path is None:
+        abort(404)
+    stat = os.stat(path)  # Raises FileNotFoundError for missing files
+
+    mode = current_app.config.get('FILE_DELIVERY', 'direct')
+    max_age = current_app.config.get('PROTECTED_FILE_MAX_AGE', 3600)
+
+    if mode in ('x-accel', 'x-sendfile'):
+        response = Response(mimetype=mimetype or 'application/octet-stream')
+        if mode == 'x-accel':
+            relative = os.path.relpath(path, current_app.config['UPLOAD_FOLDER'])
+            prefix = current_app.config.get('X_ACCEL_REDIRECT_PREFIX', '/protected-uploads')
+            response.headers['X-Accel-Redirect'] = f"{prefix.rstrip('/')}/{relative.replace(os.sep, '/')}"
+        else:
+            response.headers['X-Sendfile'] = path
+        # The proxy handles Range and conditional requests from here
+        response.headers['Content-Disposition'] = f'inline; filename="{os.path.basename(filename)}"'
+    else:
+        response = send_file(
+            path,
+            mimetype=mimetype,
+            as_attachment=False,
+            etag=file_etag(stat),
+            last_modified=stat.st_mtime,
+            max_age=max_age,
+            conditional=True,  # 206 for Range, 304 for If-None-Match/If-Modified-Since
+        )
+        response.headers['Accept-Ranges'] = 'bytes'
+
+    # Browsers may reuse the copy, shared caches must not (access is per user)
+    response.cache_control.private = True
+    response.cache_control.public = False
+    response.cache_control.max_age = max_age
+    return response
@@ -0,0 +1,209 @@
+# app/exports.py
+"""
+Streaming CSV/JSONL exports of enrollments, lesson progress and rosters
+Rows come from a server-side cursor (yield_per) and are encoded a batch at
+a time by generators, so an export of millions of rows runs in constant
+memory and the first bytes go out before the query has finished.
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+from app import db
+from app.models import Course, Enrollment, Lesson, LessonProgress, User
+
+EXPORTS = {}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+# Spreadsheets evaluate a cell starting with one of these as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class ExportFilterError(ValueError):
+    """Raised for a filter value an export cannot use"""
+
+
+def register_export(name, date_column):
+    """Register a function returning the export's SELECT; date_column drives since/until"""
+    def decorator(build):
+        EXPORTS[name] = (build, date_column)
+        return build
+    return decorator
+
+
+# ============================================================================
+# EXPORTS
+# ============================================================================
+
+Student = aliased(User, name='student')
+Instructor = aliased(User, name='instructor')
+
+
+@register_export('enrollments', Enrollment.enrolled_at)
+def enrollments_query():
+    return select(
+        Enrollment.id.label('enrollment_id'),
+        Enrollment.student_id,
+        Student.username.label('student_username'),
+        Student.email.label('student_email'),
+        Course.id.label('course_id'),
+        Course.title.label('course_title'),
+        Instructor.username.label('instructor_username'),
+        Enrollment.enrolled_at,
+        Enrollment.progress,
+        Enrollment.completed_lessons,
+        Course.lesson_count,
+        Enrollment.completed,
+    ).select_from(Enrollment).join(Student, Student.id == Enrollment.student_id) \
+        .join(Course, Course.id == Enrollment.course_id) \
+        .join(Instructor, Instructor.id == Course.instructor_id) \
+        .order_by(Enrollment.id)
+
+
+@register_export('progress', LessonProgress.completed_at)
+def progress_query():
+    return select(
+        LessonProgress.id.label('progress_id'),
+        LessonProgress.enrollment_id,
+        Enrollment.student_id,
+        Student.username.label('student_username'),
+        Course.id.label('course_id'),
+        Course.title.label('course_title'),
+        Lesson.id.label('lesson_id'),
+        Lesson.order.label('lesson_order'),
+        Lesson.title.label('lesson_title'),
+        LessonProgress.completed,
+        LessonProgress.completed_at,
+        LessonProgress.time_spent,
+    ).select_from(LessonProgress) \
+        .join(Enrollment, Enrollment.id == LessonProgress.enrollment_id) \
+        .join(Student, Student.id == Enrollment.student_id) \
+        .join(Lesson, Lesson.id == LessonProgress.lesson_id) \
+        .join(Course, Course.id == Lesson.course_id) \
+        .order_by(LessonProgress.id)
+
+
+@register_export('roster', Enrollment.enrolled_at)
+def roster_query():
+    return select(
+        Course.id.label('course_id'),
+        Course.title.label('course_title'),
+        Instructor.username.label('instructor_username'),
+        Student.id.label('student_id'),
+        Student.username.label('student_username'),
+        Student.email.label('student_email'),
+        Enrollment.enrolled_at,
+        Enrollment.progress,
+        Enrollment.completed,
+    ).select_from(Enrollment).join(Student, Student.id == Enrollment.student_id) \
+        .join(Course, Course.id == Enrollment.course_id) \
+        .join(Instructor, Instructor.id == Course.instructor_id) \
+        .order_by(Course.id, Student.username)
+
+
+# ============================================================================
+# QUERY AND ENCODING
+# ============================================================================
+
+def parse_date(value, name, end=False):
+    """datetime from an ISO date or date/time string (None passes through).
+
+    With end set, a bare date means the end of that day, so an until date
+    includes the whole day.
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ExportFilterError(f'{name} must be an ISO date such as 2024-01-31')
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+def build_export(name, course_id=None, instructor_id=None, since=None, until=None):
+    """SELECT for an export with its filters applied; until is exclusive"""
+    build, date_column = EXPORTS[name]
+    stmt = build()
+    if course_id:
+        stmt = stmt.where(Course.id == course_id)
+    if instructor_id:
+        stmt = stmt.where(Course.instructor_id == instructor_id)
+    if since:
+        stmt = stmt.where(date_column >= since)
+    if until:
+        stmt = stmt.where(date_column < until)
+    return stmt
+
+
+def iter_rows(stmt):
+    """Yield rows through a server-side cursor, yield_per rows at a time"""
+    batch_size = current_app.config.get('EXPORT_BATCH_SIZE', 1000)
+    result = db.session.execute(stmt.execution_options(yield_per=batch_size))
+    try:
+        yield from result
+    finally:
+        result.close()
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _csv_cell(value):
+    if value is None:
+        return ''
+    value = _plain(value)
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        # Usernames and titles are user input; keep them text, not formulas
+        return "'" + value
+    return value
+
+
+def encode_csv(columns, rows, batch_size=1000):
+    """Yield CSV text: a header line, then batch_size rows per chunk"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    # The header goes out at once, before the first batch has been fetched
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    for count, row in enumerate(rows, start=1):
+        writer.writerow([_csv_cell(value) for value in row])
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def encode_jsonl(columns, rows, batch_size=1000):
+    """Yield JSON Lines text, batch_size rows per chunk"""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({column: _plain(value) for column, value in zip(columns, row)}))
+        if len(lines) >= batch_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def stream_export(name, fmt, **filters):
+    """Generator of encoded chunks for an export"""
+    stmt = build_export(name, **filters)
+    columns = list(stmt.selected_columns.keys())
+    encode = encode_csv if fmt == 'csv' else encode_jsonl
+    return encode(columns, iter_rows(stmt))
@@ -40,6 +40,11 @@ class LoginForm(FlaskForm):
     email = StringField('Email', validators=[DataRequired(), Email()])
     password = PasswordField('Password', validators=[DataRequired()])
 
+# Shared with the bulk importer, which validates the same values
+COURSE_CATEGORIES = ['Programming', 'Web Development', 'Data Science', 'Business',
+                     'Design', 'Marketing', 'Other']
+DIFFICULTY_LEVELS = ['Beginner', 'Intermediate', 'Advanced']
+
 class CourseForm(FlaskForm):
     title = StringField('Course Title', validators=[
         DataRequired(),
@@ -49,21 +54,11 @@ class CourseForm(FlaskForm):
         DataRequired(),
         Length(min=20, message='Description must be at least 20 characters')
     ])
-    category = SelectField('Category', choices=[
-        ('Programming', 'Programming'),
-        ('Web Development', 'Web Development'),
-        ('Data Science', 'Data Science'),
-        ('Business', 'Business'),
-        ('Design', 'Design'),
-        ('Marketing', 'Marketing'),
-        ('Other', 'Other')
-    ], validators=[DataRequired()])
+    category = SelectField('Category', choices=[(name, name) for name in COURSE_CATEGORIES],
+                           validators=[DataRequired()])
     price = FloatField('Price', validators=[DataRequired()])
-    difficulty = SelectField('Difficulty Level', choices=[
-        ('Beginner', 'Beginner'),
-        ('Intermediate', 'Intermediate'),
-        ('Advanced', 'Advanced')
-    ], validators=[DataRequired()])
+    difficulty = SelectField('Difficulty Level', choices=[(name, name) for name in DIFFICULTY_LEVELS],
+                             validators=[DataRequired()])
     image = FileField('Course Image', validators=[
         FileAllowed(['jpg', 'jpeg', 'png', 'gif'], 'Images only!')
     ])
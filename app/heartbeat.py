@@ -0,0 +1,185 @@
+# app/heartbeat.py
+"""
+Write-behind buffer for lesson time-on-page heartbeats
+An open lesson page pings every HEARTBEAT_INTERVAL seconds. Each ping only
+adds its seconds to an in-memory total per (enrollment, lesson), never more
+than the time since that key's previous ping, so pinging faster earns
+nothing. The totals are written as one batch of UPDATEs every
+HEARTBEAT_FLUSH_INTERVAL seconds, once HEARTBEAT_FLUSH_EVENTS pings have
+piled up, and at shutdown.
+"""
+
+import atexit
+import os
+import threading
+import time
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import Enrollment, Lesson, LessonProgress
+from app.rollups import record_time_spent
+
+TOKEN_MAX_AGE = 12 * 3600  # A lesson page left open longer stops counting
+
+
+class HeartbeatBuffer:
+    """Per-process totals of unsaved seconds, flushed by a background thread"""
+
+    def __init__(self, app):
+        self.app = app
+        self._lock = threading.Lock()
+        self._pending = {}  # (enrollment_id, lesson_id) -> seconds
+        self._last_ping = {}  # (enrollment_id, lesson_id) -> monotonic time of the last ping
+        self._events = 0
+        self._pid = None
+        self._wake = threading.Event()
+        atexit.register(self.flush)
+
+    def _ensure_thread(self):
+        # Forked web workers start their own flusher and drop the parent's totals
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._pending, self._last_ping, self._events = {}, {}, 0
+            threading.Thread(target=self._run, name='heartbeat-flush', daemon=True).start()
+
+    def _run(self):
+        interval = self.app.config.get('HEARTBEAT_FLUSH_INTERVAL', 5)
+        while True:
+            self._wake.wait(interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                self.app.logger.exception('Heartbeat flush failed')
+
+    def record(self, enrollment_id, lesson_id, seconds):
+        """Add seconds to a lesson's buffered total, at most the time since its last ping"""
+        now = time.monotonic()
+        with self._lock:
+            self._ensure_thread()
+            key = (enrollment_id, lesson_id)
+            last = self._last_ping.get(key)
+            self._last_ping[key] = now
+            if last is not None:
+                seconds = min(seconds, now - last)
+            self._pending[key] = self._pending.get(key, 0) + seconds
+            self._events += 1
+            if self._events >= self.app.config.get('HEARTBEAT_FLUSH_EVENTS', 500):
+                self._wake.set()
+
+    def flush(self):
+        """Write every buffered total; returns how many progress rows were touched"""
+        with self._lock:
+            pending, self._pending, self._events = self._pending, {}, 0
+            # A page silent for two intervals is closed; its next ping starts afresh
+            stale = time.monotonic() - 2 * self.app.config.get('HEARTBEAT_INTERVAL', 30)
+            self._last_ping = {key: at for key, at in self._last_ping.items() if at > stale}
+        # Pings are credited in fractions of a second; whole ones are saved
+        pending = {key: round(seconds) for key, seconds in pending.items() if round(seconds)}
+        if not pending:
+            return 0
+        with self.app.app_context():
+            try:
+                save_time_spent(pending)
+            except Exception:
+                db.session.rollback()
+                # Keep the seconds for the next attempt rather than lose them
+                with self._lock:
+                    for key, seconds in pending.items():
+                        self._pending[key] = self._pending.get(key, 0) + seconds
+                raise
+            finally:
+                db.session.remove()
+        return len(pending)
+
+
+def save_time_spent(totals):
+    """Add {(enrollment_id, lesson_id): seconds} to lesson_progress.time_spent and today's rollup"""
+    enrollment_ids = {enrollment_id for enrollment_id, _ in totals}
+    lesson_ids = {lesson_id for _, lesson_id in totals}
+    # Enrollments or lessons deleted since the ping are skipped
+    live_enrollments = set(db.session.scalars(
+        select(Enrollment.id).where(Enrollment.id.in_(enrollment_ids))))
+    lesson_courses = {lesson_id: course_id for lesson_id, course_id in db.session.execute(
+        select(Lesson.id, Lesson.course_id).where(Lesson.id.in_(lesson_ids)))}
+    totals = {key: seconds for key, seconds in totals.items()
+              if key[0] in live_enrollments and key[1] in lesson_courses}
+
+    existing = set(db.session.execute(
+        select(LessonProgress.enrollment_id, LessonProgress.lesson_id)
+        .where(LessonProgress.enrollment_id.in_(live_enrollments),
+               LessonProgress.lesson_id.in_(lesson_ids))
+    ).tuples())
+
+    _add_time_spent([(enrollment_id, lesson_id, seconds)
+                     for (enrollment_id, lesson_id), seconds in totals.items()
+                     if (enrollment_id, lesson_id) in existing])
+
+    # Progress rows are created lazily, so a first visit inserts one
+    new_rows = [{'enrollment_id': enrollment_id, 'lesson_id': lesson_id,
+                 'completed': False, 'time_spent': seconds}
+                for (enrollment_id, lesson_id), seconds in totals.items()
+                if (enrollment_id, lesson_id) not in existing]
+    if new_rows:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(LessonProgress.__table__.insert(), new_rows)
+        except IntegrityError:
+            # A completion created some of the rows meanwhile; go one by one
+            for row in new_rows:
+                try:
+                    with db.session.begin_nested():
+                        db.session.execute(LessonProgress.__table__.insert(), row)
+                except IntegrityError:
+                    _add_time_spent([(row['enrollment_id'], row['lesson_id'], row['time_spent'])])
+
+    by_course = {}
+    for (_, lesson_id), seconds in totals.items():
+        course_id = lesson_courses[lesson_id]
+        by_course[course_id] = by_course.get(course_id, 0) + seconds
+    record_time_spent(by_course)
+    db.session.commit()
+
+
+def _add_time_spent(increments):
+    """One executemany UPDATE for [(enrollment_id, lesson_id, seconds)]"""
+    if not increments:
+        return
+    db.session.execute(
+        update(LessonProgress.__table__)
+        .where(LessonProgress.enrollment_id == bindparam('e_id'),
+               LessonProgress.lesson_id == bindparam('l_id'))
+        .values(time_spent=func.coalesce(LessonProgress.time_spent, 0) + bindparam('delta')),
+        [{'e_id': e_id, 'l_id': l_id, 'delta': delta} for e_id, l_id, delta in increments]
+    )
+
+
+# ============================================================================
+# PAGE TOKENS
+# ============================================================================
+
+def _serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='lesson-heartbeat')
+
+
+def heartbeat_token(enrollment, lesson):
+    """Signed token the lesson page sends back with every ping"""
+    return _serializer().dumps([enrollment.student_id, enrollment.id, lesson.id])
+
+
+def read_heartbeat_token(token):
+    """(student_id, enrollment_id, lesson_id) from a token, or None if invalid or expired"""
+    try:
+        return tuple(_serializer().loads(token, max_age=TOKEN_MAX_AGE))
+    except (BadSignature, TypeError, ValueError):
+        return None
+
+
+def record_heartbeat(enrollment_id, lesson_id, seconds):
+    current_app.extensions['heartbeats'].record(enrollment_id, lesson_id, seconds)
+
+
+def init_app(app):
+    app.extensions['heartbeats'] = HeartbeatBuffer(app)
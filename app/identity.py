@@ -0,0 +1,105 @@
+# app/identity.py
+"""
+Short-lived per-process cache of logged-in user identities
+Flask-Login reloads the user on every request. With the cache on, it gets
+a CachedUser built from a snapshot of the fields every page needs (id,
+username, email, role, profile_pic) and the users row is only loaded if
+the request touches anything else. Commits that change those fields or
+delete a user drop the snapshot; other processes see the change within
+USER_CACHE_TIMEOUT seconds.
+"""
+
+from flask import current_app
+from flask_login import UserMixin
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app import db
+from app.cache import LRUCache, _MISSING
+
+SNAPSHOT_FIELDS = ('id', 'username', 'email', 'role', 'profile_pic')
+
+_snapshots = LRUCache()
+
+
+class CachedUser(UserMixin):
+    """Stand-in for a User that loads the real row on first use of another field"""
+
+    def __init__(self, snapshot):
+        object.__setattr__(self, '_snapshot', snapshot)
+        object.__setattr__(self, '_user', None)
+
+    def _load(self):
+        from app.models import User
+        user = object.__getattribute__(self, '_user')
+        if user is None:
+            user = db.session.get(User, self._snapshot['id'])
+            object.__setattr__(self, '_user', user)
+        return user
+
+    def __getattr__(self, name):
+        # Only called for names not found on the proxy itself
+        if name.startswith('__'):
+            raise AttributeError(name)
+        user = object.__getattribute__(self, '_user')
+        if user is None and name in self._snapshot:
+            return self._snapshot[name]
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
+
+    def __repr__(self):
+        return f"<CachedUser {self._snapshot['username']}>"
+
+
+def cached_user(user_id):
+    """CachedUser for user_id, reading the row only on a cache miss"""
+    snapshot = _snapshots.get(user_id)
+    if snapshot is _MISSING:
+        from app.models import User
+        row = db.session.query(*[getattr(User, name) for name in SNAPSHOT_FIELDS]) \
+            .filter(User.id == user_id, User.deleting_at.is_(None)).first()
+        if row is None:
+            return None
+        snapshot = dict(zip(SNAPSHOT_FIELDS, row))
+        _snapshots.set(user_id, snapshot, current_app.config.get('USER_CACHE_TIMEOUT', 30))
+    return CachedUser(snapshot)
+
+
+def forget_user(*user_ids):
+    """Drop cached identities, e.g. after a profile edit or deletion"""
+    _snapshots.delete(*user_ids)
+
+
+def init_app(app):
+    _snapshots.max_entries = app.config.get('USER_CACHE_MAX_ENTRIES', 4096)
+
+
+# ============================================================================
+# INVALIDATION HOOKS
+# ============================================================================
+
+def _snapshot_changed(obj):
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in SNAPSHOT_FIELDS)
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_changed_users(session, flush_context, instances):
+    from app.models import User
+    changed = session.info.setdefault('changed_user_ids', set())
+    changed.update(obj.id for obj in session.deleted if isinstance(obj, User))
+    changed.update(obj.id for obj in session.dirty
+                   if isinstance(obj, User) and _snapshot_changed(obj))
+
+
+@event.listens_for(Session, 'after_commit')
+def _forget_changed_users(session):
+    changed = session.info.pop('changed_user_ids', None)
+    if changed:
+        forget_user(*changed)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changed_users(session):
+    session.info.pop('changed_user_ids', None)
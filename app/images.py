@@ -0,0 +1,158 @@
+# app/images.py
+"""
+Resized derivatives of course covers and profile pictures
+Each image gets fixed-size JPEG and WebP variants in a variants/ folder
+beside it, and templates pick one through srcset. Uploads are stored by
+content hash, so variants never go stale once written.
+"""
+
+import os
+from flask import current_app, url_for
+from PIL import Image, ImageOps, UnidentifiedImageError
+from app.jobs import task
+
+# Upload folder -> aspect ratio and variant widths in pixels
+IMAGE_VARIANTS = {
+    'courses': {'ratio': (4, 3), 'widths': (200, 400, 800)},
+    'profiles': {'ratio': (1, 1), 'widths': (64, 128, 256)},
+}
+
+# Format -> Pillow save options
+VARIANT_FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+# Shipped placeholders live in static/images rather than an upload folder
+DEFAULT_IMAGES = {'courses': 'default_course.jpg', 'profiles': 'default.jpg'}
+
+_known_variants = set()  # (kind, filename) pairs whose variants exist
+
+
+def variant_name(filename, width, fmt):
+    """Filename of one derivative of an image"""
+    return f'{os.path.splitext(filename)[0]}-{width}.{fmt}'
+
+
+def build_variants(source_path, variants_dir, kind, force=False):
+    """Write every variant of one image; returns how many files were written.
+
+    Images are center-cropped to the kind's aspect ratio. Existing variants
+    are kept unless force is set.
+    """
+    spec = IMAGE_VARIANTS[kind]
+    ratio_w, ratio_h = spec['ratio']
+    filename = os.path.basename(source_path)
+    os.makedirs(variants_dir, exist_ok=True)
+
+    targets = [(width, fmt) for width in spec['widths'] for fmt in VARIANT_FORMATS
+               if force or not os.path.exists(os.path.join(variants_dir, variant_name(filename, width, fmt)))]
+    if not targets:
+        return 0
+
+    with Image.open(source_path) as image:
+        # Let the JPEG decoder downscale large photos while reading them
+        largest = max(spec['widths'])
+        image.draft('RGB', (largest, largest * ratio_h // ratio_w))
+        image = ImageOps.exif_transpose(image)
+        if image.mode != 'RGB':
+            rgba = image.convert('RGBA')
+            image = Image.new('RGB', rgba.size, 'white')
+            image.paste(rgba, mask=rgba.getchannel('A'))
+
+        for width in sorted({width for width, fmt in targets}):
+            fitted = ImageOps.fit(image, (width, width * ratio_h // ratio_w), Image.LANCZOS)
+            for fmt in [fmt for w, fmt in targets if w == width]:
+                path = os.path.join(variants_dir, variant_name(filename, width, fmt))
+                temp_path = path + '.tmp'
+                fitted.save(temp_path, **VARIANT_FORMATS[fmt])
+                os.replace(temp_path, path)
+    return len(targets)
+
+
+# ============================================================================
+# APP-LEVEL HELPERS
+# ============================================================================
+
+def _static_folder(kind, filename):
+    """Static-relative folder holding an image"""
+    if filename == DEFAULT_IMAGES[kind]:
+        return 'images'
+    return f'uploads/{kind}'
+
+
+def _disk_folder(kind, filename):
+    """Directory holding an image on disk"""
+    if filename == DEFAULT_IMAGES[kind]:
+        return os.path.join(current_app.static_folder, 'images')
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], kind)
+
+
+def _variants_dir(kind, filename):
+    return os.path.join(_disk_folder(kind, filename), 'variants')
+
+
+@task('images.create_variants')
+def create_variants(kind, filename, force=False):
+    """Build variants for a stored image; returns False if it is not an image"""
+    source = os.path.join(_disk_folder(kind, filename), filename)
+    try:
+        build_variants(source, _variants_dir(kind, filename), kind, force)
+    except (UnidentifiedImageError, OSError) as e:
+        current_app.logger.warning('Could not build variants for %s: %s', source, e)
+        return False
+    _known_variants.add((kind, filename))
+    return True
+
+
+def remove_variants(kind, filename):
+    """Delete the variants of an image that is being removed"""
+    _known_variants.discard((kind, filename))
+    variants_dir = _variants_dir(kind, filename)
+    for width in IMAGE_VARIANTS[kind]['widths']:
+        for fmt in VARIANT_FORMATS:
+            try:
+                os.remove(os.path.join(variants_dir, variant_name(filename, width, fmt)))
+            except FileNotFoundError:
+                pass
+
+
+def has_variants(kind, filename):
+    """True once every variant of an image is on disk"""
+    if (kind, filename) in _known_variants:
+        return True
+    widths = IMAGE_VARIANTS[kind]['widths']
+    variants_dir = _variants_dir(kind, filename)
+    if all(os.path.exists(os.path.join(variants_dir, variant_name(filename, max(widths), fmt)))
+           for fmt in VARIANT_FORMATS):
+        _known_variants.add((kind, filename))
+        return True
+    return False
+
+
+def image_url(kind, filename, width=None, fmt='jpg'):
+    """URL of the variant closest to width, or the original if there are none"""
+    filename = filename or DEFAULT_IMAGES[kind]
+    folder = _static_folder(kind, filename)
+    if width is None or not has_variants(kind, filename):
+        return url_for('static', filename=f'{folder}/{filename}')
+    widths = IMAGE_VARIANTS[kind]['widths']
+    width = min((w for w in widths if w >= width), default=max(widths))
+    return url_for('static', filename=f'{folder}/variants/{variant_name(filename, width, fmt)}')
+
+
+def image_srcset(kind, filename, fmt='jpg'):
+    """srcset value listing every variant width, or '' if there are none"""
+    filename = filename or DEFAULT_IMAGES[kind]
+    if not has_variants(kind, filename):
+        return ''
+    folder = _static_folder(kind, filename)
+    return ', '.join(
+        url_for('static', filename=f'{folder}/variants/{variant_name(filename, width, fmt)}') + f' {width}w'
+        for width in IMAGE_VARIANTS[kind]['widths']
+    )
+
+
+def init_app(app):
+    """Expose the URL helpers to templates"""
+    app.jinja_env.globals.update(image_url=image_url, image_srcset=image_srcset)
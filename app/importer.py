@@ -0,0 +1,435 @@
+# app/importer.py
+"""
+Streaming bulk import of courses and lessons from JSONL or CSV manifests
+Records flow through a generator pipeline (read -> skip done -> validate ->
+chunk), so memory stays flat however big the manifest is. Each chunk copies
+its referenced files in parallel, then lands in one transaction of Core
+bulk inserts together with the manifest checkpoint, so a crashed run picks
+up after the last committed chunk.
+"""
+
+import csv
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import islice
+from sqlalchemy import bindparam, func, select, update
+from werkzeug.security import safe_join
+from app import db
+from app.cache import invalidate_model
+from app.forms import COURSE_CATEGORIES, DIFFICULTY_LEVELS
+from app.images import IMAGE_VARIANTS
+from app.jobs import enqueue
+from app.models import Course, ImportCheckpoint, ImportKey, Lesson, User
+from app.progress import refresh_course_progress
+from app.search import get_backend
+from app.uploads import upload_folder, write_content_addressed
+
+IMPORTERS = {}
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'on'}
+MAX_REPORTED_ERRORS = 100  # Rejected records beyond this are only counted
+
+
+class RowError(ValueError):
+    """A manifest record that cannot be imported"""
+
+
+class ManifestChanged(RuntimeError):
+    """The manifest is not the file an unfinished run started on"""
+
+
+def register_importer(name):
+    """Class decorator that registers an importer under a manifest kind"""
+    def decorator(cls):
+        IMPORTERS[name] = cls
+        cls.name = name
+        return cls
+    return decorator
+
+
+# ============================================================================
+# PIPELINE STAGES
+# ============================================================================
+
+def read_manifest(path, fmt=None):
+    """Yield (record number, raw record) from a JSONL or CSV manifest"""
+    fmt = fmt or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+    with open(path, newline='', encoding='utf-8') as manifest:
+        if fmt == 'csv':
+            for number, row in enumerate(csv.DictReader(manifest), start=1):
+                # Empty cells mean "not given", as a missing JSON key would
+                yield number, {name: value for name, value in row.items() if value not in (None, '')}
+        else:
+            for number, line in enumerate(manifest, start=1):
+                yield number, line
+
+
+def skip_done(records, rows_done):
+    """Drop the records a previous run already committed"""
+    for number, record in records:
+        if number > rows_done:
+            yield number, record
+
+
+def validate(records, importer):
+    """Yield (number, clean row or None, error message or None)"""
+    for number, record in records:
+        try:
+            if isinstance(record, str):
+                if not record.strip():
+                    yield number, None, None
+                    continue
+                record = json.loads(record)
+            if not isinstance(record, dict):
+                raise RowError('record must be an object')
+            yield number, importer.clean(record), None
+        except (RowError, ValueError) as e:
+            yield number, None, str(e)
+
+
+def chunked(items, size):
+    """Yield lists of up to size items"""
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# ============================================================================
+# FIELD HELPERS
+# ============================================================================
+
+def text_field(record, name, required=False, min_length=0, max_length=None):
+    value = record.get(name)
+    if value is None or str(value).strip() == '':
+        if required:
+            raise RowError(f'{name} is required')
+        return None
+    value = str(value).strip()
+    if len(value) < min_length or (max_length and len(value) > max_length):
+        limit = f'{min_length}-{max_length}' if max_length else f'at least {min_length}'
+        raise RowError(f'{name} must be {limit} characters')
+    return value
+
+
+def int_field(record, name, required=False, minimum=None):
+    value = record.get(name)
+    if value in (None, ''):
+        if required:
+            raise RowError(f'{name} is required')
+        return None
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise RowError(f'{name} must be a whole number')
+    if minimum is not None and value < minimum:
+        raise RowError(f'{name} must be at least {minimum}')
+    return value
+
+
+def choice_field(record, name, choices, default):
+    value = record.get(name) or default
+    if value not in choices:
+        raise RowError(f"{name} must be one of: {', '.join(choices)}")
+    return value
+
+
+def bool_field(record, name):
+    value = record.get(name)
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in TRUE_VALUES
+
+
+def datetime_field(record, name):
+    value = record.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        raise RowError(f'{name} must be an ISO 8601 date/time')
+
+
+# ============================================================================
+# IMPORTERS
+# ============================================================================
+
+class Importer:
+    """Base class: clean() checks one record, write() stores a chunk"""
+    name = None
+    model = None  # ORM class whose cache keys go stale when rows land
+    file_fields = {}  # row field holding a source path -> (column, upload kind)
+
+    def __init__(self, files_root=None, workers=4):
+        self.files_root = files_root
+        self.workers = workers
+
+    def clean(self, record):
+        """Return a row dict for a valid record or raise RowError"""
+        raise NotImplementedError
+
+    def write(self, rows):
+        """Insert rows [(number, row)]; returns [(number, error)] for rows dropped"""
+        raise NotImplementedError
+
+    def copy_files(self, rows):
+        """Store every referenced file in parallel; returns [(number, error)]"""
+        work = []
+        for number, row in rows:
+            for field, (column, kind) in self.file_fields.items():
+                source = row.pop(field, None)
+                if source:
+                    work.append((number, row, column, kind, source))
+        if not work:
+            return []
+
+        folders = {kind: upload_folder(kind) for _, _, _, kind, _ in work}
+
+        def copy(item):
+            number, row, column, kind, source = item
+            path = safe_join(self.files_root or os.getcwd(), source)
+            if path is None or not os.path.isfile(path):
+                return number, f'file not found: {source}'
+            with open(path, 'rb') as stream:
+                row[column] = write_content_addressed(
+                    stream, folders[kind], os.path.splitext(source)[1].lower())
+            return number, None
+
+        with ThreadPoolExecutor(self.workers) as pool:
+            results = list(pool.map(copy, work))
+
+        # Images copied in this chunk get their variants built by the job queue
+        images = {(kind, row[column]) for _, row, column, kind, _ in work
+                  if kind in IMAGE_VARIANTS and row.get(column)}
+        for kind, filename in sorted(images):
+            enqueue('images.create_variants', priority=0, kind=kind, filename=filename)
+        return [(number, error) for number, error in results if error]
+
+
+@register_importer('courses')
+class CourseImporter(Importer):
+    """Courses keyed by an external `key`; instructors are matched by email"""
+    model = Course
+    file_fields = {'image_path': ('image', 'courses')}
+
+    def clean(self, record):
+        row = {
+            'key': text_field(record, 'key', required=True, max_length=255),
+            'instructor_email': text_field(record, 'instructor', required=True).lower(),
+            'title': text_field(record, 'title', required=True, min_length=5, max_length=200),
+            'description': text_field(record, 'description', required=True, min_length=20),
+            'category': choice_field(record, 'category', COURSE_CATEGORIES, None),
+            'difficulty': choice_field(record, 'difficulty', DIFFICULTY_LEVELS, 'Beginner'),
+            'is_published': bool_field(record, 'is_published'),
+            'image_path': text_field(record, 'image'),
+        }
+        try:
+            row['price'] = float(record.get('price') or 0)
+        except (TypeError, ValueError):
+            raise RowError('price must be a number')
+        if row['price'] < 0:
+            raise RowError('price must not be negative')
+        row['created_at'] = datetime_field(record, 'created_at') or datetime.utcnow()
+        return row
+
+    def write(self, rows):
+        errors = []
+        keys = [row['key'] for _, row in rows]
+        taken = set(db.session.scalars(
+            select(ImportKey.key).where(ImportKey.kind == 'course', ImportKey.key.in_(keys))))
+        emails = {row['instructor_email'] for _, row in rows}
+        instructors = dict(db.session.execute(
+            select(func.lower(User.email), User.id).where(
+                func.lower(User.email).in_(emails), User.role.in_(['instructor', 'admin']))
+        ).all())
+
+        accepted, seen = [], set()
+        for number, row in rows:
+            if row['key'] in taken or row['key'] in seen:
+                errors.append((number, f"course key {row['key']!r} was already imported"))
+            elif row['instructor_email'] not in instructors:
+                errors.append((number, f"no instructor with email {row['instructor_email']}"))
+            else:
+                seen.add(row['key'])
+                accepted.append((number, row))
+
+        failed = dict(self.copy_files(accepted))
+        errors.extend(failed.items())
+        accepted = [(number, row) for number, row in accepted if number not in failed]
+        if not accepted:
+            return errors
+
+        values = [{
+            'title': row['title'], 'description': row['description'],
+            'instructor_id': instructors[row.pop('instructor_email')],
+            'category': row['category'], 'difficulty': row['difficulty'],
+            'price': row['price'], 'is_published': row['is_published'],
+            'image': row.get('image') or 'default_course.jpg',
+            'created_at': row['created_at'], 'updated_at': row['created_at'],
+            'lessons_changed_at': row['created_at'],
+        } for _, row in accepted]
+        courses = Course.__table__
+        ids = db.session.execute(
+            courses.insert().returning(courses.c.id, sort_by_parameter_order=True), values
+        ).scalars().all()
+
+        db.session.execute(ImportKey.__table__.insert(), [
+            {'kind': 'course', 'key': row['key'], 'target_id': course_id}
+            for (_, row), course_id in zip(accepted, ids)])
+
+        # Core inserts skip the ORM hooks that keep the search index current
+        connection = db.session.connection()
+        backend = get_backend(connection.dialect.name)
+        for course_id, value in zip(ids, values):
+            backend.index(connection, course_id, value['title'], value['description'])
+        return errors
+
+
+@register_importer('lessons')
+class LessonImporter(Importer):
+    """Lessons attached by `course_key` (an imported course) or `course_id`"""
+    model = Lesson
+    file_fields = {'pdf_path': ('pdf_file', 'pdfs')}
+
+    def clean(self, record):
+        row = {
+            'course_key': text_field(record, 'course_key', max_length=255),
+            'course_id': int_field(record, 'course_id', minimum=1),
+            'title': text_field(record, 'title', required=True, max_length=200),
+            'content': text_field(record, 'content', required=True),
+            'order': int_field(record, 'order', required=True, minimum=0),
+            'video_url': text_field(record, 'video_url', max_length=255),
+            'duration': int_field(record, 'duration', minimum=0),
+            'pdf_path': text_field(record, 'pdf'),
+        }
+        if not row['course_key'] and not row['course_id']:
+            raise RowError('course_key or course_id is required')
+        if row['pdf_path'] and not row['pdf_path'].lower().endswith('.pdf'):
+            raise RowError('pdf must be a .pdf file')
+        row['created_at'] = datetime_field(record, 'created_at') or datetime.utcnow()
+        return row
+
+    def write(self, rows):
+        errors = []
+        keys = {row['course_key'] for _, row in rows if row['course_key']}
+        by_key = dict(db.session.execute(
+            select(ImportKey.key, ImportKey.target_id).where(
+                ImportKey.kind == 'course', ImportKey.key.in_(keys))
+        ).all()) if keys else {}
+        direct = {row['course_id'] for _, row in rows if not row['course_key']}
+        existing = set(db.session.scalars(
+            select(Course.id).where(Course.id.in_(direct)))) if direct else set()
+
+        accepted = []
+        for number, row in rows:
+            course_id = by_key.get(row['course_key']) if row['course_key'] else row['course_id']
+            if course_id is None or (not row['course_key'] and course_id not in existing):
+                errors.append((number, f"unknown course {row['course_key'] or row['course_id']}"))
+            else:
+                row['course_id'] = course_id
+                accepted.append((number, row))
+
+        failed = dict(self.copy_files(accepted))
+        errors.extend(failed.items())
+        accepted = [row for number, row in accepted if number not in failed]
+        if not accepted:
+            return errors
+
+        db.session.execute(Lesson.__table__.insert(), [{
+            'course_id': row['course_id'], 'title': row['title'], 'content': row['content'],
+            'order': row['order'], 'video_url': row['video_url'], 'duration': row['duration'],
+            'pdf_file': row.get('pdf_file'), 'created_at': row['created_at'],
+        } for row in accepted])
+
+        # Core inserts skip the ORM counter and lesson-stamp bookkeeping
+        deltas = {}
+        for row in accepted:
+            delta = deltas.setdefault(row['course_id'], [0, 0, 0])
+            delta[0] += 1
+            delta[1] += row['duration'] or 0
+            delta[2] += 1 if row.get('pdf_file') else 0
+        courses = Course.__table__
+        db.session.execute(
+            update(courses).where(courses.c.id == bindparam('c_id')).values(
+                lesson_count=courses.c.lesson_count + bindparam('lessons'),
+                total_duration=courses.c.total_duration + bindparam('duration'),
+                pdf_count=courses.c.pdf_count + bindparam('pdfs'),
+                lessons_changed_at=datetime.utcnow(),
+            ),
+            [{'c_id': course_id, 'lessons': lessons, 'duration': duration, 'pdfs': pdfs}
+             for course_id, (lessons, duration, pdfs) in deltas.items()]
+        )
+        for course_id in deltas:
+            refresh_course_progress(course_id)
+        return errors
+
+
+# ============================================================================
+# RUNNER
+# ============================================================================
+
+def _checkpoint(kind, path, restart):
+    manifest = f'{kind}:{os.path.abspath(path)}'
+    size = os.path.getsize(path)
+    checkpoint = ImportCheckpoint.query.filter_by(manifest=manifest).first()
+    if checkpoint is not None and restart:
+        db.session.delete(checkpoint)
+        db.session.commit()
+        checkpoint = None
+    if checkpoint is None:
+        checkpoint = ImportCheckpoint(manifest=manifest, size=size, rows_done=0)
+        db.session.add(checkpoint)
+        db.session.commit()
+    elif checkpoint.size != size:
+        raise ManifestChanged(
+            f'{path} changed since the run that stopped at record {checkpoint.rows_done}')
+    return checkpoint
+
+
+def run_import(kind, path, fmt=None, chunk_size=1000, files_root=None, workers=4,
+               restart=False, dry_run=False, on_chunk=None):
+    """Import a manifest; returns a dict of counts, errors and timing.
+
+    on_chunk(stats) is called after every committed chunk. A dry run only
+    validates records and writes nothing. Rejected records are skipped and
+    listed in stats['errors'] as (record number, message).
+    """
+    importer = IMPORTERS[kind](files_root=files_root, workers=workers)
+    checkpoint = None if dry_run else _checkpoint(kind, path, restart)
+    resumed_at = checkpoint.rows_done if checkpoint else 0
+
+    stats = {'imported': 0, 'rejected': 0, 'records': 0, 'resumed_at': resumed_at,
+             'errors': [], 'seconds': 0.0}
+    started = time.perf_counter()
+    pipeline = validate(skip_done(read_manifest(path, fmt), resumed_at), importer)
+
+    for chunk in chunked(pipeline, chunk_size):
+        errors = [(number, error) for number, _, error in chunk if error]
+        rows = [(number, row) for number, row, _ in chunk if row is not None]
+        dropped = []
+        if not dry_run:
+            if rows:
+                dropped = importer.write(rows)
+            checkpoint.rows_done = chunk[-1][0]
+            db.session.commit()
+            # Core inserts skip the commit hooks that drop cached pages
+            if len(rows) > len(dropped):
+                invalidate_model(importer.model)
+
+        errors = sorted(errors + dropped)
+        stats['records'] += len(chunk)
+        stats['imported'] += len(rows) - len(dropped)
+        stats['rejected'] += len(errors)
+        stats['errors'].extend(errors[:MAX_REPORTED_ERRORS - len(stats['errors'])])
+        stats['seconds'] = time.perf_counter() - started
+        if on_chunk:
+            on_chunk(stats)
+
+    stats['seconds'] = time.perf_counter() - started
+    return stats
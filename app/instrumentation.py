@@ -0,0 +1,175 @@
+# app/instrumentation.py
+"""
+Per-request SQL instrumentation
+Cursor events count and time every statement a request issues. Each
+response gets a Server-Timing header and one structured (JSON) log line.
+A statement shape that runs more than SQL_REPEATED_STATEMENT_LIMIT times
+in one request is logged as a likely N+1 together with its route, and
+QUERY_BUDGETS caps the statements per endpoint. record_requests() hands
+the same numbers to tests and benchmarks so they can assert on them.
+"""
+
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+# IN (?, ?, ?) expands to one placeholder per value; a shape ignores how many
+_PLACEHOLDER_LIST = re.compile(r'(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))+')
+_WHITESPACE = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised for a request over its QUERY_BUDGETS entry when SQL_QUERY_BUDGETS_STRICT is set"""
+
+
+def statement_shape(statement):
+    """Statement text with whitespace and expanded placeholder lists collapsed"""
+    return _PLACEHOLDER_LIST.sub('?', _WHITESPACE.sub(' ', statement).strip())
+
+
+class QueryTally:
+    """Statements issued so far by the current request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+
+    def add(self, statement, seconds):
+        self.count += 1
+        self.seconds += seconds
+        self.shapes[statement_shape(statement)] += 1
+
+
+@dataclass
+class RequestStats:
+    """SQL totals of one finished request"""
+    method: str
+    path: str
+    endpoint: str
+    status: int
+    queries: int
+    db_ms: float
+    app_ms: float
+    budget: int = None  # QUERY_BUDGETS entry for the endpoint, if any
+    repeated: list = field(default_factory=list)  # [(shape, times)] over the repeat limit
+
+    @property
+    def over_budget(self):
+        return self.budget is not None and self.queries > self.budget
+
+
+# ============================================================================
+# CURSOR EVENTS
+# ============================================================================
+
+# The start time lives on the execution context, which is discarded with the
+# statement, so one that raises leaves nothing behind on the pooled connection
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and has_request_context() and '_sql_tally' in g:
+        context._sql_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_sql_started', None)
+    # Statements begun outside a request (or before it was set up) have no start
+    if started is not None and has_request_context() and '_sql_tally' in g:
+        g._sql_tally.add(statement, time.perf_counter() - started)
+
+
+# ============================================================================
+# REQUEST HOOKS
+# ============================================================================
+
+def _start_tally():
+    g._sql_tally = QueryTally()
+
+
+def _finish_tally(response):
+    tally = g.pop('_sql_tally', None)
+    if tally is None:
+        return response
+    config = current_app.config
+    endpoint = request.endpoint or 'unknown'
+    limit = config.get('SQL_REPEATED_STATEMENT_LIMIT', 10)
+    stats = RequestStats(
+        method=request.method,
+        path=request.full_path.rstrip('?'),
+        endpoint=endpoint,
+        status=response.status_code,
+        queries=tally.count,
+        db_ms=round(tally.seconds * 1000, 2),
+        app_ms=round((time.perf_counter() - tally.started) * 1000, 2),
+        budget=(config.get('QUERY_BUDGETS') or {}).get(endpoint),
+        repeated=sorted(((shape, times) for shape, times in tally.shapes.items() if times > limit),
+                        key=lambda item: -item[1]),
+    )
+
+    if config.get('SQL_SERVER_TIMING', True):
+        response.headers.add('Server-Timing', f'db;dur={stats.db_ms};desc="{stats.queries} queries"')
+        response.headers.add('Server-Timing', f'app;dur={stats.app_ms}')
+
+    logger = current_app.extensions['sql_instrumentation']['logger']
+    logger.info(json.dumps({
+        'event': 'request_sql', 'method': stats.method, 'path': stats.path,
+        'endpoint': endpoint, 'status': stats.status, 'queries': stats.queries,
+        'db_ms': stats.db_ms, 'app_ms': stats.app_ms,
+    }))
+    for shape, times in stats.repeated:
+        logger.warning(json.dumps({
+            'event': 'repeated_statement', 'endpoint': endpoint, 'path': stats.path,
+            'times': times, 'statement': shape[:300],
+        }))
+    if stats.over_budget:
+        logger.warning(json.dumps({
+            'event': 'query_budget_exceeded', 'endpoint': endpoint, 'path': stats.path,
+            'queries': stats.queries, 'budget': stats.budget,
+        }))
+
+    for recorded in current_app.extensions['sql_instrumentation']['recorders']:
+        recorded.append(stats)
+    if stats.over_budget and config.get('SQL_QUERY_BUDGETS_STRICT'):
+        raise QueryBudgetExceeded(
+            f'{endpoint} ({stats.path}) ran {stats.queries} queries; its budget is {stats.budget}')
+    return response
+
+
+@contextmanager
+def record_requests(app=None):
+    """Collect a RequestStats for every request the app finishes inside the block.
+
+        with record_requests(app) as requests:
+            client.get('/courses/1/progress')
+        assert not requests[-1].over_budget
+    """
+    recorders = (app or current_app).extensions['sql_instrumentation']['recorders']
+    recorded = []
+    recorders.append(recorded)
+    try:
+        yield recorded
+    finally:
+        recorders.remove(recorded)
+
+
+def init_app(app, db):
+    """Count and time each request's statements on every engine of the app"""
+    if not app.config.get('SQL_INSTRUMENTATION', True):
+        return
+    logger = logging.getLogger(f'{app.logger.name}.sql')
+    logger.setLevel(app.config.get('SQL_LOG_LEVEL', 'INFO'))
+    app.extensions['sql_instrumentation'] = {'logger': logger, 'recorders': []}
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    app.before_request(_start_tally)
+    app.after_request(_finish_tally)
@@ -0,0 +1,249 @@
+# app/jobs.py
+"""
+Durable background job queue stored in the application database
+Jobs are rows in the jobs table, enqueued in the same transaction as the
+request's own writes. `flask jobs work` claims ready jobs by priority and
+runs them on a thread or process pool, retrying failures with exponential
+backoff.
+"""
+
+import json
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from functools import partial
+from flask import after_this_request, current_app, g, has_request_context
+from sqlalchemy import inspect, select
+from app import db
+from app.models import Job
+
+TASKS = {}  # name -> callable taking the job's keyword arguments
+WORKER_ONLY = set()  # tasks never run by the web process after a response
+
+
+def task(name, inline=True):
+    """Register a function as a background task under name.
+
+    With inline off, JOBS_RUN_AFTER_RESPONSE does not apply: the task is
+    too long to hold a web worker for and waits for `flask jobs work`.
+    """
+    def decorator(func):
+        TASKS[name] = func
+        if not inline:
+            WORKER_ONLY.add(name)
+        return func
+    return decorator
+
+
+# ============================================================================
+# ENQUEUEING
+# ============================================================================
+
+def enqueue(name, priority=0, delay=0, max_attempts=None, **arguments):
+    """Add a job to the session; it is queued when the caller commits.
+
+    During a request, and if JOBS_RUN_AFTER_RESPONSE is set, the web process
+    also runs the job itself once the response has been sent, unless the
+    task was registered with inline=False.
+    """
+    if name not in TASKS:
+        raise KeyError(f'Unknown task: {name}')
+    job = Job(
+        name=name,
+        payload=json.dumps(arguments),
+        priority=priority,
+        max_attempts=max_attempts or current_app.config.get('JOBS_MAX_ATTEMPTS', 5),
+        run_at=datetime.utcnow() + timedelta(seconds=delay),
+    )
+    db.session.add(job)
+
+    if has_request_context() and not delay and name not in WORKER_ONLY \
+            and current_app.config.get('JOBS_RUN_AFTER_RESPONSE'):
+        pending = g.setdefault('pending_jobs', [])
+        if not pending:
+            after_this_request(_run_pending_after_response)
+        pending.append(job)
+    return job
+
+
+def _run_pending_after_response(response):
+    # Only jobs whose transaction committed have an identity by now
+    job_ids = [inspect(job).identity[0] for job in g.pop('pending_jobs', [])
+               if inspect(job).has_identity]
+    if job_ids:
+        response.call_on_close(partial(_run_jobs, current_app._get_current_object(), job_ids))
+    return response
+
+
+def _run_jobs(app, job_ids):
+    with app.app_context():
+        for job_id in job_ids:
+            if claim(job_id):
+                run_job(job_id)
+
+
+# ============================================================================
+# CLAIMING AND RUNNING
+# ============================================================================
+
+def claim(job_id):
+    """Atomically move a queued job to running; False if someone else has it"""
+    claimed = Job.query.filter_by(id=job_id, status='queued').update({
+        Job.status: 'running',
+        Job.attempts: Job.attempts + 1,
+        Job.started_at: datetime.utcnow(),
+    }, synchronize_session=False)
+    db.session.commit()
+    return claimed == 1
+
+
+def claim_next():
+    """Claim the highest-priority ready job; returns its id or None"""
+    while True:
+        job_id = db.session.execute(
+            select(Job.id)
+            .where(Job.status == 'queued', Job.run_at <= datetime.utcnow())
+            .order_by(Job.priority.desc(), Job.run_at, Job.id)
+            .limit(1)
+        ).scalar()
+        if job_id is None:
+            db.session.commit()
+            return None
+        if claim(job_id):
+            return job_id
+
+
+def backoff_delay(attempts):
+    """Seconds to wait before retry number attempts"""
+    base = current_app.config.get('JOBS_BACKOFF_BASE', 5)
+    return min(base * 2 ** (attempts - 1), current_app.config.get('JOBS_BACKOFF_MAX', 600))
+
+
+def run_job(job_id):
+    """Run a claimed job and record the outcome; returns True on success"""
+    job = db.session.get(Job, job_id)
+    name, arguments = job.name, job.arguments
+    try:
+        func = TASKS.get(name)
+        if func is None:
+            raise LookupError(f'Unknown task: {name}')
+        func(**arguments)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.warning('Job %s (%s) failed: %s', job_id, name, e)
+        job = db.session.get(Job, job_id)
+        job.last_error = f'{type(e).__name__}: {e}'
+        if job.attempts < job.max_attempts:
+            job.status = 'queued'
+            job.run_at = datetime.utcnow() + timedelta(seconds=backoff_delay(job.attempts))
+        else:
+            job.status = 'failed'
+            job.finished_at = datetime.utcnow()
+        db.session.commit()
+        return False
+
+    job = db.session.get(Job, job_id)
+    job.status = 'done'
+    job.finished_at = datetime.utcnow()
+    job.last_error = None
+    db.session.commit()
+    return True
+
+
+def requeue_stale(timeout):
+    """Return jobs stuck in 'running' (their worker died) to the queue"""
+    cutoff = datetime.utcnow() - timedelta(seconds=timeout)
+    count = Job.query.filter(Job.status == 'running', Job.started_at < cutoff).update(
+        {Job.status: 'queued', Job.run_at: datetime.utcnow()}, synchronize_session=False
+    )
+    db.session.commit()
+    return count
+
+
+# ============================================================================
+# WORKER
+# ============================================================================
+
+_process_app = None
+
+
+def _init_process(settings):
+    """Build an app inside each pool process from the parent's settings"""
+    global _process_app
+    from app import create_app
+    _process_app = create_app(type('WorkerConfig', (), settings))
+
+
+def _run_in_process(job_id):
+    with _process_app.app_context():
+        return run_job(job_id)
+
+
+def _run_in_thread(app, job_id):
+    with app.app_context():
+        return run_job(job_id)
+
+
+class Worker:
+    """Claims ready jobs and runs them on a thread or process pool"""
+
+    def __init__(self, app, workers=None, executor=None):
+        self.app = app
+        self.workers = workers or app.config.get('JOBS_WORKERS', 4)
+        self.executor = executor or app.config.get('JOBS_EXECUTOR', 'thread')
+        self.poll_interval = app.config.get('JOBS_POLL_INTERVAL', 1.0)
+        self.stopping = False
+        self.processed = 0
+
+    def _make_pool(self):
+        if self.executor == 'process':
+            settings = {key: value for key, value in self.app.config.items() if key.isupper()}
+            return ProcessPoolExecutor(self.workers, initializer=_init_process,
+                                       initargs=(settings,)), _run_in_process
+        return ThreadPoolExecutor(self.workers, thread_name_prefix='job'), \
+            partial(_run_in_thread, self.app)
+
+    def stop(self, *args):
+        """Finish running jobs, then exit"""
+        self.stopping = True
+
+    def run(self, drain=False):
+        """Process jobs until stopped, or with drain until none are ready"""
+        with self.app.app_context():
+            requeued = requeue_stale(self.app.config.get('JOBS_STALE_AFTER', 900))
+            if requeued:
+                current_app.logger.warning('Requeued %d stale job(s)', requeued)
+
+        pool, run = self._make_pool()
+        in_flight = set()
+        try:
+            while not self.stopping:
+                idle = False
+                while len(in_flight) < self.workers:
+                    with self.app.app_context():
+                        job_id = claim_next()
+                    if job_id is None:
+                        idle = True
+                        break
+                    in_flight.add(pool.submit(run, job_id))
+
+                if drain and idle and not in_flight:
+                    break
+                if in_flight:
+                    done, in_flight = wait(in_flight, timeout=self.poll_interval,
+                                           return_when=FIRST_COMPLETED)
+                    self.processed += len(done)
+                else:
+                    time.sleep(self.poll_interval)
+        finally:
+            pool.shutdown(wait=True)
+            self.processed += len(in_flight)
+        return self.processed
+
+    def run_forever(self):
+        """Run until SIGINT/SIGTERM, letting in-flight jobs finish"""
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        return self.run()
@@ -1,27 +1,64 @@
 from flask import render_template, redirect, url_for, flash, request, abort
 from flask_login import login_required, current_user
+from sqlalchemy.orm import joinedload
 from app import db
+from app.cache import cache, invalidate_on_change
 from app.main import bp
 from app.models import Course, Enrollment, User
 from app.forms import ProfileForm, ContactForm
-import os
-from werkzeug.utils import secure_filename
+from app.uploads import store_upload, release_uploads
+from app.identity import forget_user
+from app.progress import load_instructor_course_stats
+
+# Homepage aggregates are cached; registrations, publishes, edits and
+# deletions drop the affected keys when they commit
+HOME_STATS_KEY = 'home:stats'
+HOME_FEATURED_KEY = 'home:featured'
+
+invalidate_on_change(User, [HOME_STATS_KEY], attributes=['role'])
+invalidate_on_change(Course, [HOME_STATS_KEY], attributes=['is_published'])
+invalidate_on_change(Course, [HOME_FEATURED_KEY], attributes=[
+    'is_published', 'title', 'description', 'category', 'difficulty', 'price', 'image'
+])
+invalidate_on_change(User, [HOME_FEATURED_KEY], attributes=['username'])
+
+
+def load_home_stats():
+    """Published course, student and instructor totals"""
+    return {
+        'total_courses': Course.query.filter_by(is_published=True).count(),
+        'total_students': User.query.filter_by(role='student').count(),
+        'total_instructors': User.query.filter_by(role='instructor').count()
+    }
+
+
+def load_featured_courses():
+    """Newest published courses as plain dicts, safe to cache"""
+    courses = Course.query.filter_by(is_published=True).options(joinedload(Course.instructor)) \
+        .order_by(Course.created_at.desc()).limit(6).all()
+    return [{
+        'id': course.id,
+        'title': course.title,
+        'description': course.description,
+        'category': course.category,
+        'difficulty': course.difficulty,
+        'price': course.price,
+        'image': course.image,
+        'instructor': {'username': course.instructor.username}
+    } for course in courses]
+
 
 @bp.route('/')
 @bp.route('/index')
 def index():
     """Homepage with featured courses"""
-    featured_courses = Course.query.filter_by(is_published=True).order_by(Course.created_at.desc()).limit(6).all()
-    total_courses = Course.query.filter_by(is_published=True).count()
-    total_students = User.query.filter_by(role='student').count()
-    total_instructors = User.query.filter_by(role='instructor').count()
+    featured_courses = cache.get_or_set(HOME_FEATURED_KEY, load_featured_courses)
+    stats = cache.get_or_set(HOME_STATS_KEY, load_home_stats)
     
     return render_template('index.html', 
                          title='Home',
                          featured_courses=featured_courses,
-                         total_courses=total_courses,
-                         total_students=total_students,
-                         total_instructors=total_instructors)
+                         **stats)
 
 @bp.route('/student/dashboard')
 @login_required
@@ -31,7 +68,8 @@ def student_dashboard():
         flash('Access denied. Students only.', 'danger')
         return redirect(url_for('main.index'))
     
-    enrollments = Enrollment.query.filter_by(student_id=current_user.id).all()
+    enrollments = Enrollment.query.filter_by(student_id=current_user.id) \
+        .options(joinedload(Enrollment.course)).all()
     enrolled_courses = [e.course for e in enrollments]
     
     return render_template('student/dashboard.html',
@@ -47,7 +85,8 @@ def my_courses():
         flash('Access denied.', 'danger')
         return redirect(url_for('main.index'))
     
-    enrollments = Enrollment.query.filter_by(student_id=current_user.id).all()
+    enrollments = Enrollment.query.filter_by(student_id=current_user.id).options(
+        joinedload(Enrollment.course).joinedload(Course.instructor)).all()
     return render_template('student/my_courses.html',
                          title='My Courses',
                          enrollments=enrollments)
@@ -60,13 +99,12 @@ def instructor_dashboard():
         flash('Access denied. Instructors only.', 'danger')
         return redirect(url_for('main.index'))
     
-    courses = Course.query.filter_by(instructor_id=current_user.id).all()
-    total_students = sum([course.enrollments.count() for course in courses])
+    courses, totals = load_instructor_course_stats(current_user.id)
     
     return render_template('instructor/dashboard.html',
                          title='Instructor Dashboard',
                          courses=courses,
-                         total_students=total_students)
+                         totals=totals)
 
 @bp.route('/profile', methods=['GET', 'POST'])
 @login_required
@@ -80,15 +118,13 @@ def profile():
         current_user.bio = form.bio.data
         
         # Handle profile picture upload
+        old_pic = current_user.profile_pic
         if form.profile_pic.data:
-            file = form.profile_pic.data
-            filename = secure_filename(file.filename)
-            filename = f"{current_user.id}_{filename}"
-            filepath = os.path.join('app/static/uploads/profiles', filename)
-            file.save(filepath)
-            current_user.profile_pic = filename
+            current_user.profile_pic = store_upload(form.profile_pic.data, 'profiles')
+            release_uploads('profiles', old_pic)
         
         db.session.commit()
+        forget_user(current_user.id)
         flash('Profile updated successfully!', 'success')
         return redirect(url_for('main.profile'))
     
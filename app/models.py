@@ -1,19 +1,27 @@
 # app/models.py
 """
 Database models for LearnHub Online Learning Platform
-Includes User, Course, Enrollment, Lesson, Assignment, and LessonProgress models
+Includes User, Course, Enrollment, Lesson, Assignment, and LessonProgress models,
+plus the Job table behind the background job queue
 """
 
+import json
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import current_app
 from flask_login import UserMixin
+from sqlalchemy import event
 from app import db, login_manager
+from app.passwords import hash_password, verify_password, needs_rehash
 
 
 @login_manager.user_loader
 def load_user(user_id):
-    """Load user by ID for Flask-Login"""
-    return User.query.get(int(user_id))
+    """Load user by ID for Flask-Login, via the identity cache when enabled"""
+    if current_app.config.get('USER_CACHE_ENABLED'):
+        from app.identity import cached_user
+        return cached_user(int(user_id))
+    user = db.session.get(User, int(user_id))
+    return user if user is not None and user.is_active else None
 
 
 # ============================================================================
@@ -32,6 +40,7 @@ class User(UserMixin, db.Model):
     profile_pic = db.Column(db.String(255), default='default.jpg')
     bio = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    deleting_at = db.Column(db.DateTime)  # Set when a users.delete job is queued
     
     # Relationships
     courses_teaching = db.relationship('Course', backref='instructor', lazy='dynamic', 
@@ -39,13 +48,29 @@ class User(UserMixin, db.Model):
     enrollments = db.relationship('Enrollment', backref='student', lazy='dynamic',
                                  cascade='all, delete-orphan')
     
+    # Indexes for admin listings (role filter, newest first, pending deletion)
+    # and upload references
+    __table_args__ = (db.Index('ix_users_role_created_at', 'role', 'created_at'),
+                      db.Index('ix_users_created_at', 'created_at'),
+                      db.Index('ix_users_profile_pic', 'profile_pic'),
+                      db.Index('ix_users_deleting_at', 'deleting_at'))
+    
+    @property
+    def is_active(self):
+        """Users queued for deletion can no longer log in"""
+        return self.deleting_at is None
+    
     def set_password(self, password):
         """Hash and set user password"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
-        """Check if password matches hash"""
-        return check_password_hash(self.password_hash, password)
+        """Check if password matches hash, upgrading an outdated hash in place"""
+        if not verify_password(self.password_hash, password):
+            return False
+        if needs_rehash(self.password_hash):
+            self.set_password(password)  # Saved by the caller's commit
+        return True
     
     def __repr__(self):
         return f'<User {self.username}>'
@@ -70,6 +95,14 @@ class Course(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     is_published = db.Column(db.Boolean, default=False)
+    lessons_changed_at = db.Column(db.DateTime, default=datetime.utcnow)  # Bumped on any lesson write
+    deleting_at = db.Column(db.DateTime)  # Set when a courses.delete job is queued
+    
+    # Denormalized counters, kept in step by the routes that change them
+    enrollment_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    lesson_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    total_duration = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Minutes
+    pdf_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Relationships
     lessons = db.relationship('Lesson', backref='course', lazy='dynamic', 
@@ -79,6 +112,33 @@ class Course(db.Model):
     enrollments = db.relationship('Enrollment', backref='course', lazy='dynamic', 
                                  cascade='all, delete-orphan')
     
+    # Indexes for browse/homepage, instructor dashboards, admin listings,
+    # upload references and pending deletion
+    __table_args__ = (db.Index('ix_courses_published_created_at', 'is_published', 'created_at'),
+                      db.Index('ix_courses_instructor_id', 'instructor_id'),
+                      db.Index('ix_courses_created_at', 'created_at'),
+                      db.Index('ix_courses_image', 'image'),
+                      db.Index('ix_courses_deleting_at', 'deleting_at'))
+    
+    @property
+    def content_version(self):
+        """Changes whenever the course or any of its lessons is edited"""
+        stamps = (self.updated_at, self.lessons_changed_at)
+        return '-'.join(f"{stamp.timestamp():.6f}" if stamp else '0' for stamp in stamps)
+    
+    def adjust_counters(self, enrollments=0, lessons=0, duration=0, pdfs=0):
+        """Apply counter deltas as an atomic UPDATE at the next flush"""
+        if enrollments:
+            self.enrollment_count = Course.enrollment_count + enrollments
+        if lessons:
+            self.lesson_count = Course.lesson_count + lessons
+        if duration:
+            self.total_duration = Course.total_duration + duration
+        if pdfs:
+            self.pdf_count = Course.pdf_count + pdfs
+        # Counter bumps are not content edits; keep updated_at as it is
+        self.updated_at = Course.updated_at
+    
     def __repr__(self):
         return f'<Course {self.title}>'
 
@@ -97,6 +157,7 @@ class Enrollment(db.Model):
     enrolled_at = db.Column(db.DateTime, default=datetime.utcnow)
     progress = db.Column(db.Integer, default=0)  # 0-100 percentage
     completed = db.Column(db.Boolean, default=False)
+    completed_lessons = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Relationships
     lesson_progress = db.relationship('LessonProgress', backref='enrollment', 
@@ -104,7 +165,9 @@ class Enrollment(db.Model):
     
     # Ensure a student can only enroll once per course
     __table_args__ = (db.UniqueConstraint('student_id', 'course_id', 
-                                          name='unique_enrollment'),)
+                                          name='unique_enrollment'),
+                      db.Index('ix_enrollments_course_id', 'course_id'),
+                      db.Index('ix_enrollments_enrolled_at', 'enrolled_at'))
     
     def __repr__(self):
         return f'<Enrollment Student:{self.student_id} Course:{self.course_id}>'
@@ -132,6 +195,18 @@ class Lesson(db.Model):
     progress_records = db.relationship('LessonProgress', backref='lesson', 
                                       lazy='dynamic', cascade='all, delete-orphan')
     
+    # Indexes for ordered course outlines and upload references
+    __table_args__ = (db.Index('ix_lessons_course_order', 'course_id', 'order'),
+                      db.Index('ix_lessons_pdf_file', 'pdf_file'))
+    
+    def counter_deltas(self, sign=1):
+        """Course counter deltas contributed by this lesson"""
+        return {
+            'lessons': sign,
+            'duration': sign * (self.duration or 0),
+            'pdfs': sign * (1 if self.pdf_file else 0)
+        }
+    
     def __repr__(self):
         return f'<Lesson {self.title}>'
 
@@ -141,7 +216,11 @@ class Lesson(db.Model):
 # ============================================================================
 
 class LessonProgress(db.Model):
-    """Track individual lesson completion for students"""
+    """Track individual lesson completion for students
+    
+    Rows are created on a student's first interaction with a lesson;
+    no row means the lesson has not been completed.
+    """
     __tablename__ = 'lesson_progress'
     
     id = db.Column(db.Integer, primary_key=True)
@@ -153,7 +232,10 @@ class LessonProgress(db.Model):
     
     # Ensure one progress record per enrollment-lesson pair
     __table_args__ = (db.UniqueConstraint('enrollment_id', 'lesson_id', 
-                                          name='unique_lesson_progress'),)
+                                          name='unique_lesson_progress'),
+                      db.Index('ix_lesson_progress_enrollment_completed', 'enrollment_id', 'completed'),
+                      db.Index('ix_lesson_progress_lesson_id', 'lesson_id'),
+                      db.Index('ix_lesson_progress_completed_at', 'completed_at'))
     
     def __repr__(self):
         return f'<LessonProgress Enrollment:{self.enrollment_id} Lesson:{self.lesson_id}>'
@@ -174,5 +256,123 @@ class Assignment(db.Model):
     due_date = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (db.Index('ix_assignments_course_id', 'course_id'),)
+    
+    def __repr__(self):
+        return f'<Assignment {self.title}>'
+
+
+# ============================================================================
+# JOB QUEUE MODEL
+# ============================================================================
+
+class Job(db.Model):
+    """Background job waiting for, or run by, a `flask jobs` worker"""
+    __tablename__ = 'jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)  # Registered task name
+    payload = db.Column(db.Text, nullable=False, default='{}')  # JSON keyword arguments
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    priority = db.Column(db.Integer, nullable=False, default=0)  # Higher runs first
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # Not before
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    # Index for claiming the next ready job
+    __table_args__ = (db.Index('ix_jobs_status_priority_run_at', 'status', 'priority', 'run_at'),)
+    
+    @property
+    def arguments(self):
+        """Decoded keyword arguments for the task"""
+        return json.loads(self.payload or '{}')
+    
+    def __repr__(self):
+        return f'<Job {self.id} {self.name} {self.status}>'
+
+
+# ============================================================================
+# BULK IMPORT BOOKKEEPING
+# ============================================================================
+
+class ImportCheckpoint(db.Model):
+    """How far `flask import` got through a manifest, saved with each chunk"""
+    __tablename__ = 'import_checkpoints'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    manifest = db.Column(db.String(500), nullable=False, unique=True)  # '<kind>:<absolute path>'
+    size = db.Column(db.BigInteger, nullable=False)  # Manifest size in bytes when the run began
+    rows_done = db.Column(db.Integer, nullable=False, default=0)  # Records committed or rejected
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ImportCheckpoint {self.manifest} {self.rows_done}>'
+
+
+class ImportKey(db.Model):
+    """External key of an imported row, so reruns and later manifests can find it"""
+    __tablename__ = 'import_keys'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # 'course'
+    key = db.Column(db.String(255), nullable=False)
+    target_id = db.Column(db.Integer, nullable=False)
+    
+    __table_args__ = (db.UniqueConstraint('kind', 'key', name='unique_import_key'),)
+    
+    def __repr__(self):
+        return f'<ImportKey {self.kind}:{self.key} -> {self.target_id}>'
+
+
+# ============================================================================
+# DASHBOARD ROLLUPS
+# ============================================================================
+
+class DailyRollup(db.Model):
+    """One day's total of a dashboard metric, kept up to date by app/rollups.py"""
+    __tablename__ = 'daily_rollups'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)  # UTC day
+    metric = db.Column(db.String(30), nullable=False)  # 'new_users', 'enrollments', 'time_spent', ...
+    dimension = db.Column(db.String(50), nullable=False, default='')  # Role or course id; '' for none
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+    
+    __table_args__ = (db.UniqueConstraint('day', 'metric', 'dimension', name='unique_daily_rollup'),
+                      db.Index('ix_daily_rollups_metric_day', 'metric', 'day'))
+    
     def __repr__(self):
-        return f'<Assignment {self.title}>'
\ No newline at end of file
+        return f'<DailyRollup {self.day} {self.metric}[{self.dimension}]={self.value}>'
+
+
+class RollupWatermark(db.Model):
+    """Source rows before this point have been added to the rollups"""
+    __tablename__ = 'rollup_watermarks'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    position = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<RollupWatermark {self.name} {self.position}>'
+
+
+# ============================================================================
+# MODEL EVENTS
+# ============================================================================
+
+@event.listens_for(Lesson, 'after_insert')
+@event.listens_for(Lesson, 'after_update')
+@event.listens_for(Lesson, 'after_delete')
+def touch_course_lessons(mapper, connection, target):
+    """Stamp the parent course so cached course pages see the lesson change"""
+    courses = Course.__table__
+    connection.execute(
+        courses.update()
+        .where(courses.c.id == target.course_id)
+        .values(lessons_changed_at=datetime.utcnow(), updated_at=courses.c.updated_at)
+    )
@@ -0,0 +1,128 @@
+# app/pagination.py
+"""
+Keyset (cursor) pagination on (created_at, id), newest first
+Unlike OFFSET/LIMIT, every page costs the same no matter how deep it is,
+and no full COUNT(*) is needed. Tokens are opaque, URL-safe strings.
+Rows without a created_at have no place in that order and are left out.
+"""
+
+import base64
+import json
+from datetime import datetime
+from flask import current_app, request
+from sqlalchemy import and_, func, or_, select
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination token cannot be decoded"""
+
+
+def encode_cursor(direction, row):
+    """Token pointing just past row, walking in direction ('next' or 'prev')"""
+    payload = [direction, row.created_at.isoformat(), row.id]
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return (direction, created_at, id) from a token"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        direction, created_at, row_id = json.loads(raw)
+        if direction not in ('next', 'prev'):
+            raise ValueError(direction)
+        return direction, datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(str(e)) from e
+
+
+class KeysetPage:
+    """One page of keyset results, shaped like Flask-SQLAlchemy's Pagination"""
+    is_keyset = True
+
+    def __init__(self, items, per_page, next_cursor, prev_cursor, total=None, total_capped=False):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+        self.total_capped = total_capped  # True when total is a lower bound
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def approximate_total(query, model, cap):
+    """Count rows up to cap; returns (count, capped)"""
+    limited = query.order_by(None).with_entities(model.id).limit(cap + 1)
+    count = query.session.execute(select(func.count()).select_from(limited.subquery())).scalar()
+    return min(count, cap), count > cap
+
+
+def keyset_paginate(query, model, per_page, cursor=None, with_total=False):
+    """Paginate query newest-first on (model.created_at, model.id).
+
+    query must already carry its filters but no ORDER BY. Raises
+    InvalidCursor for malformed tokens. Rows whose created_at is NULL (e.g.
+    from a legacy import) are skipped; offset pages still list them.
+    """
+    direction, created_at, row_id = decode_cursor(cursor) if cursor else ('next', None, None)
+    query = query.filter(model.created_at.isnot(None))
+
+    page_query = query
+    if created_at is not None:
+        if direction == 'next':
+            page_query = page_query.filter(or_(
+                model.created_at < created_at,
+                and_(model.created_at == created_at, model.id < row_id)
+            ))
+        else:
+            page_query = page_query.filter(or_(
+                model.created_at > created_at,
+                and_(model.created_at == created_at, model.id > row_id)
+            ))
+
+    if direction == 'next':
+        page_query = page_query.order_by(model.created_at.desc(), model.id.desc())
+    else:
+        page_query = page_query.order_by(model.created_at.asc(), model.id.asc())
+
+    # Fetch one extra row to learn whether another page exists
+    rows = page_query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == 'prev':
+        if not has_more:
+            # Walked back to the start; serve a full first page instead
+            return keyset_paginate(query, model, per_page, None, with_total)
+        rows.reverse()
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if direction == 'next':
+            more_after, more_before = has_more, created_at is not None
+        else:
+            more_after, more_before = True, True
+        if more_after:
+            next_cursor = encode_cursor('next', rows[-1])
+        if more_before:
+            prev_cursor = encode_cursor('prev', rows[0])
+
+    total, total_capped = None, False
+    if with_total:
+        total, total_capped = approximate_total(query, model, current_app.config.get('KEYSET_COUNT_CAP', 1000))
+
+    return KeysetPage(rows, per_page, next_cursor, prev_cursor, total, total_capped)
+
+
+def use_keyset():
+    """True if this request should use keyset rather than offset pagination"""
+    if request.args.get('cursor'):
+        return True
+    mode = request.args.get('paging') or current_app.config.get('PAGINATION_MODE', 'offset')
+    return mode == 'keyset'
@@ -0,0 +1,80 @@
+# app/passwords.py
+"""
+Password hashing with configurable parameters and bounded concurrency
+Hash settings come from config; hashes made with older settings are
+upgraded on the next successful login. Hashing can run in a process pool,
+and a per-process semaphore caps how many hashes run at once so a login
+storm queues briefly (or gets a 503) instead of starving every worker.
+"""
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HashingBusy(RuntimeError):
+    """Raised when no hashing slot frees up within PASSWORD_HASH_QUEUE_TIMEOUT"""
+
+
+_setup_lock = threading.Lock()
+
+
+def _resources():
+    """Process pool (or None) and semaphore for this app and process, created lazily"""
+    app = current_app._get_current_object()
+    state = app.extensions.get('password_hashing')
+    # Forked web workers must not share the parent's pool
+    if state is None or state[0] != os.getpid():
+        with _setup_lock:
+            state = app.extensions.get('password_hashing')
+            if state is None or state[0] != os.getpid():
+                workers = app.config.get('PASSWORD_HASH_WORKERS', 0)
+                pool = ProcessPoolExecutor(workers) if workers else None
+                slots = threading.BoundedSemaphore(app.config.get('PASSWORD_HASH_MAX_CONCURRENT', 4))
+                state = app.extensions['password_hashing'] = (os.getpid(), pool, slots)
+    return state[1], state[2]
+
+
+def _run(func, *args):
+    pool, slots = _resources()
+    if not slots.acquire(timeout=current_app.config.get('PASSWORD_HASH_QUEUE_TIMEOUT', 5)):
+        raise HashingBusy('Too many password checks in progress')
+    try:
+        if pool is None:
+            return func(*args)
+        return pool.submit(func, *args).result()
+    finally:
+        slots.release()
+
+
+def hash_password(password):
+    """Hash a password with the configured method and salt length"""
+    config = current_app.config
+    return _run(generate_password_hash, password,
+                config.get('PASSWORD_HASH_METHOD', 'pbkdf2'),
+                config.get('PASSWORD_SALT_LENGTH', 16))
+
+
+def verify_password(password_hash, password):
+    """Check a password against a stored hash"""
+    return _run(check_password_hash, password_hash, password)
+
+
+@lru_cache(maxsize=8)
+def _canonical_method(method):
+    # Werkzeug expands defaults ('pbkdf2' -> 'pbkdf2:sha256:600000') when hashing
+    return generate_password_hash('', method, salt_length=1).split('$', 1)[0]
+
+
+def needs_rehash(password_hash):
+    """True if a stored hash was made with settings other than the current ones"""
+    config = current_app.config
+    try:
+        method, salt, _ = password_hash.split('$', 2)
+    except ValueError:
+        return True
+    return (method != _canonical_method(config.get('PASSWORD_HASH_METHOD', 'pbkdf2'))
+            or len(salt) != config.get('PASSWORD_SALT_LENGTH', 16))
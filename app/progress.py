@@ -0,0 +1,236 @@
+# app/progress.py
+"""
+Set-based loaders for lesson outlines and student progress
+Replaces per-lesson LessonProgress lookups with one query for the outline
+and one for the student's progress rows.
+"""
+
+from datetime import datetime
+from sqlalchemy import and_, case, func, literal, select
+from sqlalchemy.orm import defer
+from app import db
+from app.models import Course, Enrollment, Lesson, LessonProgress
+
+
+class ProgressSnapshot:
+    """Ordered lesson outline of a course plus one student's completion state"""
+
+    def __init__(self, lessons, progress):
+        self.lessons = lessons
+        self._progress = progress  # lesson_id -> (completed, completed_at)
+
+    def is_completed(self, lesson_id):
+        """True if the student has completed the lesson"""
+        return self._progress.get(lesson_id, (False, None))[0]
+
+    def completed_at(self, lesson_id):
+        """When the student completed the lesson, or None"""
+        completed, completed_at = self._progress.get(lesson_id, (False, None))
+        return completed_at if completed else None
+
+    @property
+    def completion_status(self):
+        """Map of lesson id -> completed flag for every lesson in the outline"""
+        return {lesson.id: self.is_completed(lesson.id) for lesson in self.lessons}
+
+    @property
+    def completed_count(self):
+        return sum(1 for lesson in self.lessons if self.is_completed(lesson.id))
+
+    def neighbours(self, lesson):
+        """Return the (previous, next) lessons around lesson in the outline"""
+        index = self.lessons.index(lesson)
+        prev_lesson = self.lessons[index - 1] if index > 0 else None
+        next_lesson = self.lessons[index + 1] if index < len(self.lessons) - 1 else None
+        return prev_lesson, next_lesson
+
+
+def load_progress_snapshot(course_id, enrollment=None, with_content=False):
+    """Load a course outline and, if given an enrollment, its progress rows.
+
+    Issues at most two queries. Lesson bodies are deferred unless
+    with_content is set, since outlines only need titles and metadata.
+    Progress rows are created lazily, so a lesson without one counts as
+    not completed.
+    """
+    query = Lesson.query.filter_by(course_id=course_id).order_by(Lesson.order, Lesson.id)
+    if not with_content:
+        query = query.options(defer(Lesson.content))
+    lessons = query.all()
+
+    progress = {}
+    if enrollment is not None:
+        rows = db.session.query(
+            LessonProgress.lesson_id,
+            LessonProgress.completed,
+            LessonProgress.completed_at
+        ).filter(LessonProgress.enrollment_id == enrollment.id)
+        progress = {lesson_id: (bool(completed), completed_at)
+                    for lesson_id, completed, completed_at in rows}
+
+    return ProgressSnapshot(lessons, progress)
+
+
+def find_resume_lesson(enrollment):
+    """First lesson the student has not completed, else the first lesson"""
+    outline = Lesson.query.filter_by(course_id=enrollment.course_id).options(
+        defer(Lesson.content)
+    ).order_by(Lesson.order, Lesson.id)
+    completed = db.session.query(LessonProgress.lesson_id).filter_by(
+        enrollment_id=enrollment.id,
+        completed=True
+    )
+    return outline.filter(Lesson.id.notin_(completed)).first() or outline.first()
+
+
+def load_lesson_time_spent(course_id):
+    """Map of lesson id -> (total seconds, students who spent time) for a course"""
+    rows = db.session.query(
+        LessonProgress.lesson_id,
+        func.sum(LessonProgress.time_spent),
+        func.count(LessonProgress.id)
+    ).join(Lesson, Lesson.id == LessonProgress.lesson_id).filter(
+        Lesson.course_id == course_id,
+        LessonProgress.time_spent > 0
+    ).group_by(LessonProgress.lesson_id)
+    return {lesson_id: (total, students) for lesson_id, total, students in rows}
+
+
+def load_instructor_course_stats(instructor_id):
+    """Per-course student stats for an instructor's courses, plus a totals row.
+
+    One statement: enrollments and lesson completions are each grouped by
+    course in a subquery and joined to the courses, so the cost does not
+    grow with the number of courses.
+    """
+    own_courses = and_(Course.instructor_id == instructor_id, Course.deleting_at.is_(None))
+    enrolled = select(
+        Enrollment.course_id,
+        func.count(Enrollment.id).label('students'),
+        func.sum(Enrollment.progress).label('progress_sum'),
+        func.sum(case((Enrollment.completed, 1), else_=0)).label('completed'),
+        func.max(Enrollment.enrolled_at).label('last_enrolled'),
+    ).join(Course, Course.id == Enrollment.course_id).where(own_courses) \
+        .group_by(Enrollment.course_id).subquery()
+    completions = select(
+        Lesson.course_id,
+        func.max(LessonProgress.completed_at).label('last_completed'),
+    ).join(LessonProgress, LessonProgress.lesson_id == Lesson.id) \
+        .join(Course, Course.id == Lesson.course_id).where(own_courses) \
+        .group_by(Lesson.course_id).subquery()
+
+    rows = db.session.execute(
+        select(Course.id, Course.title, Course.category, Course.is_published,
+               enrolled.c.students, enrolled.c.progress_sum, enrolled.c.completed,
+               enrolled.c.last_enrolled, completions.c.last_completed)
+        .outerjoin(enrolled, enrolled.c.course_id == Course.id)
+        .outerjoin(completions, completions.c.course_id == Course.id)
+        .where(own_courses).order_by(Course.id))
+
+    courses = []
+    for row in rows:
+        students = row.students or 0
+        courses.append({
+            'id': row.id,
+            'title': row.title,
+            'category': row.category,
+            'is_published': bool(row.is_published),
+            'students': students,
+            'completed': row.completed or 0,
+            'progress_sum': row.progress_sum or 0,
+            'avg_progress': round((row.progress_sum or 0) / students, 1) if students else 0.0,
+            'completion_rate': round(100.0 * (row.completed or 0) / students, 1) if students else 0.0,
+            'last_activity': max(filter(None, (row.last_enrolled, row.last_completed)), default=None),
+        })
+
+    students = sum(course['students'] for course in courses)
+    completed = sum(course['completed'] for course in courses)
+    progress_sum = sum(course['progress_sum'] for course in courses)
+    totals = {
+        'courses': len(courses),
+        'published': sum(1 for course in courses if course['is_published']),
+        'students': students,
+        # Over all enrollments, so big courses weigh more than small ones
+        'avg_progress': round(progress_sum / students, 1) if students else 0.0,
+        'completion_rate': round(100.0 * completed / students, 1) if students else 0.0,
+        'last_activity': max(filter(None, (course['last_activity'] for course in courses)), default=None),
+    }
+    return courses, totals
+
+# ============================================================================
+# INCREMENTAL PROGRESS UPDATES
+# ============================================================================
+
+def progress_percent(completed_lessons, total_lessons):
+    """SQL expression for a 0-100 progress percentage"""
+    return case(
+        (total_lessons <= 0, 0),
+        (completed_lessons >= total_lessons, 100),
+        else_=completed_lessons * 100 // total_lessons
+    )
+
+
+def mark_lesson_complete(enrollment, lesson_id, total_lessons):
+    """Flip a lesson to completed and bump the enrollment's stored counters.
+
+    Returns False without writing anything if the lesson was already
+    complete. The counter updates are applied as SQL expressions, so they
+    stay correct under concurrent requests. The caller commits.
+    """
+    row = db.session.query(LessonProgress.id, LessonProgress.completed).filter_by(
+        enrollment_id=enrollment.id,
+        lesson_id=lesson_id
+    ).first()
+    if row and row.completed:
+        return False
+    
+    now = datetime.utcnow()
+    if row:
+        # Guarded flip: only one request can move the row to completed
+        flipped = LessonProgress.query.filter_by(id=row.id, completed=False).update(
+            {LessonProgress.completed: True, LessonProgress.completed_at: now},
+            synchronize_session=False
+        )
+        if not flipped:
+            return False
+    else:
+        db.session.add(LessonProgress(
+            enrollment_id=enrollment.id,
+            lesson_id=lesson_id,
+            completed=True,
+            completed_at=now
+        ))
+    
+    done = Enrollment.completed_lessons + 1
+    total = literal(total_lessons)
+    enrollment.completed_lessons = done
+    enrollment.progress = progress_percent(done, total)
+    enrollment.completed = case((and_(total > 0, done >= total), True),
+                                else_=Enrollment.completed)
+    return True
+
+
+def refresh_course_progress(course_id):
+    """Recompute stored progress and completion after the lesson count changes"""
+    total = select(Course.lesson_count).where(Course.id == course_id).scalar_subquery()
+    Enrollment.query.filter_by(course_id=course_id).update(
+        {Enrollment.progress: progress_percent(Enrollment.completed_lessons, total),
+         # A new lesson reopens a finished course; deleting the last open one finishes it
+         Enrollment.completed: and_(total > 0, Enrollment.completed_lessons >= total)},
+        synchronize_session=False
+    )
+
+
+def forget_lesson_completions(lesson_id):
+    """Take a lesson about to be deleted out of its students' completed counts.
+
+    Call refresh_course_progress afterwards to update progress and completion.
+    """
+    completed_by = db.session.query(LessonProgress.enrollment_id).filter_by(
+        lesson_id=lesson_id,
+        completed=True
+    )
+    Enrollment.query.filter(Enrollment.id.in_(completed_by)).update(
+        {Enrollment.completed_lessons: Enrollment.completed_lessons - 1},
+        synchronize_session=False
+    )
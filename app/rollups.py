@@ -0,0 +1,317 @@
+# app/rollups.py
+"""
+Daily rollups behind the admin dashboard charts
+Each refresh adds only the source rows created since the watermark (minus
+ROLLUP_SETTLE_SECONDS, so rows whose transactions are still open are not
+missed) to per-day totals in daily_rollups, then moves the watermark.
+Time spent has no timestamp of its own, so the heartbeat flush adds it to
+the current day as it saves it.
+"""
+
+from datetime import date, datetime, timedelta
+from flask import current_app
+from sqlalchemy import bindparam, delete, func, literal, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+from app import db
+from app.jobs import enqueue, task
+from app.models import DailyRollup, Enrollment, Job, Lesson, LessonProgress, RollupWatermark, User
+
+ROLLUPS = {}  # metric -> function(since, until) returning a (day, dimension, value) SELECT
+WATERMARK = 'daily'
+TIME_SPENT = 'time_spent'
+# Metrics kept per course id also get a per-day total row under ALL_COURSES
+PER_COURSE = ('enrollments', 'lesson_completions', 'course_completions', TIME_SPENT)
+ALL_COURSES = ''
+
+
+def rollup(metric):
+    """Register a windowed aggregate feeding one metric"""
+    def decorator(build):
+        ROLLUPS[metric] = build
+        return build
+    return decorator
+
+
+def _window(column, since, until):
+    if since is None:
+        return [column.isnot(None), column < until]
+    return [column >= since, column < until]
+
+
+def _as_date(value):
+    # SQLite's date() returns text, PostgreSQL's a date
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+@rollup('new_users')
+def new_users(since, until):
+    day = func.date(User.created_at)
+    return select(day, User.role, func.count(User.id)) \
+        .where(*_window(User.created_at, since, until)).group_by(day, User.role)
+
+
+@rollup('enrollments')
+def enrollments(since, until):
+    day = func.date(Enrollment.enrolled_at)
+    return select(day, Enrollment.course_id, func.count(Enrollment.id)) \
+        .where(*_window(Enrollment.enrolled_at, since, until)).group_by(day, Enrollment.course_id)
+
+
+@rollup('lesson_completions')
+def lesson_completions(since, until):
+    day = func.date(LessonProgress.completed_at)
+    return select(day, Lesson.course_id, func.count(LessonProgress.id)) \
+        .join(Lesson, Lesson.id == LessonProgress.lesson_id) \
+        .where(LessonProgress.completed, *_window(LessonProgress.completed_at, since, until)) \
+        .group_by(day, Lesson.course_id)
+
+
+@rollup('course_completions')
+def course_completions(since, until):
+    # A course is completed when its enrollment's last lesson completion happened
+    other = aliased(LessonProgress)
+    last_completion = select(func.max(other.completed_at)).where(
+        other.enrollment_id == LessonProgress.enrollment_id, other.completed
+    ).scalar_subquery()
+    day = func.date(LessonProgress.completed_at)
+    return select(day, Enrollment.course_id, func.count(func.distinct(Enrollment.id))) \
+        .join(Enrollment, Enrollment.id == LessonProgress.enrollment_id) \
+        .where(Enrollment.completed, LessonProgress.completed,
+               *_window(LessonProgress.completed_at, since, until),
+               LessonProgress.completed_at == last_completion) \
+        .group_by(day, Enrollment.course_id)
+
+
+def collect(since, until):
+    """{(day, metric, dimension): value} for source rows in [since, until)"""
+    increments = {}
+    for metric, build in ROLLUPS.items():
+        for day, dimension, value in db.session.execute(build(since, until)):
+            key = (_as_date(day), metric, '' if dimension is None else str(dimension))
+            increments[key] = increments.get(key, 0) + value
+    return increments
+
+
+# ============================================================================
+# WRITING
+# ============================================================================
+
+def add_to_rollups(increments):
+    """Add {(day, metric, dimension): value} to daily_rollups, creating missing rows"""
+    increments = {key: value for key, value in increments.items() if value}
+    if not increments:
+        return
+    for (day, metric, dimension), value in list(increments.items()):
+        if metric in PER_COURSE and dimension != ALL_COURSES:
+            total = (day, metric, ALL_COURSES)
+            increments[total] = increments.get(total, 0) + value
+    days = {day for day, _, _ in increments}
+    metrics = {metric for _, metric, _ in increments}
+    existing = set(db.session.execute(
+        select(DailyRollup.day, DailyRollup.metric, DailyRollup.dimension)
+        .where(DailyRollup.day.in_(days), DailyRollup.metric.in_(metrics))
+    ).tuples())
+
+    _add_values([(key, value) for key, value in increments.items() if key in existing])
+
+    new_rows = [{'day': day, 'metric': metric, 'dimension': dimension, 'value': value}
+                for (day, metric, dimension), value in increments.items()
+                if (day, metric, dimension) not in existing]
+    if new_rows:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(DailyRollup.__table__.insert(), new_rows)
+        except IntegrityError:
+            # Another heartbeat flush created some of the rows meanwhile
+            for row in new_rows:
+                try:
+                    with db.session.begin_nested():
+                        db.session.execute(DailyRollup.__table__.insert(), row)
+                except IntegrityError:
+                    _add_values([((row['day'], row['metric'], row['dimension']), row['value'])])
+
+
+def _add_values(increments):
+    """One executemany UPDATE for [((day, metric, dimension), value)]"""
+    if not increments:
+        return
+    db.session.execute(
+        update(DailyRollup.__table__)
+        .where(DailyRollup.day == bindparam('r_day'),
+               DailyRollup.metric == bindparam('r_metric'),
+               DailyRollup.dimension == bindparam('r_dimension'))
+        .values(value=DailyRollup.value + bindparam('delta')),
+        [{'r_day': day, 'r_metric': metric, 'r_dimension': dimension, 'delta': value}
+         for (day, metric, dimension), value in increments]
+    )
+
+
+def record_time_spent(seconds_by_course, day=None):
+    """Add {course_id: seconds} to the day's time spent; the caller commits"""
+    day = day or datetime.utcnow().date()
+    add_to_rollups({(day, TIME_SPENT, str(course_id)): seconds
+                    for course_id, seconds in seconds_by_course.items()})
+
+
+def _settled_until():
+    settle = current_app.config.get('ROLLUP_SETTLE_SECONDS', 60)
+    return datetime.utcnow() - timedelta(seconds=settle)
+
+
+def refresh_rollups():
+    """Roll up source rows added since the watermark; returns the rows touched"""
+    mark = db.session.get(RollupWatermark, WATERMARK)
+    if mark is None:
+        return backfill()
+    since, until = mark.position, _settled_until()
+    if until <= since:
+        return 0
+    # Claim the window first, so a concurrent refresh finds nothing to do
+    claimed = db.session.execute(
+        update(RollupWatermark)
+        .where(RollupWatermark.name == WATERMARK, RollupWatermark.position == since)
+        .values(position=until, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not claimed:
+        db.session.rollback()
+        return 0
+    increments = collect(since, until)
+    add_to_rollups(increments)
+    db.session.commit()
+    return len(increments)
+
+
+def _insert_rows(metric, stmt, chunk_size=5000):
+    """Bulk insert the (day, dimension, value) rows of a SELECT as one metric; returns the count"""
+    chunk, total = [], 0
+    for day, dimension, value in db.session.execute(stmt.execution_options(yield_per=chunk_size)):
+        chunk.append({'day': _as_date(day), 'metric': metric,
+                      'dimension': '' if dimension is None else str(dimension), 'value': value})
+        if len(chunk) >= chunk_size:
+            db.session.execute(DailyRollup.__table__.insert(), chunk)
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        db.session.execute(DailyRollup.__table__.insert(), chunk)
+        total += len(chunk)
+    return total
+
+
+def _insert_totals(metrics, since=None):
+    """Add the per-day ALL_COURSES rows of metrics, summed from their per-course rows"""
+    summed = select(DailyRollup.day, DailyRollup.metric, literal(ALL_COURSES), func.sum(DailyRollup.value)) \
+        .where(DailyRollup.metric.in_(metrics), DailyRollup.dimension != ALL_COURSES)
+    if since is not None:
+        summed = summed.where(DailyRollup.day >= since)
+    return db.session.execute(DailyRollup.__table__.insert().from_select(
+        ['day', 'metric', 'dimension', 'value'],
+        summed.group_by(DailyRollup.day, DailyRollup.metric))).rowcount
+
+
+def backfill(since=None):
+    """Rebuild the rollups from source rows, from the since date or from the start.
+
+    Time spent was never stamped per day, so it is only seeded when there
+    is none yet: each progress row's total lands on the day the lesson was
+    completed, or the day of enrollment.
+    """
+    until = _settled_until()
+    mark = db.session.get(RollupWatermark, WATERMARK)
+    if mark is None:
+        mark = RollupWatermark(name=WATERMARK, position=until)
+        db.session.add(mark)
+    mark.position = until
+    # Taking the watermark row first holds off refreshes until this commits
+    db.session.flush()
+
+    stale = delete(DailyRollup).where(DailyRollup.metric.in_(list(ROLLUPS)))
+    if since is not None:
+        stale = stale.where(DailyRollup.day >= since)
+    db.session.execute(stale.execution_options(synchronize_session=False))
+
+    # The rebuilt days are empty now, so aggregates stream straight into inserts
+    start = datetime.combine(since, datetime.min.time()) if since is not None else None
+    total = 0
+    for metric, build in ROLLUPS.items():
+        total += _insert_rows(metric, build(start, until))
+
+    total += _insert_totals([metric for metric in PER_COURSE if metric in ROLLUPS], since)
+
+    if not db.session.scalar(select(DailyRollup.id).where(DailyRollup.metric == TIME_SPENT).limit(1)):
+        stamp = func.coalesce(LessonProgress.completed_at, Enrollment.enrolled_at)
+        day = func.date(stamp)
+        total += _insert_rows(TIME_SPENT, select(
+            day, Lesson.course_id, func.sum(LessonProgress.time_spent)
+        ).join(Enrollment, Enrollment.id == LessonProgress.enrollment_id)
+            .join(Lesson, Lesson.id == LessonProgress.lesson_id)
+            .where(LessonProgress.time_spent > 0, stamp.isnot(None))
+            .group_by(day, Lesson.course_id))
+        total += _insert_totals([TIME_SPENT])
+
+    db.session.commit()
+    return total
+
+
+@task('rollups.refresh')
+def refresh_task():
+    """Background job form of refresh_rollups"""
+    refresh_rollups()
+
+
+def schedule_refresh():
+    """Queue a refresh if the rollups are older than ROLLUP_REFRESH_INTERVAL"""
+    interval = current_app.config.get('ROLLUP_REFRESH_INTERVAL', 300)
+    mark = db.session.get(RollupWatermark, WATERMARK)
+    if mark is not None and mark.updated_at and \
+            mark.updated_at > datetime.utcnow() - timedelta(seconds=interval):
+        return False
+    pending = db.session.scalar(select(Job.id).where(
+        Job.name == 'rollups.refresh', Job.status.in_(('queued', 'running'))).limit(1))
+    if pending:
+        return False
+    enqueue('rollups.refresh')
+    db.session.commit()
+    return True
+
+
+# ============================================================================
+# READING
+# ============================================================================
+
+def load_trends(days=30):
+    """Per-day chart series for the last days days, read from the rollups only"""
+    first = datetime.utcnow().date() - timedelta(days=days - 1)
+    labels = [first + timedelta(days=n) for n in range(days)]
+    position = {day: n for n, day in enumerate(labels)}
+
+    # New users by role; everything else from the per-day totals across courses
+    rows = db.session.execute(
+        select(DailyRollup.day, DailyRollup.metric, DailyRollup.dimension, DailyRollup.value)
+        .where(DailyRollup.day >= first,
+               or_(DailyRollup.metric == 'new_users', DailyRollup.dimension == ALL_COURSES)))
+
+    series = {'new_users': {}}
+    for metric in ('enrollments', 'lesson_completions', 'course_completions', TIME_SPENT):
+        series[metric] = [0] * days
+    for day, metric, role, value in rows:
+        n = position.get(_as_date(day))
+        if n is None or metric not in series:
+            continue
+        if metric == 'new_users':
+            series[metric].setdefault(role, [0] * days)[n] = int(value)
+        else:
+            series[metric][n] = int(value)
+    series['hours_spent'] = [round(seconds / 3600, 1) for seconds in series.pop(TIME_SPENT)]
+
+    mark = db.session.get(RollupWatermark, WATERMARK)
+    return {
+        'labels': [day.isoformat() for day in labels],
+        'series': series,
+        'as_of': mark.position if mark else None,
+    }
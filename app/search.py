@@ -0,0 +1,241 @@
+# app/search.py
+"""
+Full-text search for the course catalog
+Keeps a search index in sync with the courses table and applies ranked
+matching to course queries. Backends are pluggable per database dialect.
+"""
+
+import re
+from flask import current_app, has_app_context
+from sqlalchemy import event, func, literal_column, table, column, text
+from app import db
+from app.models import Course
+
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+BACKENDS = {}
+
+
+def register_backend(name):
+    """Class decorator that registers a search backend under a name"""
+    def decorator(cls):
+        BACKENDS[name] = cls
+        cls.name = name
+        return cls
+    return decorator
+
+
+def tokenize(term):
+    """Split a raw search string into lowercase word tokens"""
+    return [token.lower() for token in _TOKEN_RE.findall(term or '')]
+
+
+# ============================================================================
+# BACKENDS
+# ============================================================================
+
+class SearchBackend:
+    """Base class for course search backends"""
+    name = None
+
+    def setup(self, connection):
+        """Create whatever index structures the backend needs"""
+
+    def index(self, connection, course_id, title, description):
+        """Add or replace a single course in the index"""
+
+    def remove(self, connection, course_id):
+        """Drop a single course from the index"""
+
+    def rebuild(self, connection):
+        """Rebuild the whole index from the courses table"""
+
+    def apply(self, query, term):
+        """Filter and rank a Course query by a search term"""
+        raise NotImplementedError
+
+
+@register_backend('like')
+class LikeBackend(SearchBackend):
+    """Fallback backend using ILIKE scans (no index to maintain)"""
+
+    def apply(self, query, term):
+        for token in tokenize(term):
+            pattern = f"%{token}%"
+            query = query.filter(
+                (Course.title.ilike(pattern)) |
+                (Course.description.ilike(pattern))
+            )
+        return query.order_by(Course.created_at.desc())
+
+
+@register_backend('sqlite_fts')
+class SQLiteFTSBackend(SearchBackend):
+    """SQLite FTS5 virtual table mirroring courses(title, description)"""
+    table_name = 'courses_fts'
+    # Title matches weigh ten times as much as description matches
+    rank_function = 'bm25(10.0, 1.0)'
+
+    def __init__(self):
+        self.fts = table(self.table_name,
+                         column('rowid'),
+                         column(self.table_name),
+                         column('rank'))
+        self._ready = set()
+
+    def setup(self, connection):
+        """Create the FTS table once per database, seeding it if new"""
+        key = str(connection.engine.url)
+        if key in self._ready:
+            return
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': self.table_name}
+        ).first()
+        if not exists:
+            connection.execute(text(
+                f"CREATE VIRTUAL TABLE {self.table_name} USING fts5("
+                "title, description, "
+                "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+            ))
+            connection.execute(text(
+                f"INSERT INTO {self.table_name}({self.table_name}, rank) "
+                f"VALUES ('rank', '{self.rank_function}')"
+            ))
+            self._fill(connection)
+        self._ready.add(key)
+
+    def index(self, connection, course_id, title, description):
+        self.setup(connection)
+        self.remove(connection, course_id)
+        connection.execute(
+            text(f"INSERT INTO {self.table_name}(rowid, title, description) "
+                 "VALUES (:id, :title, :description)"),
+            {'id': course_id, 'title': title, 'description': description}
+        )
+
+    def remove(self, connection, course_id):
+        self.setup(connection)
+        connection.execute(
+            text(f"DELETE FROM {self.table_name} WHERE rowid = :id"),
+            {'id': course_id}
+        )
+
+    def rebuild(self, connection):
+        self.setup(connection)
+        connection.execute(text(f"DELETE FROM {self.table_name}"))
+        self._fill(connection)
+        connection.execute(text(
+            f"INSERT INTO {self.table_name}({self.table_name}) VALUES ('optimize')"
+        ))
+
+    def _fill(self, connection):
+        connection.execute(text(
+            f"INSERT INTO {self.table_name}(rowid, title, description) "
+            "SELECT id, title, description FROM courses"
+        ))
+
+    def match_expression(self, term):
+        """Build an FTS5 query: every token must match, as a prefix"""
+        tokens = tokenize(term)
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    def apply(self, query, term):
+        self.setup(db.session.connection())
+        match = self.match_expression(term)
+        if not match:
+            return query.order_by(Course.created_at.desc())
+        fts = self.fts
+        return (query
+                .join(fts, fts.c.rowid == Course.id)
+                .filter(fts.c[self.table_name].op('MATCH')(match))
+                .order_by(fts.c.rank, Course.created_at.desc()))
+
+
+@register_backend('postgresql')
+class PostgresBackend(SearchBackend):
+    """PostgreSQL tsvector matching backed by a GIN expression index"""
+    document = ("to_tsvector('english', coalesce(title, '') || ' ' || "
+                "coalesce(description, ''))")
+
+    def setup(self, connection):
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_courses_search "
+            f"ON courses USING GIN (({self.document}))"
+        ))
+
+    def rebuild(self, connection):
+        self.setup(connection)
+        connection.execute(text("REINDEX INDEX ix_courses_search"))
+
+    def apply(self, query, term):
+        tokens = tokenize(term)
+        if not tokens:
+            return query.order_by(Course.created_at.desc())
+        tsquery = func.to_tsquery('english', ' & '.join(f'{t}:*' for t in tokens))
+        document = literal_column(self.document)
+        return (query
+                .filter(document.op('@@')(tsquery))
+                .order_by(func.ts_rank(document, tsquery).desc(),
+                          Course.created_at.desc()))
+
+
+# ============================================================================
+# BACKEND SELECTION
+# ============================================================================
+
+_instances = {}
+
+
+def get_backend(dialect_name=None):
+    """Return the configured backend, or pick one from the database dialect"""
+    name = None
+    if has_app_context():
+        name = current_app.config.get('SEARCH_BACKEND')
+    if not name or name == 'auto':
+        if dialect_name is None:
+            dialect_name = db.engine.dialect.name
+        name = {'sqlite': 'sqlite_fts', 'postgresql': 'postgresql'}.get(dialect_name, 'like')
+    if name not in _instances:
+        _instances[name] = BACKENDS[name]()
+    return _instances[name]
+
+
+def search_courses(query, term):
+    """Restrict a Course query to matches for term, best matches first"""
+    return get_backend().apply(query, term)
+
+
+def rebuild_index():
+    """Rebuild the search index from scratch"""
+    backend = get_backend()
+    with db.engine.begin() as connection:
+        backend.rebuild(connection)
+    return backend.name
+
+
+# ============================================================================
+# INDEX MAINTENANCE (runs inside the flush, same transaction as the write)
+# ============================================================================
+
+@event.listens_for(Course, 'after_insert')
+def _index_new_course(mapper, connection, target):
+    backend = get_backend(connection.dialect.name)
+    backend.index(connection, target.id, target.title, target.description)
+
+
+@event.listens_for(Course, 'after_update')
+def _reindex_course(mapper, connection, target):
+    state = db.inspect(target)
+    if not (state.attrs.title.history.has_changes() or
+            state.attrs.description.history.has_changes()):
+        return
+    backend = get_backend(connection.dialect.name)
+    backend.index(connection, target.id, target.title, target.description)
+
+
+@event.listens_for(Course, 'after_delete')
+def _unindex_course(mapper, connection, target):
+    backend = get_backend(connection.dialect.name)
+    backend.remove(connection, target.id)
@@ -0,0 +1,131 @@
+# app/uploads.py
+"""
+Content-addressed storage for uploaded files
+Uploads are hashed while they stream to disk and stored as <sha256>.<ext>,
+so identical files are kept once per upload folder. A stored file is
+deleted only when no Lesson.pdf_file, Course.image or User.profile_pic
+still refers to it and it was not stored or reused within
+UPLOAD_RELEASE_GRACE seconds. Variant building and deletion run as
+background jobs.
+"""
+
+import hashlib
+import os
+import tempfile
+import time
+from flask import current_app
+from werkzeug.utils import secure_filename
+from app.models import Course, Lesson, User
+from app.images import IMAGE_VARIANTS, remove_variants
+from app.jobs import enqueue, task
+
+CHUNK_SIZE = 64 * 1024
+
+# Upload folder -> the column whose values name files in it
+UPLOAD_KINDS = {
+    'pdfs': Lesson.pdf_file,
+    'courses': Course.image,
+    'profiles': User.profile_pic,
+}
+
+# Shipped placeholders that are never deleted
+DEFAULT_FILES = {'default.jpg', 'default_course.jpg'}
+
+
+def upload_folder(kind):
+    """Absolute path of the folder holding one kind of upload"""
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], kind)
+
+
+def write_content_addressed(stream, folder, extension):
+    """Copy a binary stream into folder as <sha256><extension>; returns the name.
+
+    The data is written to a temporary name while its SHA-256 is computed,
+    then renamed to the hash. If that content is already stored, the copy
+    is discarded and the existing file is reused; its mtime is bumped so a
+    pending release job leaves it alone. Needs no app context, so it can
+    run in worker threads.
+    """
+    os.makedirs(folder, exist_ok=True)
+    digest = hashlib.sha256()
+    fd, temp_path = tempfile.mkstemp(dir=folder, prefix='.upload-')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+                out.write(chunk)
+
+        filename = digest.hexdigest() + extension
+        target = os.path.join(folder, filename)
+        try:
+            os.utime(target)
+        except FileNotFoundError:
+            os.replace(temp_path, target)
+        else:
+            os.remove(temp_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return filename
+
+
+def store_upload(file_storage, kind):
+    """Stream an uploaded file into storage and return its stored filename.
+
+    Identical content is stored once (see write_content_addressed). Images
+    also get a job that builds their resized variants.
+    """
+    original = secure_filename(file_storage.filename or '')
+    extension = os.path.splitext(original)[1].lower()
+    filename = write_content_addressed(file_storage.stream, upload_folder(kind), extension)
+    
+    if kind in IMAGE_VARIANTS:
+        enqueue('images.create_variants', priority=10, kind=kind, filename=filename)
+    return filename
+
+
+def is_referenced(kind, filename):
+    """True if any row still points at filename"""
+    column = UPLOAD_KINDS[kind]
+    return column.class_.query.filter(column == filename).with_entities(column).first() is not None
+
+
+def release_uploads(kind, *filenames):
+    """Queue the files for deletion once the current transaction commits.
+
+    The job deletes only files that no row refers to by the time it runs,
+    so calling this for a file that is still shared is harmless.
+    """
+    filenames = sorted({name for name in filenames if name and name not in DEFAULT_FILES})
+    if filenames:
+        enqueue('uploads.release', kind=kind, filenames=filenames)
+
+
+@task('uploads.release')
+def remove_unreferenced(kind, filenames):
+    """Delete stored files that have lost their last reference; returns their names.
+
+    A file stored or reused within UPLOAD_RELEASE_GRACE seconds may belong
+    to an upload whose row is not committed yet, so it is checked again by
+    a delayed job instead.
+    """
+    grace = current_app.config.get('UPLOAD_RELEASE_GRACE', 3600)
+    removed, recent = [], []
+    for filename in filenames:
+        if is_referenced(kind, filename):
+            continue
+        path = os.path.join(upload_folder(kind), secure_filename(filename))
+        try:
+            if os.path.getmtime(path) > time.time() - grace:
+                recent.append(filename)
+                continue
+            os.remove(path)
+            removed.append(filename)
+        except FileNotFoundError:
+            pass
+        if kind in IMAGE_VARIANTS:
+            remove_variants(kind, filename)
+    if recent:
+        enqueue('uploads.release', delay=grace, kind=kind, filenames=recent)
+    return removed
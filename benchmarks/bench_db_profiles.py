@@ -0,0 +1,146 @@
+"""
+Benchmark: concurrent read/write throughput under each engine profile
+Seeds a throwaway SQLite database, then runs reader and writer processes
+against it for a fixed time. Readers load course outlines with a student's
+progress; writers complete lessons and add time spent, as complete_lesson
+and the heartbeat flush do. Reports operations/s, p95 latency and how many
+operations failed with "database is locked".
+
+    python -m benchmarks.bench_db_profiles --readers 4 --writers 4 --seconds 10
+    python -m benchmarks.bench_db_profiles --profiles default sqlite
+
+The 'server' profile only changes pool settings, so on SQLite it shows the
+pool without the pragmas; point DATABASE_URL at PostgreSQL for its real use.
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from config import Config
+from app import create_app, db
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def bench_config(path, profile):
+    return type('BenchConfig', (Config,), {
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + path,
+        'DATABASE_PROFILE': profile,
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'HEARTBEAT_FLUSH_INTERVAL': 3600,
+    })
+
+
+def read_once(rng, enrollment_ids):
+    from app.models import Enrollment
+    from app.progress import load_progress_snapshot
+    enrollment = db.session.get(Enrollment, rng.choice(enrollment_ids))
+    load_progress_snapshot(enrollment.course_id, enrollment).completion_status
+    db.session.rollback()
+
+
+def write_once(rng, enrollment_ids):
+    from app.models import Course, Enrollment, Lesson
+    from app.heartbeat import save_time_spent
+    from app.progress import mark_lesson_complete
+    enrollment = db.session.get(Enrollment, rng.choice(enrollment_ids))
+    lesson_ids = [row.id for row in Lesson.query.filter_by(
+        course_id=enrollment.course_id).with_entities(Lesson.id)]
+    lesson_id = rng.choice(lesson_ids)
+    total = db.session.get(Course, enrollment.course_id).lesson_count
+    if mark_lesson_complete(enrollment, lesson_id, total):
+        db.session.commit()
+    else:
+        save_time_spent({(enrollment.id, lesson_id): 30})
+
+
+def run_worker(path, profile, role, seconds, seed, results):
+    """One reader or writer process; puts (role, latencies_ms, locked) on results"""
+    from sqlalchemy.exc import IntegrityError, OperationalError
+    from app.models import Enrollment
+    app = create_app(bench_config(path, profile))
+    rng = random.Random(seed)
+    operation = read_once if role == 'read' else write_once
+    latencies, locked = [], 0
+    with app.app_context():
+        enrollment_ids = [row.id for row in Enrollment.query.with_entities(Enrollment.id)]
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                operation(rng, enrollment_ids)
+                latencies.append((time.perf_counter() - started) * 1000)
+            except IntegrityError:
+                db.session.rollback()
+            except OperationalError as exc:
+                db.session.rollback()
+                if 'locked' not in str(exc):
+                    raise
+                locked += 1
+    results.put((role, latencies, locked))
+
+
+def run_profile(profile, args):
+    from benchmarks.seed import seed_dataset
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        app = create_app(bench_config(path, profile))
+        with app.app_context():
+            db.create_all()
+            seed_dataset(users=args.users, instructors=max(1, args.users // 100),
+                         courses=args.courses, lessons_per_course=args.lessons,
+                         enrollments_per_student=3, completion_rate=0.2,
+                         seed=args.seed, verbose=False)
+            db.engine.dispose()
+
+        results = multiprocessing.Queue()
+        roles = ['read'] * args.readers + ['write'] * args.writers
+        workers = [multiprocessing.Process(target=run_worker,
+                                           args=(path, profile, role, args.seconds, args.seed + n, results))
+                   for n, role in enumerate(roles)]
+        for worker in workers:
+            worker.start()
+        collected = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+
+    summary = {}
+    for role in ('read', 'write'):
+        latencies = [ms for r, values, _ in collected if r == role for ms in values]
+        locked = sum(count for r, _, count in collected if r == role)
+        summary[role] = (len(latencies) / args.seconds, percentile(latencies, 0.95), locked)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', nargs='+', default=['default', 'sqlite', 'server'])
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--courses', type=int, default=100)
+    parser.add_argument('--lessons', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{args.readers} readers + {args.writers} writers for {args.seconds:g}s, "
+          f"{args.users} users / {args.courses} courses")
+    print(f"\n{'profile':<10}{'reads/s':>10}{'p95 ms':>9}{'writes/s':>10}{'p95 ms':>9}{'locked':>8}")
+    for profile in args.profiles:
+        summary = run_profile(profile, args)
+        reads, writes = summary['read'], summary['write']
+        print(f"{profile:<10}{reads[0]:>10.1f}{reads[1]:>9.1f}{writes[0]:>10.1f}{writes[1]:>9.1f}"
+              f"{reads[2] + writes[2]:>8}")
+
+
+if __name__ == '__main__':
+    main()
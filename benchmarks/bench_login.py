@@ -0,0 +1,123 @@
+"""
+Benchmark: login throughput and latency during a login storm
+Seeds a throwaway SQLite database with students, then fires concurrent
+POST /auth/login requests under each hashing setup and reports logins/s,
+p50/p95/p99 latency and how many requests were shed with a 503.
+
+    python -m benchmarks.bench_login --logins 400 --concurrency 16
+    python -m benchmarks.bench_login --method scrypt:32768:8:1 --legacy-method pbkdf2:sha256:600000
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from config import Config
+from app import create_app, db
+from app.models import User
+from app.passwords import hash_password
+from benchmarks.seed import bulk_insert
+
+PASSWORD = 'benchmark123'
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def seed_users(count, method):
+    """Bulk insert students sharing one hash made with method"""
+    from flask import current_app
+    configured = current_app.config['PASSWORD_HASH_METHOD']
+    current_app.config['PASSWORD_HASH_METHOD'] = method
+    password_hash = hash_password(PASSWORD)
+    current_app.config['PASSWORD_HASH_METHOD'] = configured
+    bulk_insert(User.__table__, ({
+        'username': f'student{i}', 'email': f'student{i}@example.com',
+        'password_hash': password_hash, 'role': 'student', 'profile_pic': 'default.jpg',
+    } for i in range(count)))
+
+
+def login_storm(app, users, logins, concurrency):
+    """Run logins spread over concurrency threads; returns (seconds, latencies, statuses)"""
+    latencies, statuses = [], Counter()
+    lock = threading.Lock()
+
+    def worker(offset):
+        for i in range(offset, logins, concurrency):
+            client = app.test_client()  # Fresh cookie jar, so every request logs in
+            started = time.perf_counter()
+            response = client.post('/auth/login', data={
+                'email': f'student{i % users}@example.com', 'password': PASSWORD})
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed * 1000)
+                statuses[response.status_code] += 1
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, latencies, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--logins', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--method', default=Config.PASSWORD_HASH_METHOD,
+                        help='configured PASSWORD_HASH_METHOD')
+    parser.add_argument('--legacy-method', help='seed hashes with this method to measure rehash-on-login')
+    parser.add_argument('--pool-workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--max-concurrent', type=int, default=4)
+    args = parser.parse_args()
+
+    setups = [
+        ('inline, uncapped', 0, args.concurrency),
+        (f'inline, cap {args.max_concurrent}', 0, args.max_concurrent),
+        (f'pool x{args.pool_workers}, cap {args.max_concurrent}', args.pool_workers, args.max_concurrent),
+    ]
+
+    print(f"{args.logins} logins, {args.concurrency} concurrent, method {args.method}"
+          + (f", seeded with {args.legacy_method}" if args.legacy_method else ''))
+    print(f"\n{'setup':<24}{'logins/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'503s':>7}{'rehashed':>10}")
+    for label, workers, cap in setups:
+        with tempfile.TemporaryDirectory() as tmp:
+            class BenchConfig(Config):
+                SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+                WTF_CSRF_ENABLED = False
+                PASSWORD_HASH_METHOD = args.method
+                PASSWORD_HASH_WORKERS = workers
+                PASSWORD_HASH_MAX_CONCURRENT = cap
+                PASSWORD_HASH_QUEUE_TIMEOUT = 30
+
+            app = create_app(BenchConfig)
+            with app.app_context():
+                db.create_all()
+                seed_users(args.users, args.legacy_method or args.method)
+                legacy_prefix = User.query.first().password_hash.split('$', 1)[0]
+
+            seconds, latencies, statuses = login_storm(app, args.users, args.logins, args.concurrency)
+
+            with app.app_context():
+                rehashed = User.query.filter(~User.password_hash.startswith(legacy_prefix + '$')).count()
+                pool = app.extensions['password_hashing'][1]
+                if pool is not None:
+                    pool.shutdown()
+
+            ok = statuses[302]
+            print(f"{label:<24}{ok / seconds:>10.1f}{percentile(latencies, 0.50):>10.0f}"
+                  f"{percentile(latencies, 0.95):>10.0f}{percentile(latencies, 0.99):>10.0f}"
+                  f"{statuses[503]:>7}{rehashed:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark: full-text course search vs. the old ILIKE scan
+Seeds a throwaway SQLite database with N courses and times both paths.
+
+    python -m benchmarks.bench_search --courses 100000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from config import Config
+from app import create_app, db
+from app.models import User, Course
+from app.search import get_backend, rebuild_index
+
+WORDS = ('python web javascript data science machine learning design business '
+         'marketing react flask django sql database cloud devops security '
+         'statistics excel finance photography writing music drawing swift '
+         'kotlin android ios rust golang algorithms testing agile').split()
+CATEGORIES = ['Programming', 'Web Development', 'Data Science', 'Business', 'Design']
+DIFFICULTIES = ['Beginner', 'Intermediate', 'Advanced']
+TERMS = ['python', 'pyth', 'machine learning', 'react flask', 'photography', 'zzzz']
+
+
+def seed(count, rng):
+    """Bulk insert one instructor and `count` published courses"""
+    instructor = User(username='bench', email='bench@example.com',
+                      role='instructor', password_hash='x')
+    db.session.add(instructor)
+    db.session.commit()
+
+    start = datetime.utcnow() - timedelta(days=count)
+    rows = []
+    for i in range(count):
+        rows.append({
+            'title': ' '.join(rng.choice(WORDS) for _ in range(4)).title(),
+            'description': ' '.join(rng.choice(WORDS) for _ in range(40)),
+            'instructor_id': instructor.id,
+            'category': rng.choice(CATEGORIES),
+            'difficulty': rng.choice(DIFFICULTIES),
+            'price': 0.0,
+            'image': 'default_course.jpg',
+            'created_at': start + timedelta(days=i),
+            'updated_at': start + timedelta(days=i),
+            'is_published': True,
+        })
+        if len(rows) == 5000:
+            db.session.execute(Course.__table__.insert(), rows)
+            rows = []
+    if rows:
+        db.session.execute(Course.__table__.insert(), rows)
+    db.session.commit()
+
+
+def ilike_query(term):
+    """The pre-FTS browse query"""
+    pattern = f"%{term}%"
+    return (Course.query.filter_by(is_published=True)
+            .filter((Course.title.ilike(pattern)) | (Course.description.ilike(pattern)))
+            .order_by(Course.created_at.desc()))
+
+
+def fts_query(term):
+    return get_backend().apply(Course.query.filter_by(is_published=True), term)
+
+
+def timed(build, term, repeat):
+    """Best-of-`repeat` time for fetching the first browse page"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        build(term).limit(9).all()
+        build(term).order_by(None).count()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--courses', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            db.create_all()
+            print(f"Seeding {args.courses} courses...")
+            seed(args.courses, random.Random(args.seed))
+
+            started = time.perf_counter()
+            backend = rebuild_index()
+            print(f"Index rebuild ({backend}): {time.perf_counter() - started:.2f}s\n")
+
+            print(f"{'term':<20}{'ILIKE ms':>12}{'FTS ms':>12}{'speedup':>10}")
+            for term in TERMS:
+                slow = timed(ilike_query, term, args.repeat)
+                fast = timed(fts_query, term, args.repeat)
+                print(f"{term:<20}{slow:>12.2f}{fast:>12.2f}{slow / fast:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
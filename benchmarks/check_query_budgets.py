@@ -0,0 +1,61 @@
+"""
+Query-budget check: fail if a page goes over its QUERY_BUDGETS entry
+Seeds a throwaway SQLite database, drives the harness's key pages with the
+page and identity caches off, so every request pays its cold-cache queries,
+and exits 1 if a request issues more statements than its endpoint's budget
+or repeats one statement shape more than SQL_REPEATED_STATEMENT_LIMIT times.
+
+    python -m benchmarks.check_query_budgets --preset small
+    python -m benchmarks.check_query_budgets --database /tmp/learnhub-large.db
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+from app import create_app, db
+from app.instrumentation import record_requests
+from benchmarks.harness import bench_config, build_routes, login_clients, pick_fixtures
+from benchmarks.seed import PRESETS, seed_dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database', help='Seeded SQLite file to reuse (see benchmarks.seed)')
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='small')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.abspath(args.database) if args.database else os.path.join(tmp, 'budgets.db')
+        app = create_app(bench_config(path, CACHE_BACKEND='null', USER_CACHE_ENABLED=False))
+        with app.app_context():
+            if not args.database:
+                db.create_all()
+                seed_dataset(seed=args.seed, verbose=False, **PRESETS[args.preset])
+            fixtures = pick_fixtures()
+        clients = login_clients(app, fixtures)
+
+        failures = 0
+        print(f"\n  {'route':<22}{'endpoint':<30}{'queries':>8}{'budget':>8}")
+        for name, user, path in build_routes(fixtures):
+            with record_requests(app) as recorded:
+                clients[user].get(path)
+            stats = recorded[-1]
+            budget = '-' if stats.budget is None else stats.budget
+            mark = '❌' if stats.over_budget or stats.repeated else '✓'
+            print(f"{mark} {name:<22}{stats.endpoint:<30}{stats.queries:>8}{budget:>8}")
+            for shape, times in stats.repeated:
+                print(f"      {times}x {shape[:100]}")
+            failures += bool(stats.over_budget or stats.repeated)
+        with app.app_context():
+            db.engine.dispose()
+
+    print(f"\n{failures} page(s) over budget or repeating statements")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
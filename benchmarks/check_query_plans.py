@@ -0,0 +1,161 @@
+"""
+Query-plan check: fail if any page falls back to a full table scan
+Seeds a throwaway SQLite database with a large dataset, drives every page
+as each kind of user, records the SQL issued, and runs EXPLAIN QUERY PLAN
+on each distinct statement. Exits 1 if a plan contains a full scan.
+
+    python -m benchmarks.check_query_plans --users 20000 --courses 2000
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+
+from sqlalchemy import event
+
+from config import Config
+from app import create_app, db
+from app.models import Course, Enrollment, Lesson
+from benchmarks.seed import PASSWORD, seed_dataset
+
+# "SCAN users" / "SCAN TABLE users AS u" without USING INDEX is a full scan
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+SKIPPED_PREFIXES = ('PRAGMA', 'BEGIN', 'SAVEPOINT', 'RELEASE', 'ROLLBACK', 'COMMIT', 'ANALYZE')
+
+
+class StatementRecorder:
+    """Collects distinct SQL statements with the page that first issued them"""
+
+    def __init__(self):
+        self.page = None
+        self.statements = {}  # sql -> (page, parameters)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if self.page is None or executemany:
+            return
+        if statement.lstrip().upper().startswith(SKIPPED_PREFIXES):
+            return
+        self.statements.setdefault(statement, (self.page, parameters))
+
+
+def pick_accounts():
+    """Emails of a student with progress, that course's instructor, and the admin"""
+    enrollment = Enrollment.query.filter(Enrollment.completed_lessons > 0).first()
+    course = db.session.get(Course, enrollment.course_id)
+    return enrollment, course.instructor.email, enrollment.student.email, 'user1@example.com'
+
+
+def drive_pages(app, recorder):
+    """Request every page as anonymous, student, instructor and admin users"""
+    with app.app_context():
+        enrollment, instructor, student, admin = pick_accounts()
+        course_id = enrollment.course_id
+        lesson = Lesson.query.filter_by(course_id=course_id).order_by(Lesson.order).first()
+        other_course = Course.query.filter(Course.is_published.is_(True),
+                                           Course.id != course_id).first()
+
+    client = app.test_client()
+
+    def visit(path, method='get', **kwargs):
+        recorder.page = f'{method.upper()} {path}'
+        response = getattr(client, method)(path, **kwargs)
+        recorder.page = None
+        if response.status_code >= 400:
+            print(f"  ⚠️  {method.upper()} {path} returned {response.status_code}")
+        return response
+
+    def login(email):
+        client.get('/auth/logout')
+        visit('/auth/login', 'post', data={'email': email, 'password': PASSWORD})
+
+    def keyset_pages(path):
+        first = visit(path + ('&' if '?' in path else '?') + 'paging=keyset')
+        match = re.search(rb'cursor=([\w-]+)', first.data)
+        if match:
+            visit(path + ('&' if '?' in path else '?') + 'cursor=' + match.group(1).decode())
+
+    for path in ('/', '/courses/browse', '/courses/browse?page=50',
+                 '/courses/browse?category=Programming&difficulty=Beginner',
+                 '/courses/browse?search=python', '/courses/browse?search=mach',
+                 f'/courses/{course_id}'):
+        visit(path)
+    keyset_pages('/courses/browse')
+
+    login(student)
+    for path in ('/student/dashboard', '/student/my-courses', '/profile',
+                 f'/courses/{course_id}', f'/courses/{course_id}/progress',
+                 f'/courses/lessons/{lesson.id}/view'):
+        visit(path)
+    visit(f'/courses/lessons/{lesson.id}/complete', 'post')
+    visit(f'/courses/{other_course.id}/enroll', 'post')
+
+    login(instructor)
+    for path in ('/instructor/dashboard', f'/courses/{course_id}/edit',
+                 f'/courses/{course_id}/lessons/manage', f'/courses/lessons/{lesson.id}/edit'):
+        visit(path)
+
+    login(admin)
+    for path in ('/admin/dashboard', '/admin/users', '/admin/users?role=student',
+                 '/admin/users?page=20', '/admin/courses', '/admin/courses?page=20'):
+        visit(path)
+    keyset_pages('/admin/users?role=instructor')
+    keyset_pages('/admin/courses')
+
+
+def explain(statement, parameters):
+    """EXPLAIN QUERY PLAN rows for one statement, as detail strings"""
+    with db.engine.connect() as connection:
+        cursor = connection.connection.cursor()
+        cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--instructors', type=int, default=200)
+    parser.add_argument('--courses', type=int, default=2000)
+    parser.add_argument('--lessons', type=int, default=20, help='average lessons per course')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--verbose', action='store_true', help='print every plan')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        class CheckConfig(Config):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, 'plans.db')
+            WTF_CSRF_ENABLED = False
+            CACHE_BACKEND = 'null'
+
+        app = create_app(CheckConfig)
+        recorder = StatementRecorder()
+        with app.app_context():
+            db.create_all()
+            seed_dataset(users=args.users, instructors=args.instructors, courses=args.courses,
+                         lessons_per_course=args.lessons, seed=args.seed)
+            event.listen(db.engine, 'before_cursor_execute', recorder)
+
+        drive_pages(app, recorder)
+
+        failures = 0
+        with app.app_context():
+            event.remove(db.engine, 'before_cursor_execute', recorder)
+            for statement, (page, parameters) in recorder.statements.items():
+                plan = explain(statement, parameters)
+                scans = [match.group(1) for match in map(FULL_SCAN.match, plan) if match]
+                if scans or args.verbose:
+                    print(f"\n{'❌ FULL SCAN of ' + ', '.join(scans) if scans else '✓'}  [{page}]")
+                    print('  ' + ' '.join(statement.split()))
+                    for line in plan:
+                        print(f"    {line}")
+                failures += bool(scans)
+
+        print(f"\nChecked {len(recorder.statements)} distinct statements: "
+              f"{failures} with full table scans")
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+"""
+Benchmark harness: latency, queries and memory of the key pages
+Drives each route through the Flask test client as the right kind of user
+and records p50/p95/p99 latency, SQL statements and database time per
+request (from app.instrumentation) and the peak Python memory one request
+allocates. Results are written as JSON with
+stable key order, so runs on two commits can be diffed or compared:
+
+    python -m benchmarks.harness --preset small -o before.json
+    python -m benchmarks.harness --database /tmp/learnhub-large.db -o after.json
+    python -m benchmarks.harness --compare before.json after.json
+
+--database reuses a file made by `python -m benchmarks.seed` (seeding the
+'large' preset takes a while); without it a throwaway database is seeded.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from importlib.metadata import version
+
+from sqlalchemy import func
+
+from config import Config
+from app import create_app, db
+from app.instrumentation import record_requests
+from benchmarks.seed import PASSWORD, PRESETS, seed_dataset
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def bench_config(path, **overrides):
+    return type('HarnessConfig', (Config,), dict({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + path,
+        'WTF_CSRF_ENABLED': False,
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        # Background work would land inside the next request's timing
+        'JOBS_RUN_AFTER_RESPONSE': False,
+        'HEARTBEAT_FLUSH_INTERVAL': 3600,
+        'SQL_INSTRUMENTATION': True,
+        'SQL_LOG_LEVEL': 'WARNING',
+    }, **overrides))
+
+
+# ============================================================================
+# ROUTES
+# ============================================================================
+
+def pick_fixtures():
+    """Accounts and ids the routes need, picked from the seeded data"""
+    from app.models import Course, Enrollment, Lesson, User
+    # The busiest instructor and a student part way through a course
+    instructor_id = db.session.query(Course.instructor_id).group_by(Course.instructor_id) \
+        .order_by(func.count(Course.id).desc()).limit(1).scalar()
+    course = Course.query.filter_by(instructor_id=instructor_id) \
+        .order_by(Course.enrollment_count.desc()).first()
+    enrollment = Enrollment.query.filter(Enrollment.course_id == course.id,
+                                         Enrollment.completed_lessons > 0).first() \
+        or Enrollment.query.filter(Enrollment.completed_lessons > 0).first()
+    lesson = Lesson.query.filter_by(course_id=enrollment.course_id).order_by(Lesson.order).first()
+    return {
+        'student': enrollment.student.email,
+        'instructor': db.session.get(User, instructor_id).email,
+        'admin': User.query.filter_by(role='admin').first().email,
+        'course_id': enrollment.course_id,
+        'managed_course_id': course.id,
+        'lesson_id': lesson.id,
+    }
+
+
+def build_routes(f):
+    """(name, user, path) for every benchmarked request; user None is anonymous"""
+    return [
+        ('home', None, '/'),
+        ('browse', None, '/courses/browse'),
+        ('browse_deep_page', None, '/courses/browse?page=50'),
+        ('browse_search', None, '/courses/browse?search=python'),
+        ('course_detail', None, f"/courses/{f['course_id']}"),
+        ('api_courses', None, '/api/v1/courses'),
+        ('api_outline', None, f"/api/v1/courses/{f['course_id']}/outline"),
+        ('student_dashboard', 'student', '/student/dashboard'),
+        ('my_courses', 'student', '/student/my-courses'),
+        ('course_progress', 'student', f"/courses/{f['course_id']}/progress"),
+        ('view_lesson', 'student', f"/courses/lessons/{f['lesson_id']}/view"),
+        ('api_enrollments', 'student', '/api/v1/me/enrollments'),
+        ('instructor_dashboard', 'instructor', '/instructor/dashboard'),
+        ('manage_lessons', 'instructor', f"/courses/{f['managed_course_id']}/lessons/manage"),
+        ('admin_dashboard', 'admin', '/admin/dashboard'),
+        ('admin_users', 'admin', '/admin/users'),
+        ('admin_courses', 'admin', '/admin/courses'),
+    ]
+
+
+def measure(app, client, path, requests, warmup):
+    """Latency percentiles, queries per request and peak traced memory for one path"""
+    for _ in range(warmup):
+        client.get(path)
+
+    latencies = []
+    with record_requests(app) as recorded:
+        for _ in range(requests):
+            started = time.perf_counter()
+            response = client.get(path)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    # Tracing slows every allocation, so memory gets a separate request
+    tracemalloc.start()
+    client.get(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'path': path,
+        'status': response.status_code,
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'queries': max(stats.queries for stats in recorded),
+        'db_p50_ms': round(percentile([stats.db_ms for stats in recorded], 0.50), 2),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def login_clients(app, fixtures):
+    """A test client per kind of user, each logged in as the fixture account"""
+    clients = {}
+    for user in (None, 'student', 'instructor', 'admin'):
+        clients[user] = app.test_client()
+        if user:
+            clients[user].post('/auth/login', data={'email': fixtures[user], 'password': PASSWORD})
+    return clients
+
+
+def run(app, args):
+    with app.app_context():
+        from app.models import Course, Enrollment, Lesson, LessonProgress, User
+        fixtures = pick_fixtures()
+        dataset = {model.__tablename__: model.query.count()
+                   for model in (User, Course, Lesson, Enrollment, LessonProgress)}
+    clients = login_clients(app, fixtures)
+
+    routes = {}
+    for name, user, path in build_routes(fixtures):
+        if args.routes and name not in args.routes:
+            continue
+        routes[name] = measure(app, clients[user], path, args.requests, args.warmup)
+        result = routes[name]
+        print(f"  {name:<22}{result['status']:>5}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}"
+              f"{result['p99_ms']:>9.1f}{result['queries']:>9}{result['peak_kib']:>11,.0f}")
+    return dataset, routes
+
+
+# ============================================================================
+# RESULTS
+# ============================================================================
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(before_path, after_path):
+    """Print per-route changes between two result files"""
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"{before['meta']['commit']} -> {after['meta']['commit']}")
+    print(f"\n{'route':<22}{'p50 ms':^18}{'p95 ms':^18}{'queries':^12}{'peak KiB':^20}")
+    for name, new in after['routes'].items():
+        old = before['routes'].get(name)
+        if old is None:
+            print(f"{name:<22}  (new)")
+            continue
+        print(f"{name:<22}"
+              f"{old['p50_ms']:>8.1f} → {new['p50_ms']:<7.1f}"
+              f"{old['p95_ms']:>8.1f} → {new['p95_ms']:<7.1f}"
+              f"{old['queries']:>4} → {new['queries']:<5}"
+              f"{old['peak_kib']:>9,.0f} → {new['peak_kib']:<8,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database', help='Seeded SQLite file to reuse (see benchmarks.seed)')
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='small',
+                        help='Dataset to seed when --database is not given')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--requests', type=int, default=50, help='timed requests per route')
+    parser.add_argument('--warmup', type=int, default=5, help='untimed requests per route first')
+    parser.add_argument('--routes', nargs='+', help='Only these route names')
+    parser.add_argument('--output', '-o', help='Write the results as JSON to this file')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'),
+                        help='Compare two result files instead of running')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    print(f"\n  {'route':<22}{'code':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'peak KiB':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.database:
+            path = os.path.abspath(args.database)
+            if not os.path.exists(path):
+                parser.error(f'{path} does not exist; create it with python -m benchmarks.seed')
+            app = create_app(bench_config(path))
+        else:
+            app = create_app(bench_config(os.path.join(tmp, 'harness.db')))
+            with app.app_context():
+                db.create_all()
+                seed_dataset(seed=args.seed, verbose=False, **PRESETS[args.preset])
+        dataset, routes = run(app, args)
+        with app.app_context():
+            db.engine.dispose()
+
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+            'dataset': args.database and os.path.basename(args.database) or args.preset,
+            'rows': dataset,
+            'requests': args.requests,
+            'python': platform.python_version(),
+            'flask': version('flask'),
+            'sqlalchemy': version('sqlalchemy'),
+            'max_rss_kib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        },
+        'routes': routes,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+        print(f"\n✅ Results written to {args.output}")
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+"""
+Seeded synthetic dataset generator for benchmarks
+Writes rows with explicit ids through Core bulk inserts in chunks, computes
+the denormalized counters while generating, and rebuilds the search index
+and dashboard rollups. The same seed always produces the same data.
+Enrollments are held in compact arrays and progress rows are generated as
+they are inserted, so the 'large' preset fits in a few hundred MB.
+
+Run on its own to build a database the harness can reuse between runs:
+
+    python -m benchmarks.seed --preset large --database /tmp/learnhub-large.db
+"""
+
+import argparse
+import os
+import random
+import time
+from array import array
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import User, Course, Enrollment, Lesson, LessonProgress
+from app.passwords import hash_password
+from app.rollups import backfill
+from app.search import rebuild_index
+
+WORDS = ('python web javascript data science machine learning design business '
+         'marketing react flask django sql database cloud devops security '
+         'statistics excel finance photography writing music drawing swift '
+         'kotlin android ios rust golang algorithms testing agile').split()
+CATEGORIES = ['Programming', 'Web Development', 'Data Science', 'Business',
+              'Design', 'Marketing', 'Other']
+DIFFICULTIES = ['Beginner', 'Intermediate', 'Advanced']
+
+# Every seeded account shares this password
+PASSWORD = 'benchmark123'
+
+# seed_dataset() arguments for typical sizes; 'large' is about 500k users,
+# 20k courses, 400k lessons, 1M enrollments and 5M progress rows
+PRESETS = {
+    'small': dict(users=2000, instructors=20, courses=200, lessons_per_course=10,
+                  enrollments_per_student=3, completion_rate=0.3),
+    'medium': dict(users=50000, instructors=500, courses=5000, lessons_per_course=20,
+                   enrollments_per_student=3, completion_rate=0.25),
+    'large': dict(users=500000, instructors=5000, courses=20000, lessons_per_course=20,
+                  enrollments_per_student=2, completion_rate=0.28),
+}
+
+
+def bulk_insert(table, rows, chunk_size=5000):
+    """Insert an iterable of row dicts in chunks; returns the row count"""
+    chunk, total = [], 0
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            db.session.execute(table.insert(), chunk)
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        db.session.execute(table.insert(), chunk)
+        total += len(chunk)
+    db.session.commit()
+    return total
+
+
+def _words(rng, count):
+    return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+
+def seed_dataset(users=20000, instructors=200, courses=2000, lessons_per_course=20,
+                 enrollments_per_student=5, completion_rate=0.5, seed=42,
+                 chunk_size=5000, verbose=True):
+    """Populate an empty database; returns a dict of row counts.
+
+    User 1 is an admin, users 2..instructors+1 are instructors and the rest
+    are students. Seeded accounts log in as userN@example.com / PASSWORD.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    password_hash = hash_password(PASSWORD)
+    counts = {}
+
+    def log(message):
+        if verbose:
+            print(message)
+
+    def timed_insert(name, table, rows):
+        started = time.perf_counter()
+        counts[name] = bulk_insert(table, rows, chunk_size)
+        elapsed = time.perf_counter() - started
+        log(f"  ✓ {counts[name]:>10,} {name:<16} {counts[name] / max(elapsed, 1e-9):>12,.0f} rows/s")
+
+    instructor_ids = list(range(2, instructors + 2))
+    student_ids = list(range(instructors + 2, users + 1))
+
+    def user_rows():
+        for user_id in range(1, users + 1):
+            role = 'admin' if user_id == 1 else 'instructor' if user_id <= instructors + 1 else 'student'
+            yield {
+                'id': user_id,
+                'username': f'user{user_id}',
+                'email': f'user{user_id}@example.com',
+                'password_hash': password_hash,
+                'role': role,
+                'profile_pic': 'default.jpg',
+                'created_at': now - timedelta(minutes=rng.randint(0, 525600)),
+            }
+
+    # Lessons are generated up front so the course counters can be filled in
+    course_stats = {}
+    lessons = []
+    lesson_id = 0
+    for course_id in range(1, courses + 1):
+        lesson_count = rng.randint(max(1, lessons_per_course // 2), lessons_per_course * 3 // 2)
+        duration = pdfs = 0
+        for order in range(1, lesson_count + 1):
+            lesson_id += 1
+            minutes = rng.randint(5, 60)
+            pdf = f'lesson_{lesson_id}.pdf' if rng.random() < 0.2 else None
+            duration += minutes
+            pdfs += 1 if pdf else 0
+            lessons.append((lesson_id, course_id, order, minutes, pdf))
+        course_stats[course_id] = [lesson_count, duration, pdfs, 0]
+
+    course_lessons = {}
+    for lesson in lessons:
+        course_lessons.setdefault(lesson[1], []).append(lesson[0])
+
+    # Enrollment n (1-based) is index n - 1 of these arrays
+    enrolled_students, enrolled_courses, done_lessons = array('i'), array('i'), array('i')
+    for student_id in student_ids:
+        for course_id in rng.sample(range(1, courses + 1), min(enrollments_per_student, courses)):
+            enrolled_students.append(student_id)
+            enrolled_courses.append(course_id)
+            course_stats[course_id][3] += 1
+
+    def course_rows():
+        for course_id in range(1, courses + 1):
+            lesson_count, duration, pdfs, enrolled = course_stats[course_id]
+            created_at = now - timedelta(minutes=rng.randint(0, 525600))
+            yield {
+                'id': course_id,
+                'title': _words(rng, 4).title(),
+                'description': _words(rng, 40),
+                'instructor_id': rng.choice(instructor_ids),
+                'category': rng.choice(CATEGORIES),
+                'price': round(rng.uniform(0, 200), 2),
+                'difficulty': rng.choice(DIFFICULTIES),
+                'image': 'default_course.jpg',
+                'created_at': created_at,
+                'updated_at': created_at,
+                'lessons_changed_at': created_at,
+                'is_published': rng.random() < 0.9,
+                'enrollment_count': enrolled,
+                'lesson_count': lesson_count,
+                'total_duration': duration,
+                'pdf_count': pdfs,
+            }
+
+    def lesson_rows():
+        for lesson_id, course_id, order, minutes, pdf in lessons:
+            yield {
+                'id': lesson_id,
+                'course_id': course_id,
+                'title': _words(rng, 3).title(),
+                'content': f'<p>{_words(rng, 80)}</p>',
+                'order': order,
+                'duration': minutes,
+                'pdf_file': pdf,
+                'created_at': now,
+            }
+
+    # Progress rows only exist for completed lessons (rows are created lazily)
+    for course_id in enrolled_courses:
+        total = len(course_lessons[course_id])
+        done_lessons.append(min(int(total * rng.random() * completion_rate * 2), total))
+
+    def enrollment_rows():
+        for index, (student_id, course_id) in enumerate(zip(enrolled_students, enrolled_courses)):
+            done, total = done_lessons[index], len(course_lessons[course_id])
+            yield {
+                'id': index + 1,
+                'student_id': student_id,
+                'course_id': course_id,
+                'enrolled_at': now - timedelta(minutes=rng.randint(0, 525600)),
+                'progress': done * 100 // total if total else 0,
+                'completed': done == total,
+                'completed_lessons': done,
+            }
+
+    def progress_rows():
+        for index, course_id in enumerate(enrolled_courses):
+            for lesson_id in course_lessons[course_id][:done_lessons[index]]:
+                yield {
+                    'enrollment_id': index + 1,
+                    'lesson_id': lesson_id,
+                    'completed': True,
+                    'completed_at': now - timedelta(minutes=rng.randint(0, 525600)),
+                    'time_spent': rng.randint(60, 3600),
+                }
+
+    log("Seeding dataset...")
+    timed_insert('users', User.__table__, user_rows())
+    timed_insert('courses', Course.__table__, course_rows())
+    timed_insert('lessons', Lesson.__table__, lesson_rows())
+    timed_insert('enrollments', Enrollment.__table__, enrollment_rows())
+    timed_insert('lesson_progress', LessonProgress.__table__, progress_rows())
+
+    started = time.perf_counter()
+    rebuild_index()
+    backfill()
+    with db.engine.begin() as connection:
+        connection.exec_driver_sql("ANALYZE")
+    log(f"  ✓ search index, rollups and statistics in {time.perf_counter() - started:.1f}s")
+    return counts
+
+
+def main():
+    from config import Config
+    from app import create_app
+
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='small')
+    parser.add_argument('--database', required=True, help='SQLite file to create')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    path = os.path.abspath(args.database)
+    if os.path.exists(path):
+        parser.error(f'{path} already exists')
+    app = create_app(type('SeedConfig', (Config,), {'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + path}))
+    started = time.perf_counter()
+    with app.app_context():
+        db.create_all()
+        seed_dataset(seed=args.seed, chunk_size=args.chunk_size, **PRESETS[args.preset])
+    print(f"✅ Seeded {args.preset} dataset into {path} in {time.perf_counter() - started:.0f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -12,14 +12,113 @@ class Config:
         'sqlite:///' + os.path.join(basedir, 'instance', 'learning_platform.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Engine profile ('auto' picks 'sqlite' or 'server' from the URL, 'default' tunes nothing)
+    DATABASE_PROFILE = os.environ.get('DATABASE_PROFILE') or 'auto'
+    SQLITE_JOURNAL_MODE = 'WAL'  # readers no longer wait for writers
+    SQLITE_SYNCHRONOUS = 'NORMAL'  # safe with WAL; fsyncs at checkpoints instead of every commit
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT') or 5000)  # ms a writer waits for the lock
+    SQLITE_MMAP_SIZE = 256 * 1024 * 1024  # bytes of the file read through mmap
+    SQLITE_CACHE_SIZE = -64000  # negative means KiB of page cache per connection
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or 10)  # per web process
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW') or 20)
+    DB_POOL_TIMEOUT = 30  # seconds to wait for a free connection
+    DB_POOL_RECYCLE = 1800  # seconds; stay under the server's idle timeout
+    DB_POOL_PRE_PING = True  # test connections on checkout, survives server restarts
+    
+    # Optional read replica: GET/HEAD reads go here, writes and read-your-writes to the primary
+    REPLICA_DATABASE_URL = os.environ.get('REPLICA_DATABASE_URL')
+    REPLICA_READ_AFTER_WRITE = 5  # seconds a client keeps reading the primary after it writes
+    
     # Upload folder configuration
     UPLOAD_FOLDER = os.path.join(basedir, 'app', 'static', 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf', 'doc', 'docx'}
+    UPLOAD_RELEASE_GRACE = 3600  # seconds a stored or reused file is kept before release may delete it
+    
+    # Protected file delivery ('direct' streams from Flask, 'x-accel' hands off to
+    # nginx, 'x-sendfile' to Apache/lighttpd)
+    FILE_DELIVERY = os.environ.get('FILE_DELIVERY') or 'direct'
+    X_ACCEL_REDIRECT_PREFIX = '/protected-uploads'  # nginx internal location for UPLOAD_FOLDER
+    PROTECTED_FILE_MAX_AGE = 3600  # seconds browsers may reuse a downloaded copy
     
     # Session configuration
     PERMANENT_SESSION_LIFETIME = timedelta(days=7)
     
-    # Pagination
+    # Logged-in user identity cache (saves the users query on most requests)
+    USER_CACHE_ENABLED = os.environ.get('USER_CACHE_ENABLED', '1') == '1'
+    USER_CACHE_TIMEOUT = 30  # seconds; bounds staleness across worker processes
+    USER_CACHE_MAX_ENTRIES = 4096
+    
+    # Lesson time-on-page heartbeats (buffered in memory, written in batches)
+    HEARTBEAT_INTERVAL = 30  # seconds between pings from an open lesson page
+    HEARTBEAT_FLUSH_INTERVAL = 5  # seconds buffered time may wait before it is saved
+    HEARTBEAT_FLUSH_EVENTS = 500  # ...or save sooner once this many pings are buffered
+    
+    # Password hashing (changing the method rehashes each password at its next login)
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'pbkdf2:sha256:600000'
+    PASSWORD_SALT_LENGTH = 16
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS') or 0)  # 0 hashes in the request thread
+    PASSWORD_HASH_MAX_CONCURRENT = 4  # Hashes running at once per web process
+    PASSWORD_HASH_QUEUE_TIMEOUT = 5  # Seconds to wait for a slot before answering 503
+    
+    # Search ('auto' picks FTS5 on SQLite, tsvector on PostgreSQL, else LIKE)
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND') or 'auto'
+    
+    # Caching ('lru' per process, 'sqlite' shared across workers, 'null' off)
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND') or 'lru'
+    CACHE_DEFAULT_TIMEOUT = 60  # seconds
+    CACHE_LRU_MAX_ENTRIES = 1024
+    CACHE_SQLITE_PATH = os.path.join(basedir, 'instance', 'cache.db')
+    COURSE_FRAGMENT_TIMEOUT = 3600  # Keys are versioned, so this only bounds memory
+    
+    # Pagination ('offset' page numbers or 'keyset' cursors; ?paging= overrides)
+    PAGINATION_MODE = os.environ.get('PAGINATION_MODE') or 'offset'
+    KEYSET_COUNT_CAP = 1000  # Keyset pages count at most this many rows for the total
     COURSES_PER_PAGE = 9
-    USERS_PER_PAGE = 20
\ No newline at end of file
+    USERS_PER_PAGE = 20
+    
+    # Background jobs (queued in the jobs table, run by `flask jobs work`)
+    JOBS_EXECUTOR = os.environ.get('JOBS_EXECUTOR') or 'thread'  # 'thread' or 'process' pool
+    JOBS_WORKERS = int(os.environ.get('JOBS_WORKERS') or 4)
+    JOBS_POLL_INTERVAL = 1.0  # seconds between checks when the queue is empty
+    JOBS_MAX_ATTEMPTS = 5
+    JOBS_BACKOFF_BASE = 5  # seconds before the first retry; doubles per attempt
+    JOBS_BACKOFF_MAX = 600
+    JOBS_STALE_AFTER = 900  # 'running' jobs older than this are requeued on worker start
+    # Web processes also run the jobs a request enqueued once its response is sent;
+    # turn off when a dedicated worker is running
+    JOBS_RUN_AFTER_RESPONSE = os.environ.get('JOBS_RUN_AFTER_RESPONSE', '1') == '1'
+    DELETE_BATCH_SIZE = 1000  # rows per transaction when jobs delete courses/users
+    
+    # Bulk import (`flask import`) and streaming exports
+    IMPORT_CHUNK_SIZE = 1000  # manifest records per transaction; --chunk-size overrides
+    EXPORT_BATCH_SIZE = 1000  # rows fetched per round trip by the export cursor
+    
+    # Per-request SQL instrumentation (Server-Timing header and JSON log lines)
+    SQL_INSTRUMENTATION = os.environ.get('SQL_INSTRUMENTATION', '1') == '1'
+    SQL_SERVER_TIMING = True
+    SQL_LOG_LEVEL = os.environ.get('SQL_LOG_LEVEL') or 'INFO'  # WARNING keeps only N+1 and budget warnings
+    SQL_REPEATED_STATEMENT_LIMIT = 10  # warn when one statement shape runs more often in a request
+    SQL_QUERY_BUDGETS_STRICT = False  # raise instead of warn when a request is over budget (tests)
+    # Most statements an endpoint may issue; more is logged as a warning
+    QUERY_BUDGETS = {
+        'main.index': 5,
+        'main.student_dashboard': 6,
+        'main.instructor_dashboard': 3,
+        'courses.browse': 3,
+        'courses.detail': 5,
+        'courses.course_progress': 6,
+        'courses.view_lesson': 7,
+        'courses.manage_lessons': 5,
+        'admin.dashboard': 12,  # includes queueing a stale rollup refresh
+        'admin.users': 4,
+        'admin.courses': 4,
+        'api.list_courses': 3,
+        'api.get_outline': 4,
+        'api.my_enrollments': 3,
+    }
+    
+    # Daily rollups behind the admin dashboard charts
+    ROLLUP_REFRESH_INTERVAL = 300  # seconds before a dashboard visit queues a refresh
+    ROLLUP_SETTLE_SECONDS = 60  # rows newer than this wait for the next refresh
+    ROLLUP_CHART_DAYS = 30
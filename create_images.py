@@ -1,4 +1,5 @@
 from PIL import Image, ImageDraw, ImageFont
+from app.images import DEFAULT_IMAGES, build_variants
 
 # Create default profile image (200x200)
 def create_profile_image():
@@ -66,10 +67,18 @@ def create_hero_image():
     img.save('app/static/images/hero-illustration.jpg')
     print("✓ Created hero-illustration.jpg")
 
+# Resize the defaults the same way uploads are (JPEG + WebP per width)
+def create_default_variants():
+    for kind, filename in DEFAULT_IMAGES.items():
+        written = build_variants(f'app/static/images/{filename}', 'app/static/images/variants',
+                                 kind, force=True)
+        print(f"✓ Created {written} variants of {filename}")
+
 if __name__ == "__main__":
     print("Creating default images...")
     create_profile_image()
     create_course_image()
     create_hero_image()
+    create_default_variants()
     print("\n✓ All images created successfully!")
     print("Location: app/static/images/")
\ No newline at end of file
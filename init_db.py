@@ -5,6 +5,7 @@ Run this file to create the database and add sample data
 
 from app import create_app, db
 from app.models import User, Course, Lesson, Assignment
+from app.counters import reconcile_course_counters
 from datetime import datetime, timedelta
 
 def init_database():
@@ -129,6 +130,9 @@ def init_database():
         db.session.add(assignment1)
         db.session.commit()
         
+        # Fill in the denormalized course counters
+        reconcile_course_counters()
+        
         print("\n" + "="*50)
         print("Database initialized successfully!")
         print("="*50)
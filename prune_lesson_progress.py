@@ -0,0 +1,43 @@
+"""
+Migration script to drop placeholder lesson_progress rows
+Enrollment used to pre-create one "not completed" row per lesson. Rows are
+now created on first interaction, so untouched placeholders carry no data.
+Deletes in batches to keep each transaction (and lock) short.
+
+Usage: python prune_lesson_progress.py [batch_size]
+"""
+
+import sys
+from app import create_app, db
+from sqlalchemy import text
+
+BATCH_SIZE = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+app = create_app()
+
+with app.app_context():
+    print(f"Pruning placeholder lesson progress rows (batch size {BATCH_SIZE})...")
+    
+    total = 0
+    try:
+        while True:
+            result = db.session.execute(text(
+                "DELETE FROM lesson_progress WHERE id IN ("
+                "  SELECT id FROM lesson_progress"
+                "  WHERE (completed = 0 OR completed IS NULL)"
+                "    AND completed_at IS NULL"
+                "    AND (time_spent = 0 OR time_spent IS NULL)"
+                "  LIMIT :batch)"
+            ), {'batch': BATCH_SIZE})
+            db.session.commit()
+            
+            if result.rowcount == 0:
+                break
+            total += result.rowcount
+            print(f"  ✓ Deleted {total} rows so far")
+        
+        print(f"✅ Removed {total} placeholder rows")
+    
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        db.session.rollback()
@@ -42,6 +42,7 @@ with app.app_context():
     )
     
     db.session.add(lesson)
+    course.adjust_counters(**lesson.counter_deltas())
     db.session.commit()
     
     print(f"\n✅ Lesson '{title}' added successfully!")
@@ -0,0 +1,108 @@
+# tests/conftest.py
+"""
+Shared fixtures: an app on a throwaway SQLite database, factories for
+users and courses, and test clients logged in as a given user
+"""
+
+from datetime import datetime
+
+import pytest
+from config import Config
+from app import create_app, db
+from app.counters import reconcile_course_counters
+from app.models import Course, Enrollment, Lesson, LessonProgress, User
+
+PASSWORD = 'password123'
+
+
+@pytest.fixture
+def config_overrides():
+    """Extra config for the app fixture; override in a test module"""
+    return {}
+
+
+@pytest.fixture
+def app(tmp_path, config_overrides):
+    config = type('TestConfig', (Config,), dict({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + str(tmp_path / 'test.db'),
+        'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+        'WTF_CSRF_ENABLED': False,
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        # Caches would make the second request cheaper than the first
+        'CACHE_BACKEND': 'null',
+        'USER_CACHE_ENABLED': False,
+        'JOBS_RUN_AFTER_RESPONSE': False,
+        'HEARTBEAT_FLUSH_INTERVAL': 3600,
+        'SQL_INSTRUMENTATION': True,
+        'SQL_LOG_LEVEL': 'WARNING',
+    }, **config_overrides))
+    app = create_app(config)
+    # No app context stays pushed: each request gets its own session, as in
+    # production, so query counts are not flattered by a shared identity map
+    with app.app_context():
+        # Only the primary's tables: the shared db object remembers every bind
+        # key it has seen, including a replica configured by an earlier test
+        db.create_all(bind_key=None)
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+def detached(obj):
+    """Load obj's columns and detach it, so tests can read them outside a context"""
+    db.session.refresh(obj)
+    db.session.expunge(obj)
+    return obj
+
+
+@pytest.fixture
+def make_user(app):
+    def make_user(username, role='student'):
+        with app.app_context():
+            user = User(username=username, email=f'{username}@example.com', role=role)
+            user.set_password(PASSWORD)
+            db.session.add(user)
+            db.session.commit()
+            return detached(user)
+    return make_user
+
+
+@pytest.fixture
+def make_course(app):
+    def make_course(instructor, lessons=3, title='Course', students=(), completed=0):
+        """A published course; each student has completed its first completed lessons"""
+        with app.app_context():
+            course = Course(title=title, description='A course used by the tests',
+                            instructor_id=instructor.id, category='Programming', is_published=True)
+            db.session.add(course)
+            db.session.flush()
+            outline = [Lesson(course_id=course.id, title=f'Lesson {n}', content='Body',
+                              order=n, duration=10) for n in range(1, lessons + 1)]
+            db.session.add_all(outline)
+            db.session.flush()
+            for student in students:
+                enrollment = Enrollment(student_id=student.id, course_id=course.id,
+                                        completed_lessons=completed,
+                                        progress=completed * 100 // lessons if lessons else 0,
+                                        completed=lessons > 0 and completed >= lessons)
+                db.session.add(enrollment)
+                db.session.flush()
+                db.session.add_all(LessonProgress(enrollment_id=enrollment.id, lesson_id=lesson.id,
+                                                  completed=True, completed_at=datetime.utcnow(),
+                                                  time_spent=60)
+                                   for lesson in outline[:completed])
+            db.session.commit()
+            reconcile_course_counters()
+            return detached(course)
+    return make_course
+
+
+@pytest.fixture
+def login(app):
+    def login(user):
+        client = app.test_client()
+        response = client.post('/auth/login', data={'email': user.email, 'password': PASSWORD})
+        assert response.status_code == 302
+        return client
+    return login
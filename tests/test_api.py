@@ -0,0 +1,54 @@
+# tests/test_api.py
+"""Conditional GETs and visibility of the v1 JSON API"""
+
+from app.models import Lesson
+
+
+def first_lesson_id(app, course):
+    with app.app_context():
+        return Lesson.query.filter_by(course_id=course.id).order_by(Lesson.order).first().id
+
+
+def test_matching_etag_gets_an_empty_304(app, make_user, make_course):
+    course = make_course(make_user('teacher', role='instructor'))
+    client = app.test_client()
+
+    first = client.get(f'/api/v1/courses/{course.id}/outline')
+    assert first.status_code == 200 and first.json['data']
+    etag = first.headers['ETag']
+
+    again = client.get(f'/api/v1/courses/{course.id}/outline', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.data == b''
+    assert again.headers['ETag'] == etag
+
+
+def test_editing_a_lesson_changes_the_outline_etag(app, make_user, make_course, login):
+    instructor = make_user('teacher', role='instructor')
+    course = make_course(instructor)
+    client = app.test_client()
+    etag = client.get(f'/api/v1/courses/{course.id}/outline').headers['ETag']
+
+    response = login(instructor).post(f'/courses/lessons/{first_lesson_id(app, course)}/edit',
+                                      data={'title': 'Renamed', 'content': 'Body',
+                                            'order': 1, 'duration': 10})
+    assert response.status_code == 302
+
+    changed = client.get(f'/api/v1/courses/{course.id}/outline', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert changed.json['data'][0]['title'] == 'Renamed'
+
+
+def test_course_being_deleted_is_gone_for_staff_too(app, make_user, make_course, login):
+    instructor = make_user('teacher', role='instructor')
+    course = make_course(instructor)
+    lesson_id = first_lesson_id(app, course)
+    staff = login(instructor)
+    assert staff.post(f'/courses/{course.id}/delete').status_code == 302
+
+    for path in (f'/api/v1/courses/{course.id}', f'/api/v1/courses/{course.id}/outline',
+                 f'/api/v1/lessons/{lesson_id}'):
+        response = staff.get(path)
+        assert response.status_code == 404, path
+        assert response.json['error']['status'] == 404
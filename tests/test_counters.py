@@ -0,0 +1,24 @@
+# tests/test_counters.py
+"""Reconciliation repairs drifted enrollment counters, completion included"""
+
+from app import db
+from app.counters import reconcile_enrollment_progress
+from app.models import Enrollment
+
+
+def test_reconcile_repairs_completed_flag(app, make_user, make_course):
+    instructor = make_user('teacher', role='instructor')
+    done, halfway = make_user('done'), make_user('halfway')
+    make_course(instructor, lessons=2, students=[done], completed=2, title='Finished')
+    make_course(instructor, lessons=2, students=[halfway], completed=1, title='Open')
+
+    with app.app_context():
+        # Flip both flags the wrong way, as a bad bulk load or manual SQL might
+        Enrollment.query.update({Enrollment.completed: ~Enrollment.completed.is_(True)},
+                                synchronize_session=False)
+        db.session.commit()
+
+        assert reconcile_enrollment_progress() == 2
+        flags = {e.student.username: (e.completed, e.progress) for e in Enrollment.query}
+        assert flags == {'done': (True, 100), 'halfway': (False, 50)}
+        assert reconcile_enrollment_progress() == 0
@@ -0,0 +1,61 @@
+# tests/test_deletion.py
+"""Users and courses are marked in the request and removed by background jobs"""
+
+from app import db
+from app.jobs import claim_next, run_job
+from app.models import Course, Enrollment, Job, User
+
+
+def run_queued_jobs(app):
+    with app.app_context():
+        while (job_id := claim_next()) is not None:
+            run_job(job_id)
+
+
+def test_instructor_with_courses_is_not_deleted(app, make_user, make_course, login):
+    admin = login(make_user('admin', role='admin'))
+    instructor = make_user('teacher', role='instructor')
+    make_course(instructor)
+
+    response = admin.post(f'/admin/users/{instructor.id}/delete', follow_redirects=True)
+    assert b'still teaches 1 course(s)' in response.data
+    with app.app_context():
+        assert db.session.get(User, instructor.id).deleting_at is None
+        assert Job.query.filter_by(name='users.delete').count() == 0
+    login(instructor)
+
+
+def test_instructor_is_deleted_after_their_courses(app, make_user, make_course, login):
+    admin = login(make_user('admin', role='admin'))
+    instructor = make_user('teacher', role='instructor')
+    student = make_user('learner')
+    course = make_course(instructor, students=[student], completed=1)
+
+    assert login(instructor).post(f'/courses/{course.id}/delete').status_code == 302
+    assert admin.post(f'/admin/users/{instructor.id}/delete').status_code == 302
+    run_queued_jobs(app)
+
+    with app.app_context():
+        assert db.session.get(User, instructor.id) is None
+        assert db.session.get(Course, course.id) is None
+        assert Enrollment.query.count() == 0
+        assert Job.query.filter(Job.status != 'done').count() == 0
+
+
+def test_deleted_student_is_locked_out_until_removed(app, make_user, make_course, login):
+    admin = login(make_user('admin', role='admin'))
+    student = make_user('learner')
+    session = login(student)
+    make_course(make_user('teacher', role='instructor'), students=[student])
+
+    admin.post(f'/admin/users/{student.id}/delete')
+    assert session.get('/student/dashboard').status_code == 302
+    assert b'learner@example.com' not in admin.get('/admin/users').data
+    response = app.test_client().post('/auth/login', data={'email': student.email,
+                                                           'password': 'password123'})
+    assert response.status_code == 200
+
+    run_queued_jobs(app)
+    with app.app_context():
+        assert db.session.get(User, student.id) is None
+        assert Course.query.one().enrollment_count == 0
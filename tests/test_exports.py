@@ -0,0 +1,74 @@
+# tests/test_exports.py
+"""Admin exports stream CSV and JSONL with safe cells and inclusive date filters"""
+
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+from app import db
+from app.models import Enrollment
+
+
+@pytest.fixture
+def config_overrides():
+    # Several fetch batches even for a handful of rows
+    return {'EXPORT_BATCH_SIZE': 2}
+
+
+@pytest.fixture
+def admin(make_user, login):
+    return login(make_user('admin', role='admin'))
+
+
+@pytest.fixture
+def roster(app, make_user, make_course):
+    """Three enrollments on Jan 30, Jan 31 (late evening) and Feb 1"""
+    students = [make_user('=HYPERLINK'), make_user('bob'), make_user('carol')]
+    make_course(make_user('teacher', role='instructor'), students=students)
+    dates = [datetime(2024, 1, 30, 9), datetime(2024, 1, 31, 23, 30), datetime(2024, 2, 1, 8)]
+    with app.app_context():
+        for student, enrolled_at in zip(students, dates):
+            Enrollment.query.filter_by(student_id=student.id).update({'enrolled_at': enrolled_at})
+        db.session.commit()
+
+
+def read_csv(response):
+    return list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+
+
+def read_jsonl(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_csv_export_quotes_formula_cells(admin, roster):
+    response = admin.get('/admin/export/enrollments.csv')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    usernames = [row['student_username'] for row in read_csv(response)]
+    assert usernames == ["'=HYPERLINK", 'bob', 'carol']
+
+
+def test_jsonl_export_keeps_values_as_is(admin, roster):
+    response = admin.get('/admin/export/enrollments.jsonl')
+    assert response.status_code == 200
+    rows = read_jsonl(response)
+    assert [row['student_username'] for row in rows] == ['=HYPERLINK', 'bob', 'carol']
+    assert rows[0]['enrolled_at'] == '2024-01-30T09:00:00'
+
+
+@pytest.mark.parametrize('fmt, read', [('csv', read_csv), ('jsonl', read_jsonl)])
+def test_until_date_includes_the_whole_day(admin, roster, fmt, read):
+    response = admin.get(f'/admin/export/enrollments.{fmt}?since=2024-01-31&until=2024-01-31')
+    assert [row['student_username'] for row in read(response)] == ['bob']
+
+    response = admin.get(f'/admin/export/enrollments.{fmt}?until=2024-01-31')
+    assert len(read(response)) == 2
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'jsonl'])
+def test_bad_date_is_rejected(admin, roster, fmt):
+    response = admin.get(f'/admin/export/enrollments.{fmt}?until=31/01/2024')
+    assert response.status_code == 400
+    assert b'until must be an ISO date' in response.data
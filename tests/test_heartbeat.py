@@ -0,0 +1,32 @@
+# tests/test_heartbeat.py
+"""Lesson heartbeats credit real time on the page, however often they arrive"""
+
+import time
+from app.heartbeat import heartbeat_token
+from app.models import Enrollment, Lesson, LessonProgress
+
+
+def test_rapid_pings_earn_no_more_than_elapsed_time(app, make_user, make_course, login):
+    student = make_user('learner')
+    course = make_course(make_user('teacher', role='instructor'), students=[student])
+    with app.app_context():
+        enrollment = Enrollment.query.one()
+        lesson = Lesson.query.filter_by(course_id=course.id).first()
+        token = heartbeat_token(enrollment, lesson)
+        enrollment_id, lesson_id = enrollment.id, lesson.id
+    client = login(student)
+    interval = app.config['HEARTBEAT_INTERVAL']
+
+    started = time.monotonic()
+    for _ in range(50):
+        response = client.post('/courses/lessons/heartbeat',
+                               json={'token': token, 'seconds': interval})
+        assert response.status_code == 204
+    elapsed = time.monotonic() - started
+    app.extensions['heartbeats'].flush()
+
+    with app.app_context():
+        progress = LessonProgress.query.filter_by(enrollment_id=enrollment_id,
+                                                  lesson_id=lesson_id).one()
+        # The first ping is taken at its word; the other 49 share the elapsed time
+        assert interval <= progress.time_spent <= interval + elapsed + 1
@@ -0,0 +1,100 @@
+# tests/test_importer.py
+"""A crashed import resumes after its last committed chunk without duplicates"""
+
+import json
+
+import pytest
+from sqlalchemy import func
+from app import db, importer
+from app.counters import reconcile_course_counters
+from app.importer import run_import
+from app.models import Course, ImportKey, Lesson
+from app.search import SQLiteFTSBackend, search_courses
+
+
+def write_manifest(path, records):
+    path.write_text(''.join(json.dumps(record) + '\n' for record in records))
+    return str(path)
+
+
+def course_records(count, instructor='teacher@example.com'):
+    return [{'key': f'course-{n}', 'instructor': instructor, 'title': f'Imported course {n}',
+             'description': f'Everything about topic{n} in one place',
+             'category': 'Programming', 'is_published': True} for n in range(count)]
+
+
+def crash_on_call(monkeypatch, target, name, call):
+    """Make target.name raise on its call-th invocation"""
+    original = getattr(target, name)
+    calls = []
+
+    def crashing(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == call:
+            raise RuntimeError('worker killed')
+        return original(*args, **kwargs)
+    monkeypatch.setattr(target, name, crashing)
+
+
+def test_courses_resume_after_crash_mid_chunk(app, tmp_path, make_user, monkeypatch):
+    make_user('teacher', role='instructor')
+    manifest = write_manifest(tmp_path / 'courses.jsonl', course_records(5))
+
+    # The fourth course dies while the second chunk is being indexed
+    crash_on_call(monkeypatch, SQLiteFTSBackend, 'index', 4)
+    with app.app_context(), pytest.raises(RuntimeError):
+        run_import('courses', manifest, chunk_size=2)
+    monkeypatch.undo()
+
+    with app.app_context():
+        assert Course.query.count() == 2
+        stats = run_import('courses', manifest, chunk_size=2)
+        assert stats['resumed_at'] == 2
+        assert stats['imported'] == 3 and stats['rejected'] == 0
+
+        titles = [title for title, in db.session.query(Course.title).order_by(Course.title)]
+        assert titles == [f'Imported course {n}' for n in range(5)]
+        assert ImportKey.query.filter_by(kind='course').count() == 5
+        for n in range(5):
+            found = search_courses(Course.query, f'topic{n}').all()
+            assert [course.title for course in found] == [f'Imported course {n}']
+
+
+def test_lessons_resume_after_crash_mid_chunk(app, tmp_path, make_user, monkeypatch):
+    make_user('teacher', role='instructor')
+    courses = write_manifest(tmp_path / 'courses.jsonl', course_records(2))
+    lessons = write_manifest(tmp_path / 'lessons.jsonl', [
+        {'course_key': f'course-{n % 2}', 'title': f'Lesson {n}', 'content': 'Body',
+         'order': n, 'duration': 10} for n in range(6)])
+    with app.app_context():
+        run_import('courses', courses)
+
+    # The second chunk has inserted its lessons and bumped the counters
+    # when the progress refresh dies, so all of it must roll back
+    crash_on_call(monkeypatch, importer, 'refresh_course_progress', 3)
+    with app.app_context(), pytest.raises(RuntimeError):
+        run_import('lessons', lessons, chunk_size=3)
+    monkeypatch.undo()
+
+    with app.app_context():
+        assert Lesson.query.count() == 3
+        stats = run_import('lessons', lessons, chunk_size=3)
+        assert stats['resumed_at'] == 3 and stats['imported'] == 3
+
+        assert db.session.query(Lesson.title).distinct().count() == 6
+        totals = dict(db.session.query(Lesson.course_id, func.count()).group_by(Lesson.course_id))
+        for course in Course.query:
+            assert course.lesson_count == totals[course.id] == 3
+            assert course.total_duration == 30
+        assert reconcile_course_counters() == 0
+
+
+@pytest.mark.parametrize('config_overrides', [{'CACHE_BACKEND': 'lru'}])
+def test_import_refreshes_cached_home_page(app, tmp_path, make_user):
+    make_user('teacher', role='instructor')
+    client = app.test_client()
+    assert b'Imported course 0' not in client.get('/').data
+
+    with app.app_context():
+        run_import('courses', write_manifest(tmp_path / 'courses.jsonl', course_records(1)))
+    assert b'Imported course 0' in client.get('/').data
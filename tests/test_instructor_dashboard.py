@@ -0,0 +1,37 @@
+# tests/test_instructor_dashboard.py
+"""
+The instructor dashboard builds its course table from one grouped stats
+query, so its query count is the same however many courses there are
+"""
+
+from app.instrumentation import record_requests
+
+
+def dashboard_stats(app, client):
+    with record_requests(app) as recorded:
+        response = client.get('/instructor/dashboard')
+    assert response.status_code == 200
+    return recorded[-1]
+
+
+def test_query_count_is_constant_in_the_number_of_courses(app, make_user, make_course, login):
+    students = [make_user(f'learner{n}') for n in range(3)]
+    counts = {}
+    for courses in (0, 1, 8):
+        instructor = make_user(f'teacher{courses}', role='instructor')
+        for n in range(courses):
+            make_course(instructor, lessons=4, title=f'Course {n}', students=students, completed=n % 5)
+        counts[courses] = dashboard_stats(app, login(instructor)).queries
+
+    assert counts[0] == counts[1] == counts[8], counts
+
+
+def test_dashboard_stays_within_budget(app, make_user, make_course, login):
+    instructor = make_user('teacher', role='instructor')
+    students = [make_user(f'learner{n}') for n in range(3)]
+    for n in range(8):
+        make_course(instructor, lessons=4, title=f'Course {n}', students=students, completed=2)
+
+    stats = dashboard_stats(app, login(instructor))
+    assert not stats.over_budget, f'{stats.queries} queries, budget {stats.budget}'
+    assert not stats.repeated
@@ -0,0 +1,47 @@
+# tests/test_instrumentation.py
+"""Per-request SQL counting, Server-Timing and query budgets"""
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app import db
+from app.instrumentation import QueryBudgetExceeded, record_requests, statement_shape
+
+
+def test_server_timing_reports_queries(app, make_user, make_course):
+    make_course(make_user('teacher', role='instructor'))
+    with record_requests(app) as recorded:
+        response = app.test_client().get('/courses/browse')
+
+    db_timing, app_timing = response.headers.getlist('Server-Timing')
+    assert db_timing.startswith('db;dur=')
+    assert db_timing.endswith(f'desc="{recorded[-1].queries} queries"')
+    assert app_timing.startswith('app;dur=')
+
+
+def test_failed_statement_leaves_no_state_on_the_connection(app):
+    with app.test_request_context():
+        app.preprocess_request()
+        with pytest.raises(OperationalError):
+            db.session.execute(text('SELECT * FROM no_such_table'))
+        db.session.rollback()
+        db.session.execute(text('SELECT 1'))
+        connection = db.session.connection()
+        assert not any(key.startswith('_sql') or key.startswith('_query')
+                       for key in connection.info)
+        response = app.process_response(app.response_class())
+
+    assert response.headers.getlist('Server-Timing')[0].endswith('desc="1 queries"')
+
+
+def test_strict_budget_raises(app, make_user, make_course):
+    make_course(make_user('teacher', role='instructor'))
+    app.config['SQL_QUERY_BUDGETS_STRICT'] = True
+    app.config['QUERY_BUDGETS'] = {'courses.browse': 1}
+    with pytest.raises(QueryBudgetExceeded):
+        app.test_client().get('/courses/browse')
+
+
+def test_statement_shape_collapses_placeholder_lists():
+    assert statement_shape('SELECT *\n  FROM t WHERE id IN (?, ?, ?)') == \
+        statement_shape('SELECT * FROM t WHERE id IN (?)')
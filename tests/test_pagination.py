@@ -0,0 +1,31 @@
+# tests/test_pagination.py
+"""Keyset pages walk (created_at, id) and skip rows without a created_at"""
+
+from app import db
+from app.models import Course
+from app.pagination import keyset_paginate
+
+
+def test_keyset_pages_skip_rows_without_created_at(app, make_user, make_course, login):
+    admin = make_user('admin', role='admin')
+    instructor = make_user('teacher', role='instructor')
+    for n in range(25):
+        make_course(instructor, lessons=0, title=f'Course {n}')
+    legacy = make_course(instructor, lessons=0, title='Legacy import')
+    with app.app_context():
+        Course.query.filter_by(id=legacy.id).update({Course.created_at: None})
+        db.session.commit()
+
+    with app.test_request_context():
+        titles, cursor = [], None
+        while True:
+            page = keyset_paginate(Course.query, Course, per_page=10, cursor=cursor, with_total=True)
+            titles += [course.title for course in page.items]
+            assert page.total == 25
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+    assert titles == [f'Course {n}' for n in reversed(range(25))]
+
+    response = login(admin).get('/admin/courses?paging=keyset')
+    assert response.status_code == 200
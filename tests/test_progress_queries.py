@@ -0,0 +1,59 @@
+# tests/test_progress_queries.py
+"""
+Lesson pages load the outline and the student's progress set-wise, so
+their query count must not grow with the number of lessons in a course
+"""
+
+import pytest
+from sqlalchemy import select
+from app import db
+from app.instrumentation import record_requests
+from app.models import Lesson
+
+
+def first_lesson_path(app, course):
+    with app.app_context():
+        lesson_id = db.session.scalar(select(Lesson.id).where(Lesson.course_id == course.id)
+                                      .order_by(Lesson.order).limit(1))
+    return f'/courses/lessons/{lesson_id}/view'
+
+
+PAGES = {
+    'courses.view_lesson': first_lesson_path,
+    'courses.course_progress': lambda app, course: f'/courses/{course.id}/progress',
+    'courses.detail': lambda app, course: f'/courses/{course.id}',
+}
+
+
+def queries_for(app, client, path):
+    with record_requests(app) as recorded:
+        response = client.get(path)
+    assert response.status_code == 200
+    return recorded[-1].queries
+
+
+@pytest.mark.parametrize('endpoint', sorted(PAGES))
+def test_query_count_does_not_grow_with_lessons(app, make_user, make_course, login, endpoint):
+    instructor = make_user('teacher', role='instructor')
+    student = make_user('learner')
+    small = make_course(instructor, lessons=2, title='Short', students=[student], completed=1)
+    large = make_course(instructor, lessons=40, title='Long', students=[student], completed=20)
+    client = login(student)
+
+    path = PAGES[endpoint]
+    assert queries_for(app, client, path(app, small)) == queries_for(app, client, path(app, large))
+
+
+@pytest.mark.parametrize('endpoint', sorted(PAGES))
+def test_lesson_pages_stay_within_budget(app, make_user, make_course, login, endpoint):
+    instructor = make_user('teacher', role='instructor')
+    student = make_user('learner')
+    course = make_course(instructor, lessons=40, students=[student], completed=20)
+    client = login(student)
+
+    with record_requests(app) as recorded:
+        client.get(PAGES[endpoint](app, course))
+    stats = recorded[-1]
+    assert stats.endpoint == endpoint
+    assert not stats.over_budget, f'{stats.queries} queries, budget {stats.budget}'
+    assert not stats.repeated
@@ -0,0 +1,81 @@
+# tests/test_replica_routing.py
+"""
+Read replica routing, with a second SQLite file standing in for the replica.
+The replica starts as a copy of the primary and then disagrees on one
+course title, so each read shows which database answered it.
+"""
+
+import shutil
+import time
+import pytest
+from sqlalchemy import create_engine, select, text, update
+from app import database, db
+from app.models import Course, User
+
+PRIMARY_TITLE = 'Primary title'
+REPLICA_TITLE = 'Replica title'
+
+
+@pytest.fixture
+def config_overrides(tmp_path):
+    return {'REPLICA_DATABASE_URL': 'sqlite:///' + str(tmp_path / 'replica.db'),
+            'REPLICA_READ_AFTER_WRITE': 5}
+
+
+@pytest.fixture
+def course(app, tmp_path, make_user, make_course):
+    make_user('learner')
+    course = make_course(make_user('teacher', role='instructor'), title=PRIMARY_TITLE)
+    with app.app_context():
+        # Closing every connection checkpoints the WAL into the file being copied
+        db.engines[database.REPLICA_BIND].dispose()
+        db.engine.dispose()
+    shutil.copy(tmp_path / 'test.db', tmp_path / 'replica.db')
+    replica = create_engine('sqlite:///' + str(tmp_path / 'replica.db'))
+    with replica.begin() as connection:
+        connection.execute(text('UPDATE courses SET title = :title'), {'title': REPLICA_TITLE})
+    replica.dispose()
+    return course
+
+
+def read_title(course):
+    return db.session.scalar(select(Course.title).where(Course.id == course.id))
+
+
+def test_get_reads_go_to_the_replica(app, course):
+    with app.test_request_context('/courses/browse'):
+        assert read_title(course) == REPLICA_TITLE
+    with app.test_request_context('/courses/browse', method='POST'):
+        assert read_title(course) == PRIMARY_TITLE
+
+
+def test_reads_after_a_write_in_the_request_go_to_the_primary(app, course):
+    with app.test_request_context('/courses/browse'):
+        db.session.execute(update(Course).where(Course.id == -1).values(title='x'))
+        assert read_title(course) == PRIMARY_TITLE
+        db.session.rollback()
+
+    with app.test_request_context('/courses/browse'):
+        assert read_title(course) == REPLICA_TITLE
+        db.session.add(Course(title='New', description='d', instructor_id=course.instructor_id,
+                              category='Programming'))
+        db.session.flush()
+        assert read_title(course) == PRIMARY_TITLE
+        db.session.rollback()
+
+
+def test_client_reads_the_primary_for_a_while_after_writing(app, course, login, monkeypatch):
+    with app.app_context():
+        student = User.query.filter_by(username='learner').one()
+    client = login(student)
+    page = client.get('/courses/browse').get_data(as_text=True)
+    # The replica knows the student too, so the page is rendered for them
+    assert REPLICA_TITLE in page and 'learner' in page
+
+    assert client.post(f'/courses/{course.id}/enroll').status_code == 302
+    assert PRIMARY_TITLE in client.get('/courses/browse').get_data(as_text=True)
+
+    # Once REPLICA_READ_AFTER_WRITE has passed, reads go back to the replica
+    later = time.time() + app.config['REPLICA_READ_AFTER_WRITE'] + 1
+    monkeypatch.setattr(database.time, 'time', lambda: later)
+    assert REPLICA_TITLE in client.get('/courses/browse').get_data(as_text=True)
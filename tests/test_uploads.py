@@ -0,0 +1,40 @@
+# tests/test_uploads.py
+"""Releasing content-addressed uploads never deletes a file an upload is reusing"""
+
+import io
+import os
+import time
+from app.models import Job
+from app.uploads import remove_unreferenced, upload_folder, write_content_addressed
+
+
+def age(path, seconds):
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def test_released_file_is_deleted_once_the_grace_period_has_passed(app):
+    with app.app_context():
+        folder = upload_folder('pdfs')
+        name = write_content_addressed(io.BytesIO(b'lesson notes'), folder, '.pdf')
+        age(os.path.join(folder, name), app.config['UPLOAD_RELEASE_GRACE'] + 60)
+
+        assert remove_unreferenced('pdfs', [name]) == [name]
+        assert not os.path.exists(os.path.join(folder, name))
+
+
+def test_reused_file_survives_a_pending_release(app):
+    with app.app_context():
+        folder = upload_folder('pdfs')
+        name = write_content_addressed(io.BytesIO(b'lesson notes'), folder, '.pdf')
+        path = os.path.join(folder, name)
+        age(path, app.config['UPLOAD_RELEASE_GRACE'] + 60)
+
+        # The same bytes are uploaded again before the release job runs
+        assert write_content_addressed(io.BytesIO(b'lesson notes'), folder, '.pdf') == name
+        assert remove_unreferenced('pdfs', [name]) == []
+        assert os.path.exists(path)
+
+        # ...and the release is retried after the grace period
+        job = Job.query.filter_by(name='uploads.release').one()
+        assert job.arguments == {'kind': 'pdfs', 'filenames': [name]}